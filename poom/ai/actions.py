@@ -1,12 +1,12 @@
 from abc import ABC, abstractmethod
 from math import atan2
-from typing import Final, Optional
+from typing import Final, List, Optional
 
 import pygame as pg
-from pathfinding.core.grid import Grid
-from pathfinding.finder.best_first import BestFirst
 
-from poom.ai.intelligent import AbstractIntelligent, Path, Point
+from poom import audio, trace
+from poom.ai.intelligent import AbstractIntelligent, Point
+from poom.ai.navigation import Cell, cell_of
 from poom.resources import R
 from poom.settings import ROOT
 from poom.shared import Settings
@@ -37,7 +37,7 @@ class AttackAction(AbstractAction):
     ) -> None:
         self._owner = owner
         self._enemy_position = enemy_position
-        self._channel = pg.mixer.Channel(1)
+        self._channel = audio.channel(1)
         self._channel.set_volume(settings.volume / 100)
 
     def apply(self) -> None:
@@ -63,7 +63,7 @@ class AttackAction(AbstractAction):
 class DieAction(AbstractAction):
     def __init__(self, owner: AbstractIntelligent) -> None:
         self._owner = owner
-        self._channel = pg.mixer.Channel(4)
+        self._channel = audio.channel(4)
         self._channel.set_volume(settings.volume / 100)
 
     def apply(self) -> None:
@@ -93,7 +93,7 @@ class DiagonalChaseAction(AbstractAction):
         animation = R.animation.get("front_walk", 5, 1)
         self._owner.set_animation(animation)
 
-        self.path = self._owner.enemy.position - self._owner.position
+        self.path = self._target() - self._owner.position
         self.path.scale_to_length(2)
         self.dest = self.path + self._owner.position
 
@@ -110,6 +110,16 @@ class DiagonalChaseAction(AbstractAction):
             or self._owner.player_nearby
         )
 
+    def _target(self) -> Point:
+        flow_field = self._owner.flow_field
+        if flow_field is None:
+            return self._owner.enemy.position
+        flow_field.update(cell_of(self._owner.enemy.position))
+        waypoints = flow_field.waypoints(cell_of(self._owner.position), 2)
+        if not waypoints:
+            return self._owner.enemy.position
+        return pg.Vector2(*waypoints[-1]) + pg.Vector2(0.5)
+
 
 class AStarChaseAction(AbstractAction):
     epsilon: Final[float] = 1e-1
@@ -118,7 +128,7 @@ class AStarChaseAction(AbstractAction):
 
     def __init__(self, owner: AbstractIntelligent) -> None:
         self._owner = owner
-        self._path: Optional[Path] = None
+        self._path: Optional[List[Cell]] = None
         self._point_index = 0
 
     def apply(self) -> None:
@@ -144,12 +154,13 @@ class AStarChaseAction(AbstractAction):
             return self._owner.position
         return pg.Vector2(*self._path[self._point_index]) + pg.Vector2(0.5)
 
-    def _find_path(self) -> Path:
-        grid = Grid(matrix=self._owner.map_)
-        finder = BestFirst()
-        start = list(map(int, self._owner.position))
-        end = list(map(int, self._owner.enemy.position))
-        point1 = grid.node(*start)
-        point2 = grid.node(*end)
-        path, _ = finder.find_path(point1, point2, grid)
+    def _find_path(self) -> List[Cell]:
+        start = cell_of(self._owner.position)
+        goal = cell_of(self._owner.enemy.position)
+        flow_field = self._owner.flow_field
+        if flow_field is not None:
+            flow_field.update(goal)
+            return flow_field.waypoints(start, 2)
+        with trace.span("find_path", "ai"):
+            path = self._owner.navigation.find_path(start, goal)
         return path[1:3]
@@ -1,5 +1,6 @@
 from math import atan2
 
+from poom import trace
 from poom.ai.actions import (
     AbstractAction,
     AStarChaseAction,
@@ -11,6 +12,11 @@ from poom.ai.intelligent import AbstractIntelligent
 
 
 def make_decision(owner: AbstractIntelligent) -> AbstractAction:
+    with trace.span("make_decision", "ai"):
+        return _make_decision(owner)
+
+
+def _make_decision(owner: AbstractIntelligent) -> AbstractAction:
     direction = owner.enemy.position - owner.position
     angle = atan2(direction.y, direction.x)
     owner.rotate_to(angle)
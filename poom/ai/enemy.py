@@ -1,21 +1,25 @@
-from random import random
-from typing import Any, Final, List
+from random import Random
+from typing import TYPE_CHECKING, Any, Final, List, Optional
 
 import numpy as np
 import pygame as pg
 from numpy.typing import NDArray
 
+from poom import audio
 from poom.ai.decision import make_decision
 from poom.ai.intelligent import AbstractIntelligent
+from poom.ai.navigation import FlowField, NavigationGrid, cell_of
 from poom.animated import Animation
 from poom.entities import Entity, Pawn, Renderable
 from poom.gun.gun import Gun
-from poom.level import Map, map2d
 from poom.resources import R
 from poom.settings import ROOT
 from poom.shared import Settings
 from poom.viewer import Viewer
 
+if TYPE_CHECKING:
+    from poom.ai.scheduler import DecisionScheduler
+
 settings = Settings.load(ROOT)
 
 
@@ -37,26 +41,36 @@ class Enemy(AbstractIntelligent, Pawn, Renderable):
         entities: List[Entity],
         map_: NDArray[np.uint8],
         *args: Any,
+        rng: Optional[Random] = None,
+        navigation: Optional[NavigationGrid] = None,
+        flow_field: Optional[FlowField] = None,
+        scheduler: Optional["DecisionScheduler"] = None,
         **kwargs: Any,
     ) -> None:
         super().__init__(*args, **kwargs)
-        self.ai_map = map2d(map_, lambda x: 1 if x == 0 else 0)
+        # Grid is shared by all enemies of level, see World
+        self._navigation = navigation or NavigationGrid(map_)
+        self._flow_field = flow_field
+        # Decisions are made right away without scheduler
+        self._scheduler = scheduler
+        self._decision_pending = False
+        # Seeded generator makes fights reproducible
+        self._rng = rng or Random()
         self._ai_enemy = ai_enemy
         self._texture = texture
         self._health = self.max_health
         self._whether_shoot = False
         self._gun = Gun(map_, 1, 20)
         self._enemies = entities
-        self._channel = pg.mixer.Channel(1)
+        self._channel = audio.channel(1)
         self._channel.set_volume(settings.volume / 100)
-        self._action = make_decision(self)
-        self._action.apply()
+        self.decide()
 
     def move_to(self, point: pg.Vector2) -> None:
         self._position = point
 
     def shoot(self) -> None:
-        if random() < self.hit_chance:
+        if self._rng.random() < self.hit_chance:
             self._gun.shoot(self.position, self.angle, [self._ai_enemy])
 
     def rotate_to(self, angle: float) -> None:
@@ -65,6 +79,11 @@ class Enemy(AbstractIntelligent, Pawn, Renderable):
     def die(self) -> None:
         self._enemies.remove(self)
 
+    def decide(self) -> None:
+        self._decision_pending = False
+        self._action = make_decision(self)
+        self._action.apply()
+
     def set_animation(self, animation: Animation) -> None:
         self._animation = animation
 
@@ -88,10 +107,10 @@ class Enemy(AbstractIntelligent, Pawn, Renderable):
             self.position.x + 0.5 * sign_x,
             self.position.y + 0.5 * sign_y,
         )
-        if (
-            not self.ai_map[int(next_y)][int(self.position.x)]
-            or not self.ai_map[int(self.position.y)][int(next_x)]
-        ):
+        x, y = cell_of(self.position)
+        walkable_y = self._navigation.is_walkable((x, int(next_y)))
+        walkable_x = self._navigation.is_walkable((int(next_x), y))
+        if not walkable_x or not walkable_y:
             return True
         return False
 
@@ -104,8 +123,16 @@ class Enemy(AbstractIntelligent, Pawn, Renderable):
         return False
 
     @property
-    def map_(self) -> Map:
-        return self.ai_map
+    def navigation(self) -> NavigationGrid:
+        return self._navigation
+
+    @property
+    def flow_field(self) -> Optional[FlowField]:
+        return self._flow_field
+
+    @property
+    def decision_pending(self) -> bool:
+        return self._decision_pending
 
     @property
     def whether_shoot(self) -> bool:
@@ -118,8 +145,7 @@ class Enemy(AbstractIntelligent, Pawn, Renderable):
     def take_damage(self, damage: float) -> None:
         self._health -= damage
         if self._health <= 0:
-            self._action = make_decision(self)
-            self._action.apply()
+            self.decide()
         else:
             sound = R.sound.get("bot_injured.mp3")
             self._channel.play(sound)
@@ -141,8 +167,13 @@ class Enemy(AbstractIntelligent, Pawn, Renderable):
     def update(self, dt: float) -> None:
         self._animation.update(dt)
         self._gun.update(dt)
+        if self._decision_pending:
+            return
         self._action.update(dt)
 
         if self._action.done and self._health > 0:
-            self._action = make_decision(self)
-            self._action.apply()
+            if self._scheduler is None:
+                self.decide()
+            else:
+                self._decision_pending = True
+                self._scheduler.request(self)
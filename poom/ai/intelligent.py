@@ -1,11 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
 import pygame as pg
 
+from poom.ai.navigation import FlowField, NavigationGrid
 from poom.animated import Animation
 from poom.entities import Pawn
-from poom.level import Map
 
 Point = pg.Vector2
 Path = List[Point]
@@ -30,6 +30,10 @@ class AbstractIntelligent(Pawn, ABC):
     def die(self) -> None:
         """Kill itself."""
 
+    @abstractmethod
+    def decide(self) -> None:
+        """Choose and apply next action."""
+
     @abstractmethod
     def set_animation(self, animation: Animation) -> None:
         """Set animation to specified one."""
@@ -60,8 +64,18 @@ class AbstractIntelligent(Pawn, ABC):
 
     @property
     @abstractmethod
-    def map_(self) -> Map:
-        """Return level map."""
+    def navigation(self) -> NavigationGrid:
+        """Return walkable cells of level."""
+
+    @property
+    @abstractmethod
+    def flow_field(self) -> Optional[FlowField]:
+        """Return field of steps towards enemy, none to search paths."""
+
+    @property
+    @abstractmethod
+    def decision_pending(self) -> bool:
+        """Return true if action is done and next one is being waited for."""
 
     @property
     @abstractmethod
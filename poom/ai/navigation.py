@@ -0,0 +1,295 @@
+"""Path finding on level map."""
+from collections import OrderedDict, deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pygame as pg
+from numpy.typing import NDArray
+
+from poom import trace
+from poom.level import Map
+from poom.pooma.backend import PathFinder
+from poom.pooma.path_numpy import walkable_neighbours
+
+# Map cell as (x, y)
+Cell = Tuple[int, int]
+
+# Path query as (start, goal, map version)
+PathKey = Tuple[Cell, Cell, int]
+
+
+def cell_of(position: pg.Vector2) -> Cell:
+    """Return map cell, which contains position.
+
+    :param position: position on map
+    :return: cell
+    """
+    return int(position.x), int(position.y)
+
+
+class PathCache:
+    """LRU cache of found paths.
+
+    Paths are keyed by map version too, so paths found on changed map are
+    never returned. The least recently used paths are dropped, when there
+    are more than ``max_size`` of them.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """Initialize cache.
+
+        :param max_size: maximum number of cached paths, zero disables cache
+        """
+        self._max_size = max_size
+        self._paths: "OrderedDict[PathKey, Tuple[Cell, ...]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def get(self, key: PathKey) -> Optional[List[Cell]]:
+        """Return cached path and count hit or miss.
+
+        :param key: path query
+        :return: copy of path or None, if it isn't cached
+        """
+        path = self._paths.get(key)
+        if path is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._paths.move_to_end(key)
+        return list(path)
+
+    def put(self, key: PathKey, path: List[Cell]) -> None:
+        """Store path, dropping the least recently used ones over limit.
+
+        :param key: path query
+        :param path: found path
+        """
+        if self._max_size <= 0:
+            return
+        self._paths[key] = tuple(path)
+        self._paths.move_to_end(key)
+        while len(self._paths) > self._max_size:
+            self._paths.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached paths and reset counters."""
+        self._paths.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class NavigationGrid:
+    """Walkable cells of level, which all enemies share.
+
+    Grid is built once per level. Walkability is stored as NumPy array,
+    walkable neighbours of every cell are precomputed for consumers like
+    :class:`FlowField`, paths are found by
+    :class:`poom.pooma.backend.PathFinder`, which allocates its search state
+    once too. Found paths are kept in :class:`PathCache`, so enemies chasing
+    the player from the same cell share one search. Chasing enemies search
+    paths only when the shared :class:`FlowField` is turned off, so with
+    default settings the cache stays empty.
+
+    If level map is changed, :meth:`invalidate` must be called.
+    """
+
+    def __init__(self, map_: Map, path_cache_size: int = 256) -> None:
+        """Build grid.
+
+        :param map_: level map, zero cells are walkable
+        :param path_cache_size: maximum number of cached paths, defaults
+            to 256
+        """
+        self._map = map_
+        self._version = 0
+        self._cache = PathCache(path_cache_size)
+        self._build()
+
+    @property
+    def walkable(self) -> NDArray[np.bool_]:
+        """Return walkability of cells indexed as ``walkable[y, x]``."""
+        return self._walkable
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self._height, self._width
+
+    @property
+    def neighbours(self) -> List[Tuple[int, ...]]:
+        """Return walkable neighbours of cells.
+
+        Cells are indexed as ``y * width + x``. Walls have neighbours too,
+        because enemies can stand in wall corners.
+        """
+        return self._neighbours
+
+    @property
+    def version(self) -> int:
+        """Return number of map changes."""
+        return self._version
+
+    @property
+    def path_cache(self) -> PathCache:
+        return self._cache
+
+    def invalidate(self) -> None:
+        """Rebuild grid after level map was changed and drop cached paths."""
+        self._version += 1
+        self._cache.clear()
+        self._build()
+
+    def is_walkable(self, cell: Cell) -> bool:
+        """Check that cell is inside map and isn't wall.
+
+        :param cell: map cell
+        :return: true, if cell can be walked through
+        """
+        x, y = cell
+        return (
+            0 <= x < self._width
+            and 0 <= y < self._height
+            and bool(self._walkable[y, x])
+        )
+
+    def find_path(self, start: Cell, goal: Cell) -> List[Cell]:
+        """Find the shortest path by A*.
+
+        Moves by diagonal aren't allowed.
+
+        :param start: start cell, it may be wall
+        :param goal: goal cell
+        :return: cells from start to goal inclusive, empty if goal is
+            unreachable
+        """
+        key = (start, goal, self._version)
+        path = self._cache.get(key)
+        if path is None:
+            path = self._finder.find_path(*start, *goal)
+            self._cache.put(key, path)
+        return path
+
+    def _build(self) -> None:
+        self._walkable: NDArray[np.bool_] = np.asarray(self._map) == 0
+        self._height, self._width = self._walkable.shape
+        self._neighbours = walkable_neighbours(self._walkable)
+        # Python backend searches on the same neighbours
+        self._finder = PathFinder(self._map, self._neighbours)
+
+
+class FlowField:
+    """Steps towards one target cell from every cell of level.
+
+    Field is built by one breadth-first search from target, so all enemies
+    chasing the player share it instead of searching a path each. It is
+    rebuilt only when target moves to another cell, then next waypoint of
+    any cell is read in O(1).
+    """
+
+    def __init__(self, navigation: NavigationGrid) -> None:
+        """Initialize empty field.
+
+        :param navigation: walkable cells of level
+        """
+        self._navigation = navigation
+        self._version = navigation.version
+        self._target: Optional[Cell] = None
+        shape = navigation.shape
+        self._distance: NDArray[np.int32] = np.full(shape, -1, np.int32)
+        self._next: NDArray[np.int32] = np.full(shape, -1, np.int32)
+
+    @property
+    def target(self) -> Optional[Cell]:
+        return self._target
+
+    @property
+    def distance(self) -> NDArray[np.int32]:
+        """Return walk distance to target as ``distance[y, x]``.
+
+        Unreachable cells and walls are -1.
+        """
+        return self._distance
+
+    def update(self, target: Cell) -> None:
+        """Rebuild field, if target has moved to another cell or map changed.
+
+        :param target: target cell, nothing is reachable if it isn't walkable
+        """
+        if self._version != self._navigation.version:
+            self._version = self._navigation.version
+        elif target == self._target:
+            return
+        self._target = target
+        with trace.span("flow_field", "ai"):
+            self._build(target)
+
+    def next_cell(self, cell: Cell) -> Optional[Cell]:
+        """Return neighbour of cell, which is one step closer to target.
+
+        :param cell: map cell, it may be wall
+        :return: next cell, none if cell is target or target is unreachable
+        """
+        x, y = cell
+        if not self._navigation.is_walkable(cell):
+            return self._leave_wall(x, y)
+        index = int(self._next[y, x])
+        if index < 0:
+            return None
+        width = self._navigation.shape[1]
+        return index % width, index // width
+
+    def waypoints(self, cell: Cell, count: int) -> List[Cell]:
+        """Return next cells on the way to target.
+
+        :param cell: start cell, it isn't included
+        :param count: maximal number of cells
+        :return: at most count cells, empty if target is unreachable
+        """
+        cells: List[Cell] = []
+        next_cell = self.next_cell(cell)
+        while next_cell is not None and len(cells) < count:
+            cells.append(next_cell)
+            next_cell = self.next_cell(next_cell)
+        return cells
+
+    def _build(self, target: Cell) -> None:
+        height, width = self._navigation.shape
+        size = width * height
+        distance = [-1] * size
+        next_index = [-1] * size
+        if self._navigation.is_walkable(target):
+            start = target[1] * width + target[0]
+            distance[start] = 0
+            queue = deque([start])
+            neighbours = self._navigation.neighbours
+            while queue:
+                index = queue.popleft()
+                for neighbour in neighbours[index]:
+                    if distance[neighbour] < 0:
+                        distance[neighbour] = distance[index] + 1
+                        next_index[neighbour] = index
+                        queue.append(neighbour)
+        shape = (height, width)
+        self._distance = np.array(distance, np.int32).reshape(shape)
+        self._next = np.array(next_index, np.int32).reshape(shape)
+
+    def _leave_wall(self, x: int, y: int) -> Optional[Cell]:
+        # Enemies can stand in wall corners, step to the closest neighbour
+        height, width = self._navigation.shape
+        if not (0 <= x < width and 0 <= y < height):
+            return None
+        best: Optional[Cell] = None
+        best_distance = -1
+        for neighbour in self._navigation.neighbours[y * width + x]:
+            next_y, next_x = divmod(neighbour, width)
+            distance = int(self._distance[next_y, next_x])
+            if distance >= 0 and (best is None or distance < best_distance):
+                best, best_distance = (next_x, next_y), distance
+        return best
@@ -0,0 +1,148 @@
+"""Spreading of AI decisions over simulation steps."""
+import time
+from math import atan2, cos, radians
+from typing import Callable, Dict, Final, Optional, Protocol, Tuple
+
+from poom import trace
+from poom.ai.intelligent import Point
+from poom.level import Map
+from poom.pooma.backend import shoot
+from poom.viewer import Viewer
+
+# Sort key of queued decision, lower goes first
+Priority = Tuple[bool, bool, float]
+
+
+class Decider(Protocol):
+    """Entity, which decides its next action, like enemy."""
+
+    @property
+    def position(self) -> Point:
+        """Return position on map."""
+
+    @property
+    def decision_pending(self) -> bool:
+        """Return true, if decision is queued."""
+
+    def decide(self) -> None:
+        """Choose and apply next action."""
+
+
+class DecisionScheduler:
+    """Queue of enemies, which wait for a new action.
+
+    Decisions may search paths and cast rays, so when many enemies finish
+    their actions at once, the frame would spike. Instead, enemies are
+    queued and :meth:`run` makes at most ``max_decisions`` decisions per
+    step and stops when ``budget`` is spent, the rest waits for the next
+    steps. Enemies visible to the player go first, then the nearest ones.
+    Enemy is visible, if it is in player's field of view and a ray from
+    player reaches it before any wall. Enemies waiting for :attr:`max_wait`
+    steps or more go before all others, so far enemies aren't starved.
+
+    Time budget depends on machine speed, so simulation with it isn't
+    reproducible. Replays and headless fights limit decisions by count only.
+    """
+
+    # Steps, after which decision is made before any other
+    max_wait: Final[int] = 10
+    # Enemies behind the edge of view are visible, they are about to be seen
+    view_margin: Final[float] = radians(10)
+
+    def __init__(
+        self,
+        player: Viewer,
+        map_: Map,
+        max_decisions: int = 0,
+        budget: Optional[float] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        """Initialize scheduler.
+
+        :param player: viewer, which enemies are prioritized relative to
+        :param map_: level map, walls hide enemies from player
+        :param max_decisions: maximum decisions per step, zero for unlimited,
+            defaults to 0
+        :param budget: seconds for decisions per step, defaults to unlimited
+        :param clock: time source in seconds, defaults to performance counter
+        :raises ValueError: if max decisions is negative or budget isn't
+            positive
+        """
+        if max_decisions < 0:
+            raise ValueError("Max decisions can't be negative.")
+        if budget is not None and budget <= 0:
+            raise ValueError("Decision budget must be positive.")
+        self._player = player
+        self._map = map_
+        self._max_decisions = max_decisions
+        self._budget = budget
+        self._clock = clock
+        # Enemies with number of steps they have waited, in queue order
+        self._queue: Dict[Decider, int] = {}
+
+    @property
+    def pending(self) -> int:
+        """Return number of queued decisions."""
+        return len(self._queue)
+
+    def request(self, owner: Decider) -> None:
+        """Queue decision of owner, if it isn't queued yet.
+
+        :param owner: enemy, which action is done
+        """
+        self._queue.setdefault(owner, 0)
+
+    def run(self) -> int:
+        """Make queued decisions within limits.
+
+        At least one decision is made, if any is queued, so queue always
+        moves.
+
+        :return: number of decisions made
+        """
+        if not self._queue:
+            return 0
+        start = self._clock()
+        with trace.span("decisions", "ai", {"pending": len(self._queue)}):
+            made = 0
+            for owner in sorted(self._queue, key=self._priority):
+                if self._exhausted(made, start):
+                    break
+                del self._queue[owner]
+                if owner.decision_pending:
+                    # Dying enemy may decide out of queue
+                    owner.decide()
+                    made += 1
+            for owner in self._queue:
+                self._queue[owner] += 1
+        return made
+
+    def _exhausted(self, made: int, start: float) -> bool:
+        if made == 0:
+            return False
+        if self._max_decisions and made >= self._max_decisions:
+            return True
+        if self._budget is None:
+            return False
+        return self._clock() - start >= self._budget
+
+    def _priority(self, owner: Decider) -> Priority:
+        direction = owner.position - self._player.position
+        distance = direction.magnitude()
+        waiting = self._queue[owner] < self.max_wait
+        return waiting, not self._visible(direction, distance), distance
+
+    def _visible(self, direction: Point, distance: float) -> bool:
+        if distance == 0:
+            return True
+        cone = cos(self._player.fov / 2 + self.view_margin)
+        if self._player.view_vector.dot(direction) / distance < cone:
+            return False
+        # Ray is cast only for enemies in view, they are few
+        wall_distance: float = shoot(
+            self._map,
+            self._player.position.x,
+            self._player.position.y,
+            atan2(direction.y, direction.x),
+        )
+        return wall_distance >= distance
@@ -0,0 +1,116 @@
+"""Sound output, which can be turned off.
+
+Game objects take channels and sounds from here instead of
+:mod:`pygame.mixer`, so simulation can run without audio device, see
+:mod:`poom.headless`. Audio must be disabled before such objects are
+created.
+"""
+from pathlib import Path
+from typing import Any, Union
+
+import pygame as pg
+
+
+class NullChannel:
+    """Channel, which plays nothing."""
+
+    def play(self, sound: "Sound") -> None:
+        """Do nothing."""
+
+    def stop(self) -> None:
+        """Do nothing."""
+
+    def set_volume(self, *args: float) -> None:
+        """Do nothing."""
+
+    def get_busy(self) -> bool:
+        return False
+
+
+class NullSound:
+    """Sound, which is never loaded."""
+
+    def play(self, *args: Any, **kwargs: Any) -> None:
+        """Do nothing."""
+
+    def stop(self) -> None:
+        """Do nothing."""
+
+    def set_volume(self, volume: float) -> None:
+        """Do nothing."""
+
+    def get_length(self) -> float:
+        return 0
+
+
+Sound = Union[pg.mixer.Sound, NullSound]
+
+
+class MixerChannel:
+    """Mixer channel, which plays sounds of this module.
+
+    Silent sounds are only created, when audio is disabled, so they never
+    get here, but type of :meth:`play` argument is the same as of
+    :class:`NullChannel`.
+    """
+
+    def __init__(self, index: int) -> None:
+        """Initialize channel.
+
+        :param index: mixer channel number
+        """
+        self._channel = pg.mixer.Channel(index)
+
+    def play(self, sound: Sound) -> None:
+        """Play sound, silent sound is skipped.
+
+        :param sound: sound to play
+        """
+        if isinstance(sound, pg.mixer.Sound):
+            self._channel.play(sound)
+
+    def stop(self) -> None:
+        self._channel.stop()
+
+    def set_volume(self, volume: float) -> None:
+        self._channel.set_volume(volume)
+
+    def get_busy(self) -> bool:
+        return self._channel.get_busy()
+
+
+Channel = Union[MixerChannel, NullChannel]
+
+_enabled = True
+
+
+def disable() -> None:
+    """Replace all new channels and sounds by silent ones."""
+    global _enabled  # noqa: WPS420 mixer is process-wide too
+    _enabled = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def channel(index: int) -> Channel:
+    """Return mixer channel or silent one, if audio is disabled.
+
+    :param index: channel number
+    :return: channel
+    """
+    if not _enabled:
+        return NullChannel()
+    return MixerChannel(index)
+
+
+def sound(path: Union[str, Path]) -> Sound:
+    """Load sound or return silent one, if audio is disabled.
+
+    :param path: sound file
+    :return: sound
+    """
+    if not _enabled:
+        return NullSound()
+    return pg.mixer.Sound(path)
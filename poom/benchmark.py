@@ -0,0 +1,352 @@
+"""Headless render benchmark.
+
+Every level is rendered into an offscreen surface along a deterministic
+camera path. Frame timings recorded by :class:`poom.profiler.Profiler` are
+printed as JSON::
+
+    python -m poom.benchmark --frames 300 --size 1280x720
+
+Run it from the project root like the game. SDL dummy video driver is used
+unless ``SDL_VIDEODRIVER`` is set, so no window is opened. Set
+``POOM_BACKEND=numpy`` to benchmark NumPy backend.
+"""
+import argparse
+import json
+import os
+import sys
+from math import pi
+from random import Random
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Keep stdout clean for JSON and don't open a window
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np  # noqa: E402
+import pygame as pg  # noqa: E402
+
+from poom import audio, replay  # noqa: E402
+from poom.entities import Entity, Renderable  # noqa: E402
+from poom.graphics import (  # noqa: E402
+    AbstractRenderer,
+    BackgroundRenderer,
+    CrosshairRenderer,
+    EntityRenderer,
+    FloorRenderer,
+    Pipeline,
+    WallRenderer,
+)
+from poom.level import Level, Map  # noqa: E402
+from poom.pooma.backend import COMPILED, set_num_threads  # noqa: E402
+from poom.pooma.shading import Shading  # noqa: E402
+from poom.profiler import Percentiles, Profiler  # noqa: E402
+from poom.settings import ROOT  # noqa: E402
+from poom.shared import Settings  # noqa: E402
+from poom.viewer import Viewer  # noqa: E402
+
+Pose = Tuple[pg.Vector2, float]
+
+
+class Camera(Viewer):
+    """Viewer, which is moved by benchmark."""
+
+    def move(self, position: pg.Vector2, angle: float) -> None:
+        """Set camera pose.
+
+        :param position: new position
+        :param angle: new view angle in radians
+        """
+        self._position = position
+        self._angle = angle
+
+
+class Prop(Entity, Renderable):
+    """Static entity, which stands for enemy."""
+
+    def __init__(self, texture: pg.Surface, position: pg.Vector2) -> None:
+        super().__init__(position, 0, 0)
+        self._texture = texture
+
+    @property
+    def texture(self) -> pg.Surface:
+        return self._texture
+
+    def update(self, dt: float) -> None:
+        pass  # noqa: WPS420 props don't move
+
+
+def camera_path(
+    map_: Map,
+    frames: int,
+    seed: int = 0,
+    frames_per_cell: int = 8,
+) -> Iterator[Pose]:
+    """Fly through free cells of the map.
+
+    Camera walks between centers of neighbouring free cells, which are
+    chosen by seeded random generator, and turns around once per 120 frames,
+    so the same seed always gives the same path.
+
+    :param map_: level map
+    :param frames: number of poses
+    :param seed: random seed, defaults to 0
+    :param frames_per_cell: frames of moving to the next cell, defaults to 8
+    :yield: camera position and view angle
+    :raises ValueError: if map has no free cells
+    """
+    free = np.argwhere(map_ == 0)
+    if not free.size:
+        raise ValueError("Map has no free cells.")
+    rng = Random(seed)
+    # Map is indexed as map_[y, x]
+    cell = tuple(free[rng.randrange(len(free))][::-1])
+    target = cell
+    for frame in range(frames):
+        step = frame % frames_per_cell
+        if step == 0:
+            cell = target
+            target = _next_cell(map_, cell, rng)
+        start, end = pg.Vector2(cell), pg.Vector2(target)
+        position = start.lerp(end, step / frames_per_cell) + pg.Vector2(0.5, 0.5)
+        yield position, 2 * pi * frame / 120
+
+
+def _next_cell(map_: Map, cell: Tuple[int, int], rng: Random) -> Tuple[int, int]:
+    x, y = cell
+    neighbours = [
+        (x + dx, y + dy)
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+        if 0 <= y + dy < map_.shape[0]
+        and 0 <= x + dx < map_.shape[1]
+        and map_[y + dy, x + dx] == 0
+    ]
+    return rng.choice(neighbours) if neighbours else cell
+
+
+def rounded(percentiles: Percentiles) -> Percentiles:
+    return {name: round(value, 3) for name, value in percentiles.items()}
+
+
+def build_renderers(
+    level: Level,
+    number: str,
+    settings: Settings,
+    entities: Optional[Sequence[Entity]] = None,
+) -> List[AbstractRenderer]:
+    """Create world renderers like level scene does.
+
+    HUD and gun need a living player, so only crosshair stands for overlays.
+
+    :param level: loaded level
+    :param number: level directory name
+    :param settings: game settings
+    :param entities: rendered entities, defaults to props at enemy positions
+    :return: renderers in drawing order
+    """
+    shading = None
+    if settings.distance_shading:
+        shading = Shading(distance=settings.fog_distance)
+    textures = ROOT / "assets" / "textures"
+    skybox = textures / f"skybox{number}.png"
+    if not skybox.is_file():
+        skybox = textures / "skybox1.png"
+    if entities is None:
+        enemy_texture = pg.image.load(
+            ROOT / "assets" / "sprites" / "front_attack" / "0.png"
+        ).convert_alpha()
+        entities = [
+            Prop(enemy_texture, position) for position in level.enemies_positions
+        ]
+
+    renderers: List[AbstractRenderer] = [
+        BackgroundRenderer(pg.image.load(skybox), level.map_.shape[0]),
+        WallRenderer(
+            level.map_,
+            column_cache_bytes=settings.column_cache_mb * 2 ** 20,
+            shading=shading,
+        ),
+        EntityRenderer(entities, shading),
+        CrosshairRenderer(),
+    ]
+    if level.floor_texture is not None:
+        ceiling = None
+        if level.ceiling_texture is not None:
+            ceiling = pg.image.load(level.ceiling_texture)
+        floor = FloorRenderer(pg.image.load(level.floor_texture), ceiling)
+        renderers.insert(1, floor)
+    return renderers
+
+
+def run_level(
+    number: str,
+    size: Tuple[int, int],
+    frames: int,
+    warmup: int,
+    settings: Settings,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Render level along camera path.
+
+    :param number: level directory name
+    :param size: surface size
+    :param frames: number of measured frames
+    :param warmup: number of frames rendered before measuring
+    :param settings: game settings
+    :param seed: camera path seed, defaults to 0
+    :return: frame and per-renderer timings
+    """
+    level = Level.from_dir(ROOT / "assets" / "levels" / number)
+    camera = Camera(pg.Vector2(0, 0), 0, pi / 2)
+    profiler = Profiler(capacity=max(frames, 1))
+    pipeline = Pipeline(
+        camera,
+        build_renderers(level, number, settings),
+        render_scale=settings.render_scale,
+        present=False,
+        profiler=profiler,
+    )
+    surface = pg.Surface(size, depth=32)
+
+    for frame, (position, angle) in enumerate(
+        camera_path(level.map_, warmup + frames, seed),
+    ):
+        if frame == warmup:
+            profiler.clear()
+        camera.move(position, angle)
+        pipeline.render(surface)
+    return timings(profiler)
+
+
+def run_replay(
+    recording: replay.Recording,
+    size: Tuple[int, int],
+    settings: Settings,
+) -> Dict[str, Any]:
+    """Render recorded level run through player's eyes.
+
+    Every simulation step is rendered once, so frames are the same on every
+    run. Only rendering is timed.
+
+    :param recording: recorded level run
+    :param size: surface size
+    :param settings: game settings
+    :return: frame and per-renderer timings
+    """
+    world = replay.create_world(recording)
+    profiler = Profiler(capacity=max(recording.steps, 1))
+    pipeline = Pipeline(
+        world.player,
+        build_renderers(world.level, recording.level, settings, world.enemies),
+        render_scale=settings.render_scale,
+        present=False,
+        profiler=profiler,
+    )
+    surface = pg.Surface(size, depth=32)
+
+    dt = 1 / recording.tick_rate
+    for _ in range(recording.steps):
+        world.step(dt)
+        pipeline.render(surface)
+    return {"level": recording.level, **timings(profiler)}
+
+
+def timings(profiler: Profiler) -> Dict[str, Any]:
+    """Return frame rate and rounded percentiles of all stages.
+
+    :param profiler: profiler of rendered frames
+    :return: JSON compatible timings
+    """
+    total = profiler.samples(Profiler.frame_stage).sum() / 1000
+    return {
+        "fps": round(profiler.frames / total, 1) if total else 0.0,
+        "frame_ms": rounded(profiler.percentiles(Profiler.frame_stage)),
+        "renderers": {
+            stage: rounded(profiler.percentiles(stage)) for stage in profiler.stages
+        },
+    }
+
+
+def level_numbers() -> List[str]:
+    """Return names of all level directories."""
+    root = ROOT / "assets" / "levels"
+    return sorted(
+        (path.name for path in root.iterdir() if path.is_dir()),
+        key=lambda name: int(name) if name.isdigit() else 0,
+    )
+
+
+def _size(text: str) -> Tuple[int, int]:
+    width, _, height = text.partition("x")
+    return int(width), int(height)
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    settings = Settings.load(ROOT)
+    parser = argparse.ArgumentParser(
+        prog="python -m poom.benchmark",
+        description="Render levels headlessly and report frame timings as JSON.",
+    )
+    parser.add_argument("--levels", nargs="+", default=level_numbers())
+    parser.add_argument(
+        "--size",
+        type=_size,
+        default=tuple(settings.screen_size),
+        help="surface size like 1280x720, defaults to screen size",
+    )
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="render recorded fights instead of flying through levels",
+    )
+    parser.add_argument("--output", help="write JSON into file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = _parse_args(argv[1:])
+    settings = Settings.load(ROOT)
+    pg.display.init()
+    # Textures are converted to display format on loading
+    pg.display.set_mode((1, 1))
+    set_num_threads(settings.render_threads)
+
+    result: Dict[str, Any] = {
+        "backend": "compiled" if COMPILED else "numpy",
+        "size": list(args.size),
+        "render_scale": settings.render_scale,
+        "distance_shading": settings.distance_shading,
+    }
+    if args.replay:
+        audio.disable()
+        result["replays"] = [
+            run_replay(recording, args.size, settings)
+            for recording in replay.load(args.replay)
+        ]
+    else:
+        result["frames"] = args.frames
+        result["levels"] = {
+            number: run_level(
+                number,
+                args.size,
+                args.frames,
+                args.warmup,
+                settings,
+                args.seed,
+            )
+            for number in args.levels
+        }
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as fp:
+            fp.write(text)
+    else:
+        print(text)  # noqa: WPS421 JSON is the output
+    pg.display.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,6 +1,7 @@
+import argparse
 import time
-from math import radians
-from typing import List
+from random import Random
+from typing import List, Optional
 
 import pygame as pg
 from pygame.event import Event
@@ -8,25 +9,32 @@ from pygame.event import Event
 pg.mixer.init()  # noqa
 
 import poom.shared as shared
-from poom.ai.enemy import Enemy
+from poom import audio, replay, trace
 from poom.credits import Credits
 from poom.graphics import (
     BackgroundRenderer,
     CrosshairRenderer,
     EntityRenderer,
+    FloorRenderer,
     FPSRenderer,
     GunRenderer,
     HUDRenderer,
     Pipeline,
+    ProfilerRenderer,
     WallRenderer,
 )
-from poom.gun.player_gun import create_player_gun
 from poom.level import Level
 from poom.main_menu import WelcomeScene
-from poom.player import Player
+from poom.player import KeySource
+from poom.pooma.backend import set_num_threads
+from poom.pooma.shading import Shading
+from poom.profiler import Profiler
 from poom.records import Record, update_record
 from poom.settings import ROOT
 from poom.shared import SceneContext, Settings
+from poom.timestep import FixedTimestep
+from poom.viewer import InterpolatedViewer
+from poom.world import World
 
 clock = pg.time.Clock()
 settings = Settings.load(ROOT)
@@ -38,74 +46,93 @@ class LevelScene(shared.AbstractScene):
     def __init__(self, context: shared.SceneContext) -> None:
         super().__init__(context)
         level = Level.from_dir(ROOT / "assets" / "levels" / f"{self.level}")
-        sound = pg.mixer.Sound(ROOT / "assets" / "sounds" / f"level{self.level}.mp3")
-        self.channel = pg.mixer.Channel(5)
+        sound = audio.sound(ROOT / "assets" / "sounds" / f"level{self.level}.mp3")
+        self.channel = audio.channel(5)
         self.channel.set_volume(settings.volume / 100)
         self.map_ = level.map_
 
-        player_gun = create_player_gun(
-            self.map_,
-            2,
-            25,
-            ROOT / "assets" / "sprites" / "gun",
-            2,
-        )
         self._start_time = time.time()
-        self._enemies: List[Enemy] = []
-        self._player = Player(
-            map_=self.map_,
-            gun=player_gun,
-            position=pg.Vector2(1.1, 1.1),
-            angle=radians(45),
-            fov=radians(90),
-            enemies=self._enemies,
-        )
-        self._player.on_death(self._on_lose)
-
-        enemy_texture = pg.image.load(
-            ROOT / "assets" / "sprites" / "front_attack" / "0.png"
-        )
-        for position in level.enemies_positions:
-            enemy = Enemy(
-                texture=enemy_texture,
-                map_=level.map_,
-                entities=self._enemies,
-                ai_enemy=self._player,
-                position=position,
-                angle=radians(45),
-                fov=radians(90),
+        keys: KeySource = pg.key.get_pressed
+        seed = None
+        budget = None
+        if settings.ai_budget_ms > 0:
+            budget = settings.ai_budget_ms / 1000
+        self._recording: Optional[replay.Recording] = None
+        recordings = self._context.game.recordings
+        if recordings is not None:
+            seed = Random().randrange(World.max_seed)
+            self._recording = replay.Recording(
+                str(self.level),
+                seed,
+                settings.tick_rate,
+                flow_field=settings.flow_field,
+                decisions_per_step=settings.ai_decisions_per_step,
             )
-            self._enemies.append(enemy)
+            recordings.append(self._recording)
+            keys = replay.RecordingKeys(self._recording)
+            # Replays limit decisions by count only, see DecisionScheduler
+            budget = None
+        self._world = World(level, keys, seed, budget)
+        self._player = self._world.player
+        self._enemies = self._world.enemies
+        self._player.on_death(self._on_lose)
+        self._camera = InterpolatedViewer(self._player)
 
+        shading = None
+        if settings.distance_shading:
+            shading = Shading(distance=settings.fog_distance)
         self._renderers = [
             BackgroundRenderer(
                 pg.image.load(ROOT / "assets" / "textures" / f"skybox{self.level}.png"),
                 self.map_.shape[0],
             ),
-            WallRenderer(self.map_, self._player),
-            EntityRenderer(self._enemies),
+            WallRenderer(
+                self.map_,
+                column_cache_bytes=settings.column_cache_mb * 2 ** 20,
+                shading=shading,
+            ),
+            EntityRenderer(self._enemies, shading),
             CrosshairRenderer(),
-            GunRenderer(player_gun),
+            GunRenderer(self._world.player_gun),
             HUDRenderer(self._player),
         ]
+        if level.floor_texture is not None:
+            ceiling = None
+            if level.ceiling_texture is not None:
+                ceiling = pg.image.load(level.ceiling_texture)
+            floor = FloorRenderer(pg.image.load(level.floor_texture), ceiling)
+            # Floor is drawn over flat background floor and under walls
+            self._renderers.insert(1, floor)
         if settings.fps_tick:
             self._renderers.append(FPSRenderer(clock))
+        profiler = None
+        if settings.profiler:
+            profiler = Profiler()
+            self._renderers.append(ProfilerRenderer(profiler))
         self.channel.play(sound)
-        self._pipeline = Pipeline(self._player, self._renderers)
+        self._pipeline = Pipeline(
+            self._camera,
+            self._renderers,
+            dirty_rects=settings.dirty_rects,
+            render_scale=settings.render_scale,
+            profiler=profiler,
+        )
 
     def on_event(self, events: List[Event]) -> None:
         pass
 
     def render(self) -> None:
+        self._camera.interpolate(self._context.interpolation)
         self._pipeline.render(self._context.screen)
 
     def update(self, dt: float) -> None:
-        if len(self._enemies) == 0:
+        if self._world.won:
             self._on_win()
 
-        self._player.update(dt)
-        for npc in self._enemies:
-            npc.update(dt)
+        self._camera.save_pose()
+        self._world.step(dt)
+        if self._recording is not None:
+            self._recording.final = replay.world_state(self._world)
 
     def _on_lose(self) -> None:
         self.channel.stop()
@@ -125,11 +152,27 @@ class LevelScene(shared.AbstractScene):
 
 
 class Game:
-    def __init__(self) -> None:
+    def __init__(self, recordings: Optional[List[replay.Recording]] = None) -> None:
+        """Initialize game.
+
+        :param recordings: list to record every level run into, defaults to
+            None, which means no recording
+        """
         self._init()
         self._run = True
+        self._recordings = recordings
+        self._timestep = FixedTimestep(
+            settings.tick_rate,
+            settings.max_catch_up_steps,
+        )
+        # Scene, which the last frame was simulated for
+        self._scene: Optional[shared.AbstractScene] = None
         self._screen = pg.display.set_mode(settings.screen_size, vsync=1)
 
+    @property
+    def recordings(self) -> Optional[List[replay.Recording]]:
+        return self._recordings
+
     def stop(self) -> None:
         self._run = False
 
@@ -138,6 +181,12 @@ class Game:
         sc.scene = WelcomeScene(sc)
 
         while self._run:
+            with trace.span("frame"):
+                self._frame(sc)
+        self._deinit()
+
+    def _frame(self, sc: SceneContext) -> None:
+        with trace.span("events"):
             # TODO: event handler
             events = pg.event.get()
             for event in events:
@@ -148,10 +197,22 @@ class Game:
                 if event.type == pg.WINDOWRESTORED:
                     pg.mixer.music.unpause()
             sc.on_event(events)
-            sc.render()
+        with trace.span("tick"):
             dt = clock.tick() / 1000
-            sc.update(dt)
-        self._deinit()
+        if sc.scene is not self._scene:
+            # Time spent on loading new scene mustn't be caught up
+            self._scene = sc.scene
+            self._timestep.reset()
+            dt = 0
+        with trace.span("update"):
+            # Simulation runs at fixed rate independently of frame rate
+            for _ in range(self._timestep.advance(dt)):
+                sc.update(self._timestep.step)
+                if sc.scene is not self._scene:
+                    break  # Steps left were meant for the old scene
+        with trace.span("render"):
+            sc.interpolation = self._timestep.alpha
+            sc.render()
 
     def _init(self) -> None:
         pg.init()
@@ -159,12 +220,36 @@ class Game:
         pg.display.set_caption("Poom")
         icon = pg.image.load(ROOT / "assets" / "textures" / "icon.ico")
         pg.display.set_icon(icon)
+        set_num_threads(settings.render_threads)
 
     def _deinit(self) -> None:
         pg.quit()
 
 
 def main(argv: List[str]) -> int:
-    game = Game()
-    game.run()
+    parser = argparse.ArgumentParser(prog="poom")
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="record frame stages and save them as Chrome trace on exit",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        help="record input of every level and save it for replay on exit",
+    )
+    args = parser.parse_args(argv[1:])
+    if args.trace:
+        trace.start()
+    recordings: Optional[List[replay.Recording]] = [] if args.record else None
+
+    game = Game(recordings)
+    try:
+        game.run()
+    finally:
+        tracer = trace.stop()
+        if tracer is not None:
+            tracer.save(args.trace)
+        if recordings is not None:
+            replay.save(recordings, args.record)
     return 0
@@ -1,18 +1,44 @@
 """All utils for graphics pipeline."""
 import os
+import time
 from abc import ABC, abstractmethod
 from math import degrees
 from pathlib import Path
-from typing import Any, Collection, Final, List, Optional, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Final,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import numpy as np
 import pygame as pg
 from numpy.typing import NDArray
 
+from poom import trace
 from poom.entities import Damagable, Entity
 from poom.gun.player_gun import PlayerGun
 from poom.level import Map
-from poom.pooma.ray_march import draw_sprite, draw_walls
+from poom.pooma.atlas import SpriteAtlas, SpriteFrame, TextureAtlas, shaded
+from poom.pooma.backend import (
+    blit_walls,
+    cast_walls,
+    cull_sprites,
+    draw_floor,
+    draw_sprite,
+    draw_sprites,
+    draw_walls_pixels,
+)
+from poom.pooma.column_cache import ColumnCache
+from poom.pooma.floor_tables import FloorTables
+from poom.pooma.hits import WallHits
+from poom.pooma.shading import Shading
+from poom.profiler import Profiler
 from poom.settings import ROOT  # pylint:disable=E0611
 from poom.viewer import Viewer
 
@@ -22,6 +48,10 @@ StencilBuffer = NDArray[np.float32]
 class AbstractRenderer(ABC):
     """Base class for all renderers."""
 
+    # Renderer draws on display surface after upscaling of lower resolution
+    # frame, e.g. because it has pixel-sized textures
+    native_resolution: bool = False
+
     @abstractmethod
     def __call__(
         self,
@@ -36,9 +66,34 @@ class AbstractRenderer(ABC):
         :param viewer: camera-like object
         """
 
+    def covers(self, surface: pg.Surface) -> bool:
+        """Check that renderer overwrites every pixel of surface.
+
+        Surface isn't cleared before frame, if any renderer covers it.
+
+        :param surface: surface for rendering
+        :return: False by default
+        """
+        return False
+
+    def changed_rects(self) -> Optional[List[pg.Rect]]:
+        """Return areas, which the last call changed since previous frame.
+
+        Areas changed by the previous frame are updated too, so renderers
+        needn't report places, where they drew before.
+
+        :return: None by default, it means the whole surface changed
+        """
+        return None
+
 
 class BackgroundRenderer(AbstractRenderer):
-    """Render sky and floor."""
+    """Render sky and floor.
+
+    Skybox scaled to fill the upper half of surface is tiled into a strip
+    together with floor, so every frame is a single blit of strip part.
+    Strip is rebuilt only when surface size or skybox changes.
+    """
 
     def __init__(self, skybox: pg.Surface, world_size: int) -> None:
         """Initialize object.
@@ -52,6 +107,26 @@ class BackgroundRenderer(AbstractRenderer):
         self._skybox = skybox
         self._world_size = world_size
         self._floor_color = (40, 40, 40)
+        self._strip: Optional[pg.Surface] = None
+        self._strip_key: Optional[Tuple[Tuple[int, int], PixelFormat]] = None
+        self._sky_width = 0
+        self._last_frame: Optional[Tuple[float, Tuple[int, int]]] = None
+        self._changed = True
+
+    @property
+    def skybox(self) -> pg.Surface:
+        """Return sky image."""
+        return self._skybox
+
+    @skybox.setter
+    def skybox(self, skybox: pg.Surface) -> None:
+        """Replace sky image and drop prepared strip.
+
+        :param skybox: sky image
+        """
+        self._skybox = skybox
+        self._strip_key = None
+        self._last_frame = None
 
     def __call__(
         self,
@@ -65,37 +140,172 @@ class BackgroundRenderer(AbstractRenderer):
         :param _: unused
         :param viewer: camera-like object
         """
-        self._render_skybox(surface, viewer)
-        self._redener_floor(surface)
+        frame = (viewer.angle, surface.get_size())
+        self._changed = frame != self._last_frame
+        self._last_frame = frame
 
-    def _render_skybox(self, surface: pg.Surface, viewer: Viewer) -> None:
-        """Render skybox.
+        strip = self._get_strip(surface)
+        scale = self._sky_width / self._skybox.get_width()
+        # Skybox column at the left side of surface
+        offset = self._world_size * degrees(viewer.angle) * scale % self._sky_width
+        surface.blit(strip, (0, 0), (int(offset), 0, *surface.get_size()))
 
-        Calculate offset using :attr:`~BackgroundRenderer._world_size`.
+    def covers(self, surface: pg.Surface) -> bool:
+        """Check that skybox and floor cover surface.
 
-        :param surface: rendering surface(canvas)
-        :param viewer: camera-like object
+        :param surface: surface for rendering
+        :return: True, strip is always large enough
         """
-        width = self._skybox.get_width()
-        offset = -self._world_size * degrees(viewer.angle) % width
-        for third in range(-1, 2):
-            skybox_position = (offset + third * width, 0)
-            surface.blit(self._skybox, skybox_position)
+        return True
+
+    def changed_rects(self) -> Optional[List[pg.Rect]]:
+        """Return nothing, if background is the same as in previous frame."""
+        return None if self._changed else []
 
-    def _redener_floor(self, surface: pg.Surface) -> None:
-        """Render floor.
+    def _get_strip(self, surface: pg.Surface) -> pg.Surface:
+        """Return background strip prepared for surface.
 
-        :param surface: rendering surface(canvas)
+        :param surface: surface for rendering
+        :return: cached strip
+        """
+        key = (surface.get_size(), pixel_format(surface))
+        if self._strip is None or key != self._strip_key:
+            self._strip = self._build_strip(surface)
+            self._strip_key = key
+        return self._strip
+
+    def _build_strip(self, surface: pg.Surface) -> pg.Surface:
+        """Tile scaled skybox and fill floor.
+
+        :param surface: surface for rendering
+        :return: strip, which is wider than surface by one skybox
         """
         width, height = surface.get_size()
+        sky_height = max(height // 2, 1)
+        skybox_width, skybox_height = self._skybox.get_size()
+        self._sky_width = max(skybox_width * sky_height // skybox_height, 1)
+        size = (self._sky_width, sky_height)
+        if self._skybox.get_bitsize() >= 24:
+            sky = pg.transform.smoothscale(self._skybox, size)
+        else:
+            sky = pg.transform.scale(self._skybox, size)
+
+        tiles = -(-width // self._sky_width) + 1
+        strip = pg.Surface((tiles * self._sky_width, height), 0, surface)
+        for tile in range(tiles):
+            strip.blit(sky, (tile * self._sky_width, 0))
+
+        floor_position = (0, height // 2, strip.get_width(), height - height // 2)
+        strip.fill(self._floor_color, floor_position)
+        return strip
+
+
+class FloorRenderer(AbstractRenderer):
+    """Render textured floor and ceiling by floor casting.
+
+    Texels are written straight into pixels of 32-bit surfaces, other
+    surfaces keep flat floor of :class:`BackgroundRenderer`. Floor casting
+    tables are computed once per resolution and FOV.
+    """
+
+    def __init__(
+        self,
+        floor: pg.Surface,
+        ceiling: Optional[pg.Surface] = None,
+    ) -> None:
+        """Initialize renderer.
+
+        :param floor: floor texture, which covers one map cell
+        :param ceiling: ceiling texture, skybox is left visible if it's None
+        """
+        self._floor = floor
+        self._ceiling = ceiling
+        self._tables: Optional[FloorTables] = None
+        self._tables_key: Optional[Tuple[Tuple[int, int], float]] = None
+        self._texels: Dict[
+            PixelFormat, Tuple[NDArray[np.uint32], Optional[NDArray[np.uint32]]]
+        ] = {}
+        self._last_frame: Optional[FloorKey] = None
+        self._changed = True
+
+    def __call__(
+        self,
+        surface: pg.Surface,
+        _stencil: StencilBuffer,
+        viewer: Viewer,
+    ) -> None:
+        """Draw floor and ceiling.
+
+        :param surface: surface for rendering
+        :param _stencil: unused
+        :param viewer: camera-like object
+        """
+        frame: FloorKey = (
+            viewer.position.x,
+            viewer.position.y,
+            viewer.angle,
+            viewer.fov,
+            surface.get_size(),
+            pixel_format(surface),
+        )
+        self._changed = frame != self._last_frame
+        self._last_frame = frame
+        if surface.get_bytesize() != 4:
+            return
+
+        floor_texels, ceiling_texels = self._get_texels(surface)
+        # Surface stays locked while pixels array is alive
+        pixels = pg.surfarray.pixels2d(surface)
+        draw_floor(
+            pixels,
+            self._get_tables(surface, viewer.fov),
+            floor_texels,
+            ceiling_texels,
+            *viewer.position,
+            viewer.angle,
+        )
+        del pixels  # noqa: WPS420 unlock surface
+
+    def covers(self, surface: pg.Surface) -> bool:
+        """Check that both floor and ceiling are drawn on surface."""
+        return self._ceiling is not None and surface.get_bytesize() == 4
+
+    def changed_rects(self) -> Optional[List[pg.Rect]]:
+        """Return nothing, if viewer hasn't moved since previous frame."""
+        return None if self._changed else []
 
-        floor_position = (0, height // 2, width, height // 2)
-        surface.fill(self._floor_color, floor_position)
+    def _get_tables(self, surface: pg.Surface, fov: float) -> FloorTables:
+        key = (surface.get_size(), fov)
+        if self._tables is None or key != self._tables_key:
+            self._tables = FloorTables.build(*surface.get_size(), fov)
+            self._tables_key = key
+        return self._tables
+
+    def _get_texels(
+        self, surface: pg.Surface
+    ) -> Tuple[NDArray[np.uint32], Optional[NDArray[np.uint32]]]:
+        """Return textures converted to surface pixel format.
+
+        :param surface: surface for rendering
+        :return: floor and ceiling texels
+        """
+        key = pixel_format(surface)
+        if key not in self._texels:
+            ceiling = None
+            if self._ceiling is not None:
+                ceiling = SpriteFrame.from_surface(self._ceiling, surface).pixels
+            self._texels[key] = (
+                SpriteFrame.from_surface(self._floor, surface).pixels,
+                ceiling,
+            )
+        return self._texels[key]
 
 
 class FPSRenderer(AbstractRenderer):
     """Displays colorized fps counter."""
 
+    native_resolution = True
+
     YELLOW_LIMIT: Final[int] = 30
     GREEN_LIMIT: Final[int] = 60
 
@@ -109,6 +319,7 @@ class FPSRenderer(AbstractRenderer):
         self._clock = clock
         self._font = pg.font.Font(font_name, font_size)
         self._position = position or pg.Vector2(0, 0)
+        self._changed: List[pg.Rect] = []
 
     def __call__(self, surface: pg.Surface, *args: Any, **kwargs: Any) -> None:
         fps = self._clock.get_fps()
@@ -120,20 +331,134 @@ class FPSRenderer(AbstractRenderer):
 
         fps_string = "{0:.0f}".format(fps)
         fps_image = self._font.render(fps_string, True, color)  # noqa: WPS425
-        surface.blit(fps_image, self._position)
+        self._changed = [surface.blit(fps_image, self._position)]
+
+    def changed_rects(self) -> Optional[List[pg.Rect]]:
+        return self._changed
+
+
+class ProfilerRenderer(AbstractRenderer):
+    """Draw graph of frame times recorded by profiler.
+
+    Every column is one frame, stacked bars are durations of stages. The
+    line marks 60 FPS frame budget. Legend with rolling 95th percentiles is
+    updated every :attr:`legend_every` frames, because text rendering isn't
+    cheap.
+    """
+
+    native_resolution = True
+
+    budget_ms: Final[float] = 1000 / 60
+    legend_every: Final[int] = 30
+    colors: Final[Tuple[Tuple[int, int, int], ...]] = (
+        (230, 80, 80),
+        (80, 200, 80),
+        (80, 130, 240),
+        (240, 200, 60),
+        (200, 90, 220),
+        (60, 210, 210),
+        (240, 140, 60),
+        (160, 160, 160),
+    )
+    # Frame budget line and total frame time
+    frame_color: Final[Tuple[int, int, int]] = (255, 255, 255)
+
+    def __init__(
+        self,
+        profiler: Profiler,
+        position: Optional[pg.Vector2] = None,
+        height: int = 64,
+        scale: float = 2,
+    ) -> None:
+        """Initialize renderer.
+
+        :param profiler: profiler of rendered pipeline
+        :param position: top left corner of graph, defaults to (0, 40)
+        :param height: graph height in pixels, defaults to 64
+        :param scale: pixels per millisecond, defaults to 2
+        """
+        self._profiler = profiler
+        self._position = pg.Vector2(0, 40) if position is None else position
+        self._height = height
+        self._scale = scale
+        self._font = pg.font.Font(None, 18)
+        self._legend: Optional[pg.Surface] = None
+        self._changed: List[pg.Rect] = []
+
+    def __call__(self, surface: pg.Surface, *args: Any, **kwargs: Any) -> None:
+        stages = self._profiler.stages
+        graph = self._draw_graph(stages)
+        rect = surface.blit(graph, self._position)
+        if self._legend is None or self._profiler.frames % self.legend_every == 0:
+            self._legend = self._draw_legend(stages)
+        legend = surface.blit(self._legend, rect.topright)
+        self._changed = [rect, legend]
+
+    def changed_rects(self) -> Optional[List[pg.Rect]]:
+        return self._changed
+
+    def _draw_graph(self, stages: List[str]) -> pg.Surface:
+        width = self._profiler.capacity
+        # Top edge of every stage bar, shape is (stage, frame)
+        tops = np.zeros((len(stages), width))
+        if stages:
+            samples = np.array([self._profiler.samples(stage) for stage in stages])
+            tops[:, width - samples.shape[1] :] = np.cumsum(samples, axis=0)
+        # Rows from the bottom of the graph in milliseconds
+        rows = (np.arange(self._height)[::-1] + 0.5) / self._scale
+        stage = (rows[None, None, :] >= tops[:, :, None]).sum(axis=0)
+
+        palette = np.array(
+            [self.colors[index % len(self.colors)] for index in range(len(stages))],
+            dtype=np.uint8,
+        ).reshape(-1, 3)
+        pixels = np.zeros((width, self._height, 3), dtype=np.uint8)
+        drawn = stage < len(stages)
+        pixels[drawn] = palette[stage[drawn]]
+        graph = pg.surfarray.make_surface(pixels)
+        budget = self._height - int(self.budget_ms * self._scale)
+        if budget >= 0:
+            pg.draw.line(graph, self.frame_color, (0, budget), (width, budget))
+        return graph
+
+    def _draw_legend(self, stages: List[str]) -> pg.Surface:
+        lines = [
+            (
+                f"{stage} {self._profiler.percentiles(stage)['p95']:.2f}",
+                self.colors[index % len(self.colors)],
+            )
+            for index, stage in enumerate(stages)
+        ]
+        frame = self._profiler.percentiles(Profiler.frame_stage)["p95"]
+        lines.append((f"frame p95 {frame:.2f} ms", self.frame_color))
+        images = [self._font.render(text, True, color) for text, color in lines]
+        legend = pg.Surface(
+            (
+                max(image.get_width() for image in images),
+                sum(image.get_height() for image in images),
+            )
+        )
+        top = 0
+        for image in images:
+            legend.blit(image, (0, top))
+            top += image.get_height()
+        return legend
 
 
 class HUDRenderer(AbstractRenderer):
+    native_resolution = True
+
     health_bar_length: Final[int] = 200
     health_bar_height: Final[int] = 30
 
     def __init__(self, with_health: Damagable) -> None:
         self._with_health = with_health
         self._font = pg.font.Font(None, 30)
+        self._changed: List[pg.Rect] = []
 
     def __call__(self, surface: pg.Surface, *args: Any, **kwargs: Any) -> None:
         width, height = surface.get_size()
-        pg.draw.rect(
+        bar = pg.draw.rect(
             surface,
             "black",
             (width * 0.7, height * 0.9, self.health_bar_length, self.health_bar_height),
@@ -154,7 +479,10 @@ class HUDRenderer(AbstractRenderer):
             width * 0.7 + (self.health_bar_length - text.get_width()) * 0.5,
             height * 0.9 + (self.health_bar_height - text.get_height()) * 0.5,
         )
-        surface.blit(text, (text_x, text_y))
+        self._changed = [bar, surface.blit(text, (text_x, text_y))]
+
+    def changed_rects(self) -> Optional[List[pg.Rect]]:
+        return self._changed
 
 
 ColorLike = Union[pg.Color, Tuple[int, int, int]]
@@ -163,6 +491,8 @@ ColorLike = Union[pg.Color, Tuple[int, int, int]]
 class CrosshairRenderer(AbstractRenderer):
     """Render crosshair. Does not update the stencil buffer."""
 
+    native_resolution = True
+
     def __init__(
         self,
         color: ColorLike = (0, 255, 255),
@@ -179,6 +509,7 @@ class CrosshairRenderer(AbstractRenderer):
         self._color = color
         self._size = size
         self._width = width
+        self._changed: List[pg.Rect] = []
 
     def __call__(
         self,
@@ -195,52 +526,222 @@ class CrosshairRenderer(AbstractRenderer):
         :param _viewer: unused
         """
         width, height = surface.get_size()
-        pg.draw.line(
+        vertical = pg.draw.line(
             surface,
             self._color,
             (width // 2, height // 2 - self._size),
             (width // 2, height // 2 + self._size),
             self._width,
         )
-        pg.draw.line(
+        horizontal = pg.draw.line(
             surface,
             self._color,
             (width // 2 - self._size, height // 2),
             (width // 2 + self._size, height // 2),
             self._width,
         )
+        self._changed = [vertical, horizontal]
+
+    def changed_rects(self) -> Optional[List[pg.Rect]]:
+        return self._changed
+
+
+PixelFormat = Tuple[int, Tuple[int, int, int, int]]
+
+
+def pixel_format(surface: pg.Surface) -> PixelFormat:
+    """Return hashable description of surface pixel format."""
+    return surface.get_bitsize(), surface.get_masks()
+
+
+FrameKey = Tuple[float, float, float, float, int, Tuple[int, int], PixelFormat]
+# Floor doesn't depend on map, so its key has no map version
+FloorKey = Tuple[float, float, float, float, Tuple[int, int], PixelFormat]
 
 
 class WallRenderer(AbstractRenderer):
-    """Render walls using ray marching(DDA) algorithm."""
+    """Render walls using ray marching(DDA) algorithm.
 
-    def __init__(self, map_: Map, viewer: Viewer) -> None:
-        """[summary]
+    Rays are cast once per frame into :attr:`hits`, which can be reused by
+    anything, that needs wall intersections of the last frame. Walls are
+    written straight into the pixel buffer of 32-bit surfaces. Other surfaces
+    fall back to blitting of scaled texture columns.
 
-        :param map_: [description]
-        :type map_: Map
-        :param viewer: [description]
-        :type viewer: Viewer
+    Walls are drawn straight into the surface, when viewer pose, map or
+    surface change. Then they are copied into a layer, which alpha is opaque
+    only at wall pixels, and frames without changes just blit the layer.
+    Call :meth:`invalidate` after map changes. Blitting fallback takes scaled
+    columns from :attr:`column_cache`.
+
+    With ``shading`` walls fade into fog with distance. Only direct pixel
+    buffer rendering supports it, blitted walls are never shaded.
+    """
+
+    # Number of frames without changes, after which layer is RLE encoded
+    rle_after: Final[int] = 8
+
+    def __init__(
+        self,
+        map_: Map,
+        column_cache_bytes: int = 16 * 2 ** 20,
+        shading: Optional[Shading] = None,
+    ) -> None:
+        """Initialize renderer.
+
+        :param map_: level map
+        :param column_cache_bytes: size limit of scaled columns cache,
+            defaults to 16 MiB
+        :param shading: distance shading, defaults to None
         """
         self._map = map_
-        self._viewer = viewer  # ??? maybe use RenderContext?
         self._textures = self._load_textures(ROOT / "assets" / "textures" / "walls")
+        self._column_cache = ColumnCache(self._textures, column_cache_bytes)
+        self._shading = shading
+        self._atlases: Dict[PixelFormat, TextureAtlas] = {}
+        self._hits = WallHits.empty(0)
+        self._map_version = 0
+        self._layer: Optional[pg.Surface] = None
+        self._layer_key: Optional[FrameKey] = None
+        self._idle_frames = 0
+        self._changed = True
+
+    @property
+    def hits(self) -> WallHits:
+        """Return wall intersections of the last rendered frame."""
+        return self._hits
+
+    @property
+    def column_cache(self) -> ColumnCache:
+        """Return cache of scaled columns used by blitting fallback."""
+        return self._column_cache
+
+    def invalidate(self) -> None:
+        """Drop cached frame, must be called after map changes."""
+        self._map_version += 1
 
     def __call__(
         self,
         surface: pg.Surface,
         stencil: StencilBuffer,
-        viewer: Viewer,  # FIXME: self._viewer is useless now
+        viewer: Viewer,
     ) -> None:
-        draw_walls(
+        key = self._frame_key(surface, viewer)
+        self._changed = key != self._layer_key
+        if self._changed:
+            self._render_walls(surface, viewer)
+            self._store_layer(surface, viewer)
+            self._layer_key = key
+            self._idle_frames = 0
+        else:
+            self._blit_layer(surface)
+        np.copyto(stencil, self._hits.distance)
+
+    def changed_rects(self) -> Optional[List[pg.Rect]]:
+        """Return nothing, if walls are the same as in previous frame."""
+        return None if self._changed else []
+
+    def _frame_key(self, surface: pg.Surface, viewer: Viewer) -> FrameKey:
+        """Return everything, that rendered walls depend on.
+
+        :param surface: surface for rendering
+        :param viewer: camera-like object
+        :return: hashable key
+        """
+        return (
+            viewer.position.x,
+            viewer.position.y,
+            viewer.angle,
+            viewer.fov,
+            self._map_version,
+            surface.get_size(),
+            pixel_format(surface),
+        )
+
+    def _render_walls(self, surface: pg.Surface, viewer: Viewer) -> None:
+        """Cast rays and draw walls straight into surface.
+
+        :param surface: surface for rendering
+        :param viewer: camera-like object
+        """
+        if self._hits.width != surface.get_width():
+            self._hits = WallHits.empty(surface.get_width())
+        target = self._column_cache.target
+        if target is None or pixel_format(target) != pixel_format(surface):
+            self._column_cache.target = surface
+
+        cast_walls(
             self._map,
-            surface,
-            stencil,
-            self._textures,
-            *self._viewer.position,
-            self._viewer.angle,
-            self._viewer.fov,
+            self._hits,
+            *viewer.position,
+            viewer.angle,
+            viewer.fov,
         )
+        if surface.get_bytesize() != 4:
+            blit_walls(
+                surface,
+                self._textures,
+                self._hits,
+                viewer.fov,
+                self._column_cache,
+            )
+            return
+
+        # Surface stays locked while pixels array is alive
+        pixels = pg.surfarray.pixels2d(surface)
+        draw_walls_pixels(
+            pixels,
+            self._get_atlas(surface),
+            self._hits,
+            viewer.fov,
+        )
+        del pixels  # noqa: WPS420 unlock surface
+
+    def _store_layer(self, surface: pg.Surface, viewer: Viewer) -> None:
+        """Copy walls drawn in surface into layer for frames without changes.
+
+        :param surface: surface with walls of the current frame
+        :param viewer: camera-like object
+        """
+        if self._layer is None or self._layer.get_size() != surface.get_size():
+            self._layer = pg.Surface(surface.get_size(), pg.SRCALPHA, 32)
+        elif self._idle_frames >= self.rle_after:
+            # RLE surfaces are decoded on every pixel access
+            self._layer.set_alpha(255)
+
+        self._layer.blit(surface, (0, 0))
+        # Layer stays locked while alpha array is alive
+        alpha = pg.surfarray.pixels_alpha(self._layer)
+        alpha[...] = 0
+        alpha[self._hits.mask(viewer.fov, surface.get_height())] = 255
+        del alpha  # noqa: WPS420 unlock surface
+
+    def _blit_layer(self, surface: pg.Surface) -> None:
+        """Draw walls of the last rendered frame.
+
+        :param surface: surface for rendering
+        """
+        layer = self._layer
+        assert layer is not None, "Layer can't be None after the first frame."
+        self._idle_frames += 1
+        if self._idle_frames == self.rle_after:
+            # Viewer stands still, so layer will be reused for a while.
+            # RLE makes blits of static layer much cheaper.
+            layer.set_alpha(255, pg.RLEACCEL)
+        surface.blit(layer, (0, 0))
+
+    def _get_atlas(self, surface: pg.Surface) -> TextureAtlas:
+        """Return textures converted to surface pixel format.
+
+        :param surface: surface for rendering
+        :return: cached texture atlas
+        """
+        key = pixel_format(surface)
+        if key not in self._atlases:
+            atlas = TextureAtlas.from_surfaces(self._textures, surface)
+            if self._shading is not None:
+                atlas = shaded(atlas, self._shading, surface.get_masks())
+            self._atlases[key] = atlas
+        return self._atlases[key]
 
     def _load_textures(
         self,
@@ -275,12 +776,73 @@ def _render_single(
     )
 
 
+class SpriteFrames:
+    """Sprite frames converted to one pixel format and packed into atlas."""
+
+    def __init__(self, shading: Optional[Shading] = None) -> None:
+        """Initialize empty registry.
+
+        :param shading: distance shading of atlas, defaults to None
+        """
+        self._shading = shading
+        self._indices: Dict[pg.Surface, int] = {}
+        self._frames: List[SpriteFrame] = []
+        self._masks = (0, 0, 0, 0)
+        self._atlas: Optional[SpriteAtlas] = None
+
+    @property
+    def atlas(self) -> SpriteAtlas:
+        """Return atlas of all frames added so far."""
+        if self._atlas is None:
+            self._atlas = SpriteAtlas.from_frames(self._frames)
+            if self._shading is not None:
+                self._atlas = shaded(self._atlas, self._shading, self._masks)
+        return self._atlas
+
+    def index(self, texture: pg.Surface, target: pg.Surface) -> int:
+        """Return index of texture frame in atlas, add it if it's new.
+
+        :param texture: sprite texture
+        :param target: surface, which will be rendered into
+        :return: frame index
+        """
+        index = self._indices.get(texture)
+        if index is None:
+            index = len(self._frames)
+            self._frames.append(SpriteFrame.from_surface(texture, target))
+            self._masks = target.get_masks()
+            self._indices[texture] = index
+            self._atlas = None
+        return index
+
+
 class EntityRenderer(AbstractRenderer):
-    """Render any entities."""
+    """Render any entities.
+
+    Entities out of the camera frustum or fully behind walls are culled
+    before rendering, :attr:`drawn` and :attr:`culled` count them for the
+    last frame. All sprites are drawn straight into pixels of 32-bit
+    surfaces by one :func:`draw_sprites` call, which also applies
+    ``shading`` if it is given. Other surfaces get unshaded sprites.
+    """
 
     # TODO: create entity group for deletion from rendering
-    def __init__(self, entities: Collection[Entity]) -> None:
+    def __init__(
+        self,
+        entities: Collection[Entity],
+        shading: Optional[Shading] = None,
+    ) -> None:
+        """Initialize renderer.
+
+        :param entities: entities to render
+        :param shading: distance shading, defaults to None
+        """
         self._entities = entities
+        self._shading = shading
+        self._frames: Dict[PixelFormat, SpriteFrames] = {}
+        self._changed: List[pg.Rect] = []
+        self.drawn = 0
+        self.culled = 0
 
     def __call__(
         self,
@@ -294,9 +856,71 @@ class EntityRenderer(AbstractRenderer):
         :param stencil: stencil buffer
         :param viewer: camera-like object
         """
+        walls = stencil.copy()
+        if surface.get_bytesize() == 4:
+            self._render_batch(surface, stencil, viewer)
+        else:
+            self._render_sorted(surface, stencil, viewer)
+        self._changed = self._sprites_rects(surface, walls, stencil)
+
+    def changed_rects(self) -> Optional[List[pg.Rect]]:
+        return self._changed
+
+    def _render_batch(
+        self,
+        surface: pg.Surface,
+        stencil: StencilBuffer,
+        viewer: Viewer,
+    ) -> None:
+        key = pixel_format(surface)
+        frames = self._frames.get(key)
+        if frames is None:
+            frames = self._frames[key] = SpriteFrames(self._shading)
+        indices = np.array(
+            [frames.index(entity.texture, surface) for entity in self._entities],
+            dtype=np.int32,
+        )
+        # Surface stays locked while pixels array is alive
+        pixels = pg.surfarray.pixels2d(surface)
+        self.drawn = draw_sprites(
+            pixels,
+            stencil,
+            frames.atlas,
+            self._positions(self._entities),
+            indices,
+            *viewer.position,
+            viewer.angle,
+            viewer.fov,
+        )
+        del pixels  # noqa: WPS420 unlock surface
+        self.culled = len(indices) - self.drawn
+
+    def _render_sorted(
+        self,
+        surface: pg.Surface,
+        stencil: StencilBuffer,
+        viewer: Viewer,
+    ) -> None:
+        entities = list(self._entities)
+        sizes = np.array(
+            [entity.texture.get_size() for entity in entities],
+            dtype=np.int32,
+        ).reshape(-1, 2)
+        visible = cull_sprites(
+            stencil,
+            self._positions(entities),
+            sizes,
+            surface.get_height(),
+            *viewer.position,
+            viewer.angle,
+            viewer.fov,
+        )
+        entities = [entity for entity, seen in zip(entities, visible) if seen]
+        self.drawn = len(entities)
+        self.culled = len(visible) - self.drawn
+
         start = viewer.position
-        entities = sorted(
-            self._entities,
+        entities.sort(
             # Avoid sqrt calculation
             key=lambda entity: (entity.position - start).magnitude_squared(),
             reverse=True,
@@ -307,34 +931,242 @@ class EntityRenderer(AbstractRenderer):
         for entity in entities:  # noqa: WPS440 no overlap
             _render_single(surface, stencil, viewer, entity)
 
+    def _sprites_rects(
+        self,
+        surface: pg.Surface,
+        walls: StencilBuffer,
+        stencil: StencilBuffer,
+    ) -> List[pg.Rect]:
+        """Return area covered by sprites.
+
+        :param surface: surface for rendering
+        :param walls: stencil buffer before sprites were drawn
+        :param stencil: stencil buffer after sprites were drawn
+        :return: bounding rectangle of all drawn sprite columns
+        """
+        columns = np.nonzero(stencil != walls)[0]
+        if not columns.size:
+            return []
+        width, height = surface.get_size()
+        # The nearest sprite is the highest one, sprites are centered
+        sprite_height = min(int(height / stencil[columns].min()) + 2, height)
+        rect = pg.Rect(
+            int(columns[0]),
+            (height - sprite_height) // 2,
+            int(columns[-1] - columns[0]) + 1,
+            sprite_height,
+        )
+        return [rect.clip(surface.get_rect())]
+
+    def _positions(self, entities: Collection[Entity]) -> NDArray[np.float32]:
+        return np.array(
+            [tuple(entity.position) for entity in entities],
+            dtype=np.float32,
+        ).reshape(-1, 2)
+
 
 class Pipeline:
-    """Manipulate with renderers."""
+    """Manipulate with renderers.
+
+    With ``render_scale`` other than 1 renderers draw into offscreen canvas
+    of scaled size, which is upscaled to surface by a single blit. Renderers
+    with :attr:`AbstractRenderer.native_resolution` draw on surface after it.
+
+    With ``dirty_rects`` only areas reported by
+    :meth:`AbstractRenderer.changed_rects` are presented, unless some
+    renderer changed the whole surface.
+
+    With ``profiler`` duration of every renderer, upscaling, presenting and
+    the whole frame is recorded into it. The same stages are traced, while
+    :mod:`poom.trace` is on. Renderers are named by their
+    classes, repeated names get ordinal suffix like 'EntityRenderer#2'.
+    """
 
     def __init__(
         self,
         viewer: Viewer,
         renderers: Collection[AbstractRenderer],
+        dirty_rects: bool = False,
+        render_scale: float = 1,
+        smooth: bool = False,
+        present: bool = True,
+        profiler: Optional[Profiler] = None,
     ) -> None:
+        """Initialize pipeline.
+
+        :param viewer: camera-like object
+        :param renderers: renderers in drawing order
+        :param dirty_rects: present only changed areas, defaults to False
+        :param render_scale: canvas size relative to surface, defaults to 1
+        :param smooth: use smoothscale for upscaling, defaults to False
+        :param present: show frames on display, disable it to render into
+            offscreen surfaces, defaults to True
+        :param profiler: frame time profiler, defaults to None
+        :raises ValueError: if render scale isn't positive
+        """
+        if render_scale <= 0:
+            raise ValueError("Render scale must be positive.")
         self._viewer = viewer
         self._renderers = renderers
+        self._dirty_rects = dirty_rects
+        self._render_scale = render_scale
+        self._smooth = smooth
+        self._present_frames = present
+        self._profiler = profiler
+        self._stages = _stage_names(renderers)
+        self._canvas: Optional[pg.Surface] = None
+        # None until the first frame is presented
+        self._last_rects: Optional[List[pg.Rect]] = None
+
+    @property
+    def profiler(self) -> Optional[Profiler]:
+        return self._profiler
 
     def render(self, surface: pg.Surface) -> None:
         """Call all renderers.
 
         :param surface: surface for rendering
         """
-        stencil = np.full(surface.get_width(), np.inf, dtype=np.float32)
+        start = time.perf_counter()
+        canvas = self._get_canvas(surface)
+        stencil = np.full(canvas.get_width(), np.inf, dtype=np.float32)
+        overlays = [
+            renderer
+            for renderer in self._renderers
+            if canvas is not surface and renderer.native_resolution
+        ]
+        world = [renderer for renderer in self._renderers if renderer not in overlays]
+
+        if not any(renderer.covers(canvas) for renderer in world):
+            canvas.fill("black")
+        rects: List[pg.Rect] = []
+        full = self._draw(world, canvas, surface, stencil, rects)
+        if canvas is not surface:
+            self._timed("upscale", self._upscale, canvas, surface)
+        full = self._draw(overlays, surface, surface, stencil, rects) or full
+        if self._present_frames:
+            self._timed("present", self._present, rects, full)
+        if self._profiler is not None:
+            self._profiler.end_frame(time.perf_counter() - start)
+
+    def _draw(
+        self,
+        renderers: List[AbstractRenderer],
+        canvas: pg.Surface,
+        surface: pg.Surface,
+        stencil: StencilBuffer,
+        rects: List[pg.Rect],
+    ) -> bool:
+        """Call renderers and collect areas changed by them.
+
+        :param renderers: renderers in drawing order
+        :param canvas: surface, which renderers draw into
+        :param surface: surface for rendering, which canvas is scaled to
+        :param stencil: stencil buffer
+        :param rects: list to extend with changed areas of surface
+        :return: True, if the whole surface changed
+        """
+        full = False
+        for renderer in renderers:
+            stage = self._stages[renderer]
+            self._timed(stage, renderer, canvas, stencil, self._viewer)
+            changed = renderer.changed_rects()
+            if changed is None:
+                full = True
+            else:
+                rects.extend(_scale_rect(rect, canvas, surface) for rect in changed)
+        return full
+
+    def _timed(self, stage: str, function: Callable[..., None], *args: Any) -> None:
+        """Call function and record its duration into profiler and tracer."""
+        tracer = trace.current()
+        if self._profiler is None and tracer is None:
+            function(*args)
+            return
+        start = time.perf_counter()
+        function(*args)
+        end = time.perf_counter()
+        if self._profiler is not None:
+            self._profiler.record(stage, end - start)
+        if tracer is not None:
+            tracer.complete(stage, start, end, "render")
+
+    def _get_canvas(self, surface: pg.Surface) -> pg.Surface:
+        """Return surface, which world is rendered into.
+
+        :param surface: surface for rendering
+        :return: surface itself or cached offscreen canvas of scaled size
+        """
+        if self._render_scale == 1:
+            return surface
+        width, height = surface.get_size()
+        size = (
+            max(int(width * self._render_scale), 1),
+            max(int(height * self._render_scale), 1),
+        )
+        if (
+            self._canvas is None
+            or self._canvas.get_size() != size
+            or pixel_format(self._canvas) != pixel_format(surface)
+        ):
+            self._canvas = pg.Surface(size, 0, surface)
+        return self._canvas
+
+    def _upscale(self, canvas: pg.Surface, surface: pg.Surface) -> None:
+        if self._smooth and canvas.get_bitsize() >= 24:
+            pg.transform.smoothscale(canvas, surface.get_size(), surface)
+        else:
+            pg.transform.scale(canvas, surface.get_size(), surface)
+
+    def _present(self, rects: List[pg.Rect], full: bool) -> None:
+        """Show rendered frame on display.
+
+        :param rects: areas changed by this frame
+        :param full: the whole frame changed
+        """
+        if full or not self._dirty_rects or self._last_rects is None:
+            pg.display.flip()
+        else:
+            # Things drawn in previous frame may have moved away
+            pg.display.update(rects + self._last_rects)
+        self._last_rects = rects
 
-        surface.fill("black")
-        for renderer in self._renderers:
-            renderer(surface, stencil, self._viewer)
-        pg.display.flip()
+
+def _stage_names(
+    renderers: Collection[AbstractRenderer],
+) -> Dict[AbstractRenderer, str]:
+    names: Dict[AbstractRenderer, str] = {}
+    counts: Dict[str, int] = {}
+    for renderer in renderers:
+        name = type(renderer).__name__
+        counts[name] = counts.get(name, 0) + 1
+        names[renderer] = name if counts[name] == 1 else f"{name}#{counts[name]}"
+    return names
+
+
+def _scale_rect(rect: pg.Rect, canvas: pg.Surface, surface: pg.Surface) -> pg.Rect:
+    """Map area of canvas to area of surface, which canvas is scaled to.
+
+    :param rect: area of canvas
+    :param canvas: scaled canvas
+    :param surface: surface for rendering
+    :return: area of surface, which includes pixels blended by upscaling
+    """
+    if canvas is surface:
+        return rect
+    scale_x = surface.get_width() / canvas.get_width()
+    scale_y = surface.get_height() / canvas.get_height()
+    left, top = int(rect.left * scale_x) - 1, int(rect.top * scale_y) - 1
+    right, bottom = int(rect.right * scale_x) + 2, int(rect.bottom * scale_y) + 2
+    return pg.Rect(left, top, right - left, bottom - top).clip(surface.get_rect())
 
 
 class GunRenderer(AbstractRenderer):
+    native_resolution = True
+
     def __init__(self, gun: PlayerGun) -> None:
         self._gun = gun
+        self._changed: List[pg.Rect] = []
 
     def __call__(
         self, surface: pg.Surface, _stencil: StencilBuffer, _viewer: Viewer
@@ -342,4 +1174,9 @@ class GunRenderer(AbstractRenderer):
         texture = self._gun.texture
         s_width, s_height = surface.get_size()
         t_width, t_height = texture.get_size()
-        surface.blit(texture, ((s_width - t_width) // 2, s_height - t_height))
+        self._changed = [
+            surface.blit(texture, ((s_width - t_width) // 2, s_height - t_height)),
+        ]
+
+    def changed_rects(self) -> Optional[List[pg.Rect]]:
+        return self._changed
@@ -8,7 +8,7 @@ from numpy.typing import NDArray
 from pygame.math import Vector2
 
 from poom.entities import Pawn
-from poom.pooma.ray_march import shoot
+from poom.pooma.backend import shoot
 from poom.settings import ROOT
 
 
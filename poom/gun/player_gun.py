@@ -3,6 +3,7 @@ from typing import Collection
 
 import pygame as pg
 
+from poom import audio
 from poom.animated import Animation
 from poom.entities import Pawn, Renderable
 from poom.gun.gun import Gun
@@ -24,7 +25,7 @@ class PlayerGun(Renderable):
         """
         self._gun = gun
         self._animation = animation
-        self._channel = pg.mixer.Channel(2)
+        self._channel = audio.channel(2)
 
     def shoot(
         self,
@@ -0,0 +1,243 @@
+"""Headless level simulation.
+
+Fights are simulated as fast as possible without rendering and audio, while
+player is driven by a script. Outcomes are printed as JSON::
+
+    python -m poom.headless --level 1 --fights 100 --script hunter
+
+Run it from the project root like the game. SDL dummy video driver is used
+unless ``SDL_VIDEODRIVER`` is set, display is needed only to load sprites.
+Simulation can be stepped directly too::
+
+    headless.init()
+    world = World.from_dir(path, keys)
+    while not (world.won or world.lost):
+        world.step(1 / 60)
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from math import atan2, pi
+from typing import Any, Callable, Dict, Final, List, Optional
+
+# Keep stdout clean for JSON and don't open a window
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg  # noqa: E402
+
+from poom import audio  # noqa: E402
+from poom.player import PressedKeys  # noqa: E402
+from poom.settings import ROOT  # noqa: E402
+from poom.world import World  # noqa: E402
+
+# Called before every step to press keys for the next one
+Script = Callable[[World, PressedKeys], None]
+
+# Player turns to target until angle to it is less than this
+_AIM_TOLERANCE: Final[float] = 0.05
+
+
+def init() -> None:
+    """Prepare pygame for simulation without window and sound.
+
+    Must be called before any world is created.
+    """
+    audio.disable()
+    pg.display.init()
+    # Sprites are converted to display format on loading
+    if pg.display.get_surface() is None:
+        pg.display.set_mode((1, 1))
+
+
+def idle(world: World, keys: PressedKeys) -> None:
+    """Stand still, e.g. to measure how fast enemies kill player.
+
+    :param world: simulated world
+    :param keys: player keys
+    """
+    keys.set(())
+
+
+def hunter(world: World, keys: PressedKeys) -> None:
+    """Turn to the nearest enemy, come closer and shoot.
+
+    :param world: simulated world
+    :param keys: player keys
+    """
+    player = world.player
+    if not world.enemies:
+        keys.set(())
+        return
+    target = min(
+        world.enemies,
+        key=lambda enemy: (enemy.position - player.position).magnitude(),
+    )
+    direction = target.position - player.position
+    turn = (atan2(direction.y, direction.x) - player.angle + pi) % (2 * pi) - pi
+
+    pressed = []
+    if turn > _AIM_TOLERANCE:
+        pressed.append(pg.K_d)
+    elif turn < -_AIM_TOLERANCE:
+        pressed.append(pg.K_a)
+    else:
+        pressed.append(pg.K_SPACE)
+    if direction.magnitude() > 2:
+        pressed.append(pg.K_w)
+    keys.set(pressed)
+
+
+SCRIPTS: Final[Dict[str, Script]] = {"idle": idle, "hunter": hunter}
+
+
+@dataclass
+class FightResult:
+    """Outcome of one simulated fight."""
+
+    # 'won', 'lost' or 'timeout'
+    outcome: str
+    # Simulated seconds
+    time: float
+    steps: int
+    health: float
+    enemies_left: int
+    # Lookups of cached paths, enemies search them only without flow field
+    path_cache_hits: int
+    path_cache_misses: int
+    # Real seconds spent on simulation
+    wall_time: float
+
+
+def run_fight(
+    level: str,
+    script: Script,
+    tick_rate: int = 60,
+    max_time: float = 120,
+    seed: Optional[int] = None,
+    flow_field: Optional[bool] = None,
+) -> FightResult:
+    """Simulate level until player or all enemies die.
+
+    :param level: level directory name
+    :param script: player script
+    :param tick_rate: simulation steps per second, defaults to 60
+    :param max_time: simulated seconds before timeout, defaults to 120
+    :param seed: seed of random generator, defaults to a random one
+    :param flow_field: chase the player by shared flow field, defaults to
+        settings
+    :return: fight outcome
+    """
+    keys = PressedKeys()
+    world = World.from_dir(
+        ROOT / "assets" / "levels" / level,
+        keys,
+        seed,
+        flow_field=flow_field,
+    )
+    dt = 1 / tick_rate
+    max_steps = round(max_time * tick_rate)
+    steps = 0
+    start = time.perf_counter()
+    while not (world.won or world.lost) and steps < max_steps:
+        script(world, keys)
+        world.step(dt)
+        steps += 1
+
+    outcome = "timeout"
+    if world.won:
+        outcome = "won"
+    elif world.lost:
+        outcome = "lost"
+    return FightResult(
+        outcome=outcome,
+        time=round(world.time, 3),
+        steps=steps,
+        health=max(world.player.get_health(), 0),
+        enemies_left=len(world.enemies),
+        path_cache_hits=world.navigation.path_cache.hits,
+        path_cache_misses=world.navigation.path_cache.misses,
+        wall_time=round(time.perf_counter() - start, 4),
+    )
+
+
+def summarize(results: List[FightResult]) -> Dict[str, Any]:
+    """Aggregate outcomes of fights.
+
+    :param results: fight outcomes
+    :return: outcome rates, mean fight time and simulation speed
+    """
+    count = max(len(results), 1)
+    steps = sum(result.steps for result in results)
+    wall_time = sum(result.wall_time for result in results)
+    return {
+        "fights": len(results),
+        **{
+            f"{outcome}_rate": round(
+                sum(result.outcome == outcome for result in results) / count,
+                3,
+            )
+            for outcome in ("won", "lost", "timeout")
+        },
+        "mean_time": round(sum(result.time for result in results) / count, 3),
+        "steps_per_second": round(steps / wall_time, 1) if wall_time else 0.0,
+    }
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m poom.headless",
+        description="Simulate fights without display and report them as JSON.",
+    )
+    parser.add_argument("--level", default="1")
+    parser.add_argument("--fights", type=int, default=10)
+    parser.add_argument("--script", choices=sorted(SCRIPTS), default="hunter")
+    parser.add_argument("--tick-rate", type=int, default=60)
+    parser.add_argument("--max-time", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-flow-field",
+        action="store_true",
+        help="let every enemy search its own path through path cache",
+    )
+    parser.add_argument("--output", help="write JSON into file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = _parse_args(argv[1:])
+    init()
+    results = [
+        run_fight(
+            args.level,
+            SCRIPTS[args.script],
+            args.tick_rate,
+            args.max_time,
+            args.seed + fight,
+            flow_field=False if args.no_flow_field else None,
+        )
+        for fight in range(args.fights)
+    ]
+    text = json.dumps(
+        {
+            "level": args.level,
+            "script": args.script,
+            "summary": summarize(results),
+            "fights": [asdict(result) for result in results],
+        },
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w") as fp:
+            fp.write(text)
+    else:
+        print(text)  # noqa: WPS421 JSON is the output
+    pg.display.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
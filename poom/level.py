@@ -1,7 +1,7 @@
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, List, TypeVar
+from typing import Callable, List, Optional, TypeVar
 
 import numpy as np
 import pygame as pg
@@ -42,13 +42,25 @@ def load_enemies_positions(path: Path) -> List[pg.Vector2]:
     return positions
 
 
+def optional_file(path: Path) -> Optional[Path]:
+    return path if path.is_file() else None
+
+
 @dataclass
 class Level:
     map_: Map
     enemies_positions: List[pg.Vector2]
+    # Textures of textured floor and ceiling, flat floor is drawn without them
+    floor_texture: Optional[Path] = None
+    ceiling_texture: Optional[Path] = None
 
     @classmethod
     def from_dir(cls, path: Path) -> "Level":
         map_ = load_map(path / "map.txt")
         positions = load_enemies_positions(path / "enemies.json")
-        return cls(map_=map_, enemies_positions=positions)
+        return cls(
+            map_=map_,
+            enemies_positions=positions,
+            floor_texture=optional_file(path / "floor.png"),
+            ceiling_texture=optional_file(path / "ceiling.png"),
+        )
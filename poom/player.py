@@ -1,5 +1,5 @@
 """Describes player."""
-from typing import Callable, Collection, Final, Sequence
+from typing import Callable, Collection, Final, Iterable, Protocol, Set, Tuple
 
 import numpy as np
 import pygame as pg
@@ -7,15 +7,64 @@ from numpy.typing import NDArray
 from pygame.math import Vector2
 
 import poom.shared as shared
+from poom import audio
 from poom.entities import Damagable, Pawn
 from poom.gun.player_gun import PlayerGun
 from poom.resources import R
 from poom.settings import ROOT
 
 OnDeathCallback = Callable[[], None]
+
+
+class KeyState(Protocol):
+    """Pressed keys indexed by key constants like ``pg.K_w``."""
+
+    def __getitem__(self, key: int) -> bool:
+        """Return true, if key is pressed."""
+
+
+KeySource = Callable[[], KeyState]
+# Keys, which player reacts to
+CONTROL_KEYS: Final[Tuple[int, ...]] = (
+    pg.K_w,
+    pg.K_s,
+    pg.K_COMMA,
+    pg.K_PERIOD,
+    pg.K_a,
+    pg.K_d,
+    pg.K_SPACE,
+)
 settings = shared.Settings.load(ROOT)
 
 
+class PressedKeys:
+    """Keyboard state, which is set by code instead of user.
+
+    Instance is a :data:`KeySource` returning itself, so scripts can drive
+    player without window and event queue.
+    """
+
+    def __init__(self, keys: Iterable[int] = ()) -> None:
+        """Initialize keys.
+
+        :param keys: initially pressed keys, defaults to none
+        """
+        self._pressed: Set[int] = set(keys)
+
+    def __call__(self) -> "PressedKeys":
+        return self
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self._pressed
+
+    def set(self, keys: Iterable[int]) -> None:
+        """Press only given keys.
+
+        :param keys: pressed keys
+        """
+        self._pressed = set(keys)
+
+
 class Player(Pawn, Damagable):
     """Player."""
 
@@ -32,14 +81,16 @@ class Player(Pawn, Damagable):
         angle: float,
         fov: float,
         enemies: Collection[Pawn],
+        keys: KeySource = pg.key.get_pressed,
     ) -> None:
         super().__init__(position, angle, fov)
+        self._keys = keys
         self._gun = gun
         self._map = map_
         self._health = self.max_health
         self._enemies = enemies
         self._on_death: OnDeathCallback = lambda: None
-        self._channel = pg.mixer.Channel(3)
+        self._channel = audio.channel(3)
         self._channel.set_volume(settings.volume / 100)
 
     def on_death(self, cb: OnDeathCallback) -> None:
@@ -78,7 +129,7 @@ class Player(Pawn, Damagable):
         """Return ratio between current health and max health."""
         return self._health / self.max_health
 
-    def _move(self, dt: float, keys: Sequence[bool]) -> None:
+    def _move(self, dt: float, keys: KeyState) -> None:
         direction = Vector2(0)
 
         if keys[pg.K_w]:
@@ -99,7 +150,7 @@ class Player(Pawn, Damagable):
         if self._map[int(new.y), int(old.x)] == 0:  # noqa: WPS221
             self._position.y = new.y
 
-    def _rotate(self, dt: float, keys: Sequence[bool]) -> None:
+    def _rotate(self, dt: float, keys: KeyState) -> None:
         if keys[pg.K_a]:
             self._angle -= self.rotation_speed * dt
         if keys[pg.K_d]:
@@ -111,12 +162,12 @@ class Player(Pawn, Damagable):
         :param dt: delta time
         """
         # Execute, while key is pressed, not single pushed
-        keys = pg.key.get_pressed()
+        keys = self._keys()
         self._move(dt, keys)
         self._rotate(dt, keys)
         self._shoot(keys)
 
-    def _shoot(self, keys: Sequence[bool]) -> None:
+    def _shoot(self, keys: KeyState) -> None:
         """Shoot, if space pressed.
 
         :param keys: array of keys
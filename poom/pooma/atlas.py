@@ -0,0 +1,175 @@
+"""Textures packed for direct pixel buffer rendering."""
+from dataclasses import dataclass, field, replace
+from typing import ClassVar, Sequence, TypeVar
+
+import numpy as np
+import pygame as pg
+from numpy.typing import NDArray
+
+from poom.pooma.shading import Masks, Shading
+
+Atlas = TypeVar("Atlas", "TextureAtlas", "SpriteAtlas")
+
+
+def _no_indices() -> NDArray[np.uint16]:
+    return np.empty(0, dtype=np.uint16)
+
+
+def _no_pixels() -> NDArray[np.uint32]:
+    return np.empty(0, dtype=np.uint32)
+
+
+def shaded(atlas: Atlas, shading: Shading, masks: Masks) -> Atlas:
+    """Return copy of atlas with palette precomputed in all shades.
+
+    :param atlas: unshaded texture or sprite atlas
+    :param shading: distance shading
+    :param masks: RGBA masks of atlas pixel format
+    :return: shaded atlas
+    """
+    indices, palette = shading.quantize(atlas.pixels, masks)
+    return replace(
+        atlas,
+        levels=shading.levels,
+        level_scale=shading.level_scale,
+        indices=indices,
+        palette=shading.shade(palette, masks),
+    )
+
+
+@dataclass
+class TextureAtlas:
+    """Textures packed column by column into one flat pixel array.
+
+    Texel ``(u, v)`` of texture ``i`` is stored at
+    ``pixels[start[i] + u * height[i] + v]``, so every texture column is a
+    contiguous run of memory. Pixels are stored in the pixel format of the
+    surface the atlas was built for and can be copied into it as is.
+
+    Shaded atlas also stores palette index of every texel in
+    :attr:`indices` and the palette in :attr:`levels` shades one after
+    another, see :func:`shaded`. Texture at distance ``d`` is drawn in shade
+    ``min(int(d * level_scale), levels - 1)``, its texel ``t`` is
+    ``palette[shade * palette.size // levels + indices[t]]`` then.
+    """
+
+    pixels: NDArray[np.uint32]
+    start: NDArray[np.int32]
+    width: NDArray[np.int32]
+    height: NDArray[np.int32]
+    levels: int = 1
+    level_scale: float = 0
+    indices: NDArray[np.uint16] = field(default_factory=_no_indices)
+    palette: NDArray[np.uint32] = field(default_factory=_no_pixels)
+
+    @classmethod
+    def from_surfaces(
+        cls,
+        textures: Sequence[pg.Surface],
+        target: pg.Surface,
+    ) -> "TextureAtlas":
+        """Convert textures to target pixel format and pack them.
+
+        :param textures: textures in any pixel format
+        :param target: surface, which will be rendered into
+        :return: texture atlas
+        """
+        columns = []
+        start, width, height = [], [], []
+        offset = 0
+        for texture in textures:
+            converted = texture.convert(target)
+            texels = pg.surfarray.array2d(converted).view(np.uint32)
+            columns.append(texels.ravel())
+            start.append(offset)
+            width.append(converted.get_width())
+            height.append(converted.get_height())
+            offset += texels.size
+
+        return cls(
+            pixels=np.concatenate(columns),
+            start=np.array(start, dtype=np.int32),
+            width=np.array(width, dtype=np.int32),
+            height=np.array(height, dtype=np.int32),
+        )
+
+
+@dataclass
+class SpriteFrame:
+    """Sprite texture prepared for direct pixel buffer rendering.
+
+    Pixels are indexed as ``pixels[u, v]`` like :mod:`pygame.surfarray`
+    arrays and are stored in the pixel format of the target surface.
+    Texels with zero :attr:`opaque` are transparent and must be skipped.
+    """
+
+    pixels: NDArray[np.uint32]
+    opaque: NDArray[np.uint8]
+
+    # Texels with lower alpha are treated as transparent
+    alpha_threshold: ClassVar[int] = 128
+
+    @classmethod
+    def from_surface(cls, texture: pg.Surface, target: pg.Surface) -> "SpriteFrame":
+        """Convert texture to target pixel format and key out its alpha.
+
+        :param texture: texture with per-pixel alpha or colorkey
+        :param target: surface, which will be rendered into
+        :return: sprite frame
+        """
+        converted = texture.convert(target)
+        alpha = pg.surfarray.array_alpha(texture)
+        return cls(
+            pixels=np.ascontiguousarray(
+                pg.surfarray.array2d(converted).view(np.uint32),
+            ),
+            opaque=np.ascontiguousarray(alpha >= cls.alpha_threshold, np.uint8),
+        )
+
+
+@dataclass
+class SpriteAtlas:
+    """Sprite frames packed column by column like :class:`TextureAtlas`.
+
+    Texel ``(u, v)`` of frame ``i`` is stored at
+    ``pixels[start[i] + u * height[i] + v]`` and is transparent if
+    ``opaque`` is zero at the same index. Shades are stored like in
+    :class:`TextureAtlas`.
+    """
+
+    pixels: NDArray[np.uint32]
+    opaque: NDArray[np.uint8]
+    start: NDArray[np.int32]
+    width: NDArray[np.int32]
+    height: NDArray[np.int32]
+    levels: int = 1
+    level_scale: float = 0
+    indices: NDArray[np.uint16] = field(default_factory=_no_indices)
+    palette: NDArray[np.uint32] = field(default_factory=_no_pixels)
+
+    @classmethod
+    def from_frames(cls, frames: Sequence[SpriteFrame]) -> "SpriteAtlas":
+        """Pack sprite frames.
+
+        :param frames: frames converted to the same pixel format
+        :return: sprite atlas
+        """
+        pixels = [np.empty(0, dtype=np.uint32)]
+        opaque = [np.empty(0, dtype=np.uint8)]
+        start, width, height = [], [], []
+        offset = 0
+        for frame in frames:
+            pixels.append(frame.pixels.ravel())
+            opaque.append(frame.opaque.ravel())
+            start.append(offset)
+            width.append(frame.pixels.shape[0])
+            height.append(frame.pixels.shape[1])
+            offset += frame.pixels.size
+
+        return cls(
+            pixels=np.concatenate(pixels),
+            opaque=np.concatenate(opaque),
+            start=np.array(start, dtype=np.int32),
+            width=np.array(width, dtype=np.int32),
+            height=np.array(height, dtype=np.int32),
+        )
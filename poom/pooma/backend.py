@@ -0,0 +1,41 @@
+"""Ray marching and path finding backend.
+
+Compiled :mod:`poom.pooma.ray_march`, :mod:`poom.pooma.floor` and
+:mod:`poom.pooma.path` are used when they are built, otherwise
+:mod:`poom.pooma.ray_march_numpy`, :mod:`poom.pooma.floor_numpy` and
+:mod:`poom.pooma.path_numpy` are used. Set ``POOM_BACKEND=numpy`` to
+force NumPy backend, e.g. to compare both of them.
+"""
+import os
+from importlib import import_module
+from types import ModuleType
+
+
+def _load_backend(name: str) -> ModuleType:
+    if os.environ.get("POOM_BACKEND", "") != "numpy":
+        try:
+            return import_module(f"poom.pooma.{name}")
+        except ImportError:
+            pass  # noqa: WPS420 fall back to NumPy
+
+    return import_module(f"poom.pooma.{name}_numpy")
+
+
+backend = _load_backend("ray_march")
+floor_backend = _load_backend("floor")
+path_backend = _load_backend("path")
+COMPILED = backend.__name__ == "poom.pooma.ray_march"
+
+PathFinder = path_backend.PathFinder
+blit_walls = backend.blit_walls
+cast_walls = backend.cast_walls
+cull_sprites = backend.cull_sprites
+draw_floor = floor_backend.draw_floor
+draw_sprite = backend.draw_sprite
+draw_sprite_pixels = backend.draw_sprite_pixels
+draw_sprites = backend.draw_sprites
+draw_walls = backend.draw_walls
+draw_walls_pixels = backend.draw_walls_pixels
+get_num_threads = backend.get_num_threads
+set_num_threads = backend.set_num_threads
+shoot = backend.shoot
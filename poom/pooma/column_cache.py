@@ -0,0 +1,118 @@
+"""Cache of wall textures scaled to wall heights."""
+from collections import OrderedDict
+from typing import Final, Optional, Sequence, Tuple
+
+import pygame as pg
+
+TextureKey = Tuple[int, int]
+
+
+class ColumnCache:
+    """LRU cache of pre-scaled wall texture columns.
+
+    All columns of a texture are scaled to the same height at once, like a
+    mip level: the scaled texture is as high as the wall and at most as wide,
+    so walls far away take little memory. Heights are rounded to
+    :attr:`height_step`, so walls at similar distances share scaled columns.
+
+    Every cached column is a part of a single surface per texture and height.
+    Columns must not be stored as separate surfaces: SDL frees a surface,
+    which was blitted somewhere, in time linear to number of such surfaces.
+
+    Scaled textures are converted to pixel format of :attr:`target`, if it
+    is set, which makes their blits several times cheaper. Textures must be
+    opaque then, because alpha channel is dropped by conversion.
+
+    The least recently used textures are dropped when total size of cached
+    surfaces exceeds ``max_bytes``.
+    """
+
+    # Surfaces of higher walls are too big to be worth caching
+    max_height: Final[int] = 1024
+
+    def __init__(
+        self,
+        textures: Sequence[pg.Surface],
+        max_bytes: int,
+        height_step: int = 2,
+    ) -> None:
+        """Initialize cache.
+
+        :param textures: wall textures
+        :param max_bytes: maximum total size of cached surfaces
+        :param height_step: height rounding step in pixels, defaults to 2
+        """
+        self._textures = textures
+        self._max_bytes = max_bytes
+        self._height_step = height_step
+        self._scaled: "OrderedDict[TextureKey, pg.Surface]" = OrderedDict()
+        self._used_bytes = 0
+        self._target: Optional[pg.Surface] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def target(self) -> Optional[pg.Surface]:
+        """Return surface, which pixel format scaled textures are stored in."""
+        return self._target
+
+    @target.setter
+    def target(self, target: Optional[pg.Surface]) -> None:
+        """Set surface, which columns will be blitted to, and drop cache.
+
+        :param target: destination surface or None to keep texture format
+        """
+        self._target = target
+        self.clear()
+
+    @property
+    def used_bytes(self) -> int:
+        """Return total size of cached surfaces."""
+        return self._used_bytes
+
+    def get(self, index: int, height: int) -> Optional[pg.Surface]:
+        """Return texture, which columns are scaled to given height.
+
+        :param index: texture index in textures sequence
+        :param height: wall height in pixels, rounded to height step
+        :return: scaled texture or None, if it is too high to be cached
+        """
+        if not 0 < height <= self.max_height:
+            return None
+        step = self._height_step
+        height = max((height + step // 2) // step * step, 1)
+        key = (index, height)
+
+        scaled = self._scaled.get(key)
+        if scaled is not None:
+            self.hits += 1
+            self._scaled.move_to_end(key)
+            return scaled
+
+        self.misses += 1
+        scaled = self._scale(index, height)
+        self._scaled[key] = scaled
+        self._used_bytes += self._size(scaled)
+        while self._used_bytes > self._max_bytes and len(self._scaled) > 1:
+            _, evicted = self._scaled.popitem(last=False)
+            self._used_bytes -= self._size(evicted)
+        return scaled
+
+    def clear(self) -> None:
+        """Drop all cached surfaces and reset counters."""
+        self._scaled.clear()
+        self._used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _scale(self, index: int, height: int) -> pg.Surface:
+        texture = self._textures[index]
+        # One wall cell is about as wide on the screen as it is high
+        width = min(texture.get_width(), height)
+        scaled = pg.transform.scale(texture, (width, height))
+        if self._target is None:
+            return scaled
+        return scaled.convert(self._target)
+
+    def _size(self, scaled: pg.Surface) -> int:
+        return scaled.get_width() * scaled.get_height() * scaled.get_bytesize()
@@ -0,0 +1,16 @@
+from typing import Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+from poom.pooma.floor_tables import FloorTables
+
+def draw_floor(
+    pixels: NDArray[np.uint32],
+    tables: FloorTables,
+    floor_texels: NDArray[np.uint32],
+    ceiling_texels: Optional[NDArray[np.uint32]],
+    x0: float,
+    y0: float,
+    angle: float,
+) -> None: ...
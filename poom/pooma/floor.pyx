@@ -0,0 +1,124 @@
+#cython: language_level=3
+import cython
+import numpy as np
+
+cimport numpy as np
+from cython.parallel cimport prange
+from libc.math cimport cos, sin
+
+from poom.pooma.floor_tables import FloorTables
+from poom.pooma.ray_march import get_num_threads
+
+
+cdef struct Texture:
+    # Texel '(u, v)' is 'texels[u * height + v]'
+    const np.uint32_t* texels
+    int width
+    int height
+
+
+cdef inline int wrap(float x, int size) noexcept nogil:
+    """Scale fractional part of coordinate to texture size."""
+    cdef int cell = <int>x
+    if x < cell:
+        # Truncation rounds negative coordinates up
+        cell -= 1
+    return min(<int>((x - cell) * size), size - 1)
+
+
+cdef inline np.uint32_t sample(Texture texture, float x, float y) noexcept nogil:
+    """Return texel at fractional parts of world coordinates."""
+    return texture.texels[
+        wrap(x, texture.width) * texture.height + wrap(y, texture.height)
+    ]
+
+
+cdef inline Texture as_texture(const np.uint32_t[:, ::1] texels) noexcept nogil:
+    cdef Texture texture
+    texture.texels = &texels[0, 0]
+    texture.width = texels.shape[0]
+    texture.height = texels.shape[1]
+    return texture
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void cast_row(
+    np.uint32_t[:, :] pixels,
+    int row,
+    float distance,
+    const float[::1] tangents,
+    float x0,
+    float y0,
+    float angle,
+    Texture floor_texture,
+    Texture ceiling_texture,
+    bint has_ceiling,
+) noexcept nogil:
+    cdef:
+        int height = pixels.shape[1]
+        int y = height // 2 + row
+        # Ceiling mirrors floor, middle row of odd height is floor
+        int ceiling_y = height - 1 - y
+        # Row step vectors: floor point is 'base + tangent * step'
+        float base_x = x0 + distance * cos(angle)
+        float base_y = y0 + distance * sin(angle)
+        float step_x = -distance * sin(angle)
+        float step_y = distance * cos(angle)
+        float world_x, world_y
+        int x
+
+    has_ceiling = has_ceiling and ceiling_y < y
+    for x in range(pixels.shape[0]):
+        world_x = base_x + tangents[x] * step_x
+        world_y = base_y + tangents[x] * step_y
+        pixels[x, y] = sample(floor_texture, world_x, world_y)
+        if has_ceiling:
+            pixels[x, ceiling_y] = sample(ceiling_texture, world_x, world_y)
+
+
+def draw_floor(
+    np.uint32_t[:, :] pixels,
+    tables: FloorTables,
+    const np.uint32_t[:, ::1] floor_texels not None,
+    const np.uint32_t[:, ::1] ceiling_texels,
+    float x0,
+    float y0,
+    float angle,
+) -> None:
+    """Draw textured floor and ceiling into surface pixels.
+
+    Textures are indexed like :mod:`pygame.surfarray` arrays, one texture
+    covers one map cell. Ceiling isn't drawn, if its texels are None.
+    """
+    cdef:
+        const float[::1] distances = tables.distance
+        const float[::1] tangents = tables.tangent
+        bint has_ceiling = ceiling_texels is not None
+        Texture floor_texture = as_texture(floor_texels)
+        Texture ceiling_texture
+        int rows = distances.shape[0]
+        int threads = get_num_threads()
+        int row
+
+    if tangents.shape[0] != pixels.shape[0]:
+        raise ValueError("Tables and pixels have different widths.")
+    if rows != pixels.shape[1] - pixels.shape[1] // 2:
+        raise ValueError("Tables and pixels have different heights.")
+    # Ceiling texture is never read without ceiling
+    ceiling_texture = as_texture(ceiling_texels) if has_ceiling else floor_texture
+
+    # Every row owns its own pixels, so rows can be drawn in parallel
+    with nogil:
+        if threads > 0:
+            for row in prange(rows, num_threads=threads, schedule="static"):
+                cast_row(
+                    pixels, row, distances[row], tangents, x0, y0, angle,
+                    floor_texture, ceiling_texture, has_ceiling,
+                )
+        else:
+            for row in prange(rows, schedule="static"):
+                cast_row(
+                    pixels, row, distances[row], tangents, x0, y0, angle,
+                    floor_texture, ceiling_texture, has_ceiling,
+                )
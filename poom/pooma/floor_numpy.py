@@ -0,0 +1,53 @@
+"""Pure NumPy implementation of :mod:`poom.pooma.floor`."""
+from typing import Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+from poom.pooma.floor_tables import FloorTables
+
+
+def _sample(
+    texels: NDArray[np.uint32],
+    world_x: NDArray[np.float32],
+    world_y: NDArray[np.float32],
+) -> NDArray[np.uint32]:
+    width, height = texels.shape
+    u = ((world_x - np.floor(world_x)) * width).astype(np.intp)
+    v = ((world_y - np.floor(world_y)) * height).astype(np.intp)
+    return texels[np.minimum(u, width - 1), np.minimum(v, height - 1)]
+
+
+def draw_floor(
+    pixels: NDArray[np.uint32],
+    tables: FloorTables,
+    floor_texels: NDArray[np.uint32],
+    ceiling_texels: Optional[NDArray[np.uint32]],
+    x0: float,
+    y0: float,
+    angle: float,
+) -> None:
+    """Draw textured floor and ceiling into surface pixels.
+
+    Textures are indexed like :mod:`pygame.surfarray` arrays, one texture
+    covers one map cell. Ceiling isn't drawn, if its texels are None.
+    """
+    width, height = pixels.shape
+    rows = tables.distance.shape[0]
+    if tables.tangent.shape[0] != width:
+        raise ValueError("Tables and pixels have different widths.")
+    if rows != height - height // 2:
+        raise ValueError("Tables and pixels have different heights.")
+
+    # Row step vectors: floor point is 'base + tangent * step'
+    distance = tables.distance[None, :]
+    tangent = tables.tangent[:, None]
+    cos_a, sin_a = np.float32(np.cos(angle)), np.float32(np.sin(angle))
+    world_x = x0 + distance * cos_a - tangent * (distance * sin_a)
+    world_y = y0 + distance * sin_a + tangent * (distance * cos_a)
+
+    pixels[:, height // 2 :] = _sample(floor_texels, world_x, world_y)
+    if ceiling_texels is not None:
+        # Ceiling mirrors floor, middle row of odd height is floor
+        ceiling = _sample(ceiling_texels, world_x, world_y)[:, ::-1]
+        pixels[:, : height // 2] = ceiling[:, : height // 2]
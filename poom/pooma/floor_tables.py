@@ -0,0 +1,40 @@
+"""Tables for floor and ceiling casting."""
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+@dataclass
+class FloorTables:
+    """Floor casting values, which depend only on resolution and FOV.
+
+    A floor point seen through pixel ``(x, y)`` below horizon is at
+    ``position + distance[y - height // 2] * (forward + tangent[x] * right)``,
+    where ``forward`` is view direction and ``right`` is perpendicular to it.
+    Ceiling pixels mirror floor ones.
+    """
+
+    # Perpendicular distance to floor seen by every row below horizon
+    distance: NDArray[np.float32]
+    # Tangent of angle between column ray and view direction
+    tangent: NDArray[np.float32]
+
+    @classmethod
+    def build(cls, width: int, height: int, fov: float) -> "FloorTables":
+        """Compute tables like walls are projected.
+
+        Wall at distance ``d`` is ``height / d`` pixels high and centered, so
+        its bottom and floor there are ``height / (2 * d)`` below horizon.
+
+        :param width: surface width
+        :param height: surface height
+        :param fov: field of view
+        :return: floor tables
+        """
+        rows = np.arange(height // 2, height) + 0.5 - height / 2
+        columns = np.arange(width) / width * fov - fov / 2
+        return cls(
+            distance=(height / (2 * np.maximum(rows, 0.5))).astype(np.float32),
+            tangent=np.tan(columns).astype(np.float32),
+        )
@@ -0,0 +1,75 @@
+"""Per-column results of wall ray casting."""
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import NDArray
+
+# Walls closer than it are drawn as if they were at this distance
+MIN_DISTANCE = 1e-3
+
+
+@dataclass
+class WallHits:
+    """Wall intersections of every screen column.
+
+    All arrays are indexed by screen column. Columns, whose ray didn't hit
+    anything, have ``texture_index`` equal to -1.
+
+    :attr:`distance` - euclidean distance from viewer to wall.
+    :attr:`offset` - hit position along the wall in range [0; 1).
+    :attr:`texture_index` - map cell value, i.e. texture index starting at 1.
+    :attr:`is_vertical` - 1 if ray crossed horizontal cell border last.
+    :attr:`cell_x` and :attr:`cell_y` - coordinates of hit map cell.
+    """
+
+    distance: NDArray[np.float32]
+    offset: NDArray[np.float32]
+    texture_index: NDArray[np.int8]
+    is_vertical: NDArray[np.uint8]
+    cell_x: NDArray[np.int32]
+    cell_y: NDArray[np.int32]
+
+    @classmethod
+    def empty(cls, width: int) -> "WallHits":
+        """Allocate buffers for specified number of columns.
+
+        :param width: number of columns
+        :return: uninitialized buffers
+        """
+        return cls(
+            distance=np.empty(width, dtype=np.float32),
+            offset=np.empty(width, dtype=np.float32),
+            texture_index=np.empty(width, dtype=np.int8),
+            is_vertical=np.empty(width, dtype=np.uint8),
+            cell_x=np.empty(width, dtype=np.int32),
+            cell_y=np.empty(width, dtype=np.int32),
+        )
+
+    @property
+    def width(self) -> int:
+        """Return number of columns."""
+        return self.distance.shape[0]
+
+    def mask(self, fov: float, height: int) -> NDArray[np.bool_]:
+        """Return pixels covered by walls, which are projected from hits.
+
+        Projection is the same as in ``draw_walls_pixels``. Blitted walls
+        may differ from it by a pixel at wall edges.
+
+        :param fov: field of view
+        :param height: surface height
+        :return: mask indexed by column and row, like surface pixels
+        """
+        columns = np.arange(self.width)
+        # Angle between column ray and view direction
+        delta = columns / self.width * fov - fov / 2
+        line_height = height / np.maximum(
+            self.distance * np.cos(delta),
+            MIN_DISTANCE,
+        )
+        top = ((height - line_height) / 2).astype(np.intp)
+        end = (top + line_height).astype(np.intp)
+        hit = self.texture_index > 0
+
+        rows = np.arange(height)
+        return hit[:, None] & (rows >= top[:, None]) & (rows < end[:, None])
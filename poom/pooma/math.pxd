@@ -1,9 +1,9 @@
 #cython: language_level=3
 
 
-cdef float frac(float x)
-cdef int sign(float x)
-cdef float angle_diff(float alpha, float beta)
+cdef float frac(float x) noexcept nogil
+cdef int sign(float x) noexcept nogil
+cdef float angle_diff(float alpha, float beta) noexcept nogil
 
 cdef struct Vec2i:
     int x
@@ -13,5 +13,21 @@ cdef struct Vec2f:
     float x
     float y
 
-cdef Vec2f sub(Vec2f u, Vec2f v)
-cdef float magnitude(Vec2f v)
+
+# Struct constructors like 'Vec2f(x, y)' need GIL in Cython 0.29
+cdef inline Vec2i vec2i(int x, int y) noexcept nogil:
+    cdef Vec2i v
+    v.x = x
+    v.y = y
+    return v
+
+
+cdef inline Vec2f vec2f(float x, float y) noexcept nogil:
+    cdef Vec2f v
+    v.x = x
+    v.y = y
+    return v
+
+
+cdef Vec2f sub(Vec2f u, Vec2f v) noexcept nogil
+cdef float magnitude(Vec2f v) noexcept nogil
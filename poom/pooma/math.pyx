@@ -2,16 +2,16 @@
 from libc.math cimport M_PI, fmod, sqrt
 
 
-cdef float frac(float x):
+cdef float frac(float x) noexcept nogil:
     return x - <int> x
 
-cdef int sign(float x):
+cdef int sign(float x) noexcept nogil:
     return 1 if x >= 0 else -1
 
-cdef Vec2f sub(Vec2f u, Vec2f v):
-    return Vec2f(u.x - v.x, u.y - v.y)
+cdef Vec2f sub(Vec2f u, Vec2f v) noexcept nogil:
+    return vec2f(u.x - v.x, u.y - v.y)
 
-cdef float angle_diff(float alpha, float beta):
+cdef float angle_diff(float alpha, float beta) noexcept nogil:
     cdef float diff = fmod(alpha - beta, 2 * M_PI)
     if diff > M_PI:
         diff -= 2 * M_PI
@@ -19,6 +19,6 @@ cdef float angle_diff(float alpha, float beta):
         diff += 2 * M_PI
     return diff
 
-cdef float magnitude(Vec2f v):
+cdef float magnitude(Vec2f v) noexcept nogil:
     return sqrt(v.x ** 2 + v.y ** 2)
 
@@ -0,0 +1,18 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+class PathFinder:
+    def __init__(
+        self,
+        map_: NDArray[np.int8],
+        neighbours: Optional[List[Tuple[int, ...]]] = None,
+    ) -> None: ...
+    def find_path(
+        self,
+        start_x: int,
+        start_y: int,
+        goal_x: int,
+        goal_y: int,
+    ) -> List[Tuple[int, int]]: ...
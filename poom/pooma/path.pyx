@@ -0,0 +1,217 @@
+#cython: language_level=3
+import cython
+import numpy as np
+
+cimport numpy as np
+from libc.stdlib cimport abs, free, malloc
+
+
+# Neighbours in the same order as in Python backend
+cdef int DX[4]
+cdef int DY[4]
+DX[:] = [0, 1, 0, -1]
+DY[:] = [-1, 0, 1, 0]
+
+
+cdef struct Node:
+    # Walked cost plus Manhattan distance to goal
+    int estimate
+    int cost
+    int index
+
+
+cdef struct Search:
+    # Search state, which is reused by all queries of finder
+    const np.int8_t* map_
+    int width
+    int height
+    int* cost
+    int* parent
+    # Cell values are valid only if its stamp is the current query
+    np.uint32_t* stamp
+    np.uint32_t query
+    Node* heap
+    int* path
+
+
+cdef inline bint before(Node a, Node b) noexcept nogil:
+    """Order nodes like tuples '(estimate, -cost, index)' of Python backend."""
+    if a.estimate != b.estimate:
+        return a.estimate < b.estimate
+    if a.cost != b.cost:
+        return a.cost > b.cost
+    return a.index < b.index
+
+
+cdef inline void heap_push(Node* heap, int* size, Node node) noexcept nogil:
+    cdef int child = size[0], parent
+    size[0] += 1
+    while child > 0:
+        parent = (child - 1) // 2
+        if not before(node, heap[parent]):
+            break
+        heap[child] = heap[parent]
+        child = parent
+    heap[child] = node
+
+
+cdef inline Node heap_pop(Node* heap, int* size) noexcept nogil:
+    cdef:
+        Node top = heap[0]
+        Node last
+        int parent = 0, child
+    size[0] -= 1
+    last = heap[size[0]]
+    while True:
+        child = 2 * parent + 1
+        if child >= size[0]:
+            break
+        if child + 1 < size[0] and before(heap[child + 1], heap[child]):
+            child += 1
+        if not before(heap[child], last):
+            break
+        heap[parent] = heap[child]
+        parent = child
+    heap[parent] = last
+    return top
+
+
+cdef inline bint walkable(Search* search, int x, int y) noexcept nogil:
+    return (
+        0 <= x < search.width
+        and 0 <= y < search.height
+        and search.map_[y * search.width + x] == 0
+    )
+
+
+@cython.cdivision(True)
+cdef int find_path_nogil(
+    Search* search,
+    int start_x,
+    int start_y,
+    int goal_x,
+    int goal_y,
+) noexcept nogil:
+    """Write path into 'search.path' and return its length, 0 if no path.
+
+    Neighbours are visited in the same order as in Python backend, so paths
+    are equal.
+    """
+    cdef:
+        int width = search.width
+        int start = start_y * width + start_x
+        int goal = goal_y * width + goal_x
+        int size = 0, length = 0, index, neighbour, new_cost, x, y, direction
+        Node node, next_node
+
+    if not (0 <= start_x < width and 0 <= start_y < search.height):
+        return 0
+    if not walkable(search, goal_x, goal_y):
+        return 0
+
+    search.query += 1
+    if search.query == 0:
+        # Stamps wrapped around, old ones could match new queries
+        for index in range(width * search.height):
+            search.stamp[index] = 0
+        search.query = 1
+    search.cost[start] = 0
+    search.parent[start] = -1
+    search.stamp[start] = search.query
+    node.estimate = abs(start_x - goal_x) + abs(start_y - goal_y)
+    node.cost = 0
+    node.index = start
+    heap_push(search.heap, &size, node)
+
+    while size:
+        node = heap_pop(search.heap, &size)
+        if node.index == goal:
+            index = goal
+            while index != -1:
+                search.path[length] = index
+                length += 1
+                index = search.parent[index]
+            return length
+        if node.cost > search.cost[node.index]:
+            continue  # Cell was reached by shorter path already
+
+        new_cost = node.cost + 1
+        next_node.cost = new_cost
+        for direction in range(4):
+            x = node.index % width + DX[direction]
+            y = node.index // width + DY[direction]
+            if not walkable(search, x, y):
+                continue
+            neighbour = y * width + x
+            if (
+                search.stamp[neighbour] == search.query
+                and search.cost[neighbour] <= new_cost
+            ):
+                continue
+            search.stamp[neighbour] = search.query
+            search.cost[neighbour] = new_cost
+            search.parent[neighbour] = node.index
+            next_node.estimate = new_cost + abs(x - goal_x) + abs(y - goal_y)
+            next_node.index = neighbour
+            heap_push(search.heap, &size, next_node)
+    return 0
+
+
+cdef class PathFinder:
+    """A* search on level map with array-backed binary heap.
+
+    All search state is allocated once, queries don't allocate anything
+    except the returned list and run without GIL.
+    """
+
+    cdef:
+        np.int8_t[:, ::1] _map
+        int[::1] _cost
+        int[::1] _parent
+        np.uint32_t[::1] _stamp
+        int[::1] _path
+        Node* _heap
+        Search _search
+
+    def __cinit__(self, map_, neighbours=None):
+        # Neighbours are accepted for compatibility with Python backend,
+        # compiled search checks map cells directly
+        self._map = np.ascontiguousarray(map_, dtype=np.int8)
+        height, width = self._map.shape[0], self._map.shape[1]
+        size = width * height
+        self._cost = np.zeros(size, dtype=np.intc)
+        self._parent = np.zeros(size, dtype=np.intc)
+        self._stamp = np.zeros(size, dtype=np.uint32)
+        self._path = np.zeros(max(size, 1), dtype=np.intc)
+        # Every push improves cost of cell, which happens at most once per
+        # edge with consistent heuristic
+        self._heap = <Node*>malloc((4 * size + 1) * sizeof(Node))
+        if self._heap == NULL:
+            raise MemoryError()
+
+        self._search.map_ = &self._map[0, 0]
+        self._search.width = width
+        self._search.height = height
+        self._search.cost = &self._cost[0]
+        self._search.parent = &self._parent[0]
+        self._search.stamp = &self._stamp[0]
+        self._search.query = 0
+        self._search.heap = self._heap
+        self._search.path = &self._path[0]
+
+    def __dealloc__(self):
+        free(self._heap)
+
+    def find_path(self, int start_x, int start_y, int goal_x, int goal_y):
+        cdef int length, index
+        with nogil:
+            length = find_path_nogil(
+                &self._search, start_x, start_y, goal_x, goal_y,
+            )
+        width = self._search.width
+        path = []
+        for index in range(length - 1, -1, -1):
+            path.append(
+                (self._path[index] % width, self._path[index] // width),
+            )
+        return path
@@ -0,0 +1,131 @@
+"""Pure Python implementation of :mod:`poom.pooma.path`."""
+from heapq import heappop, heappush
+from typing import List, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+# Neighbours are connected by edges, moves by diagonal aren't allowed
+DIRECTIONS: Tuple[Tuple[int, int], ...] = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+def walkable_neighbours(walkable: NDArray[np.bool_]) -> List[Tuple[int, ...]]:
+    """Return walkable neighbours of every cell.
+
+    Cells are indexed as ``y * width + x``. Walls have neighbours too,
+    because enemies can stand in wall corners.
+
+    :param walkable: walkability of cells indexed as ``walkable[y, x]``
+    :return: indices of neighbours in order of :data:`DIRECTIONS`
+    """
+    height, width = walkable.shape
+    rows = walkable.tolist()
+    return [
+        tuple(
+            (y + dy) * width + x + dx
+            for dx, dy in DIRECTIONS
+            if 0 <= x + dx < width and 0 <= y + dy < height and rows[y + dy][x + dx]
+        )
+        for y in range(height)
+        for x in range(width)
+    ]
+
+
+class PathFinder:
+    """A* search on level map with reusable state.
+
+    Walkable neighbours of every cell are precomputed, unless they are
+    passed, e.g. by :class:`poom.ai.navigation.NavigationGrid`, which
+    already has them. Instead of clearing search state before every query,
+    cells are stamped with query number, so stale values of previous queries
+    are just ignored.
+    """
+
+    def __init__(
+        self,
+        map_: NDArray[np.int8],
+        neighbours: Optional[List[Tuple[int, ...]]] = None,
+    ) -> None:
+        """Initialize path finder.
+
+        :param map_: level map, zero cells are walkable
+        :param neighbours: walkable neighbours of cells as returned by
+            :func:`walkable_neighbours`, defaults to computing them
+        """
+        self._walkable = np.asarray(map_) == 0
+        self._height, self._width = self._walkable.shape
+        size = self._walkable.size
+        if neighbours is None:
+            neighbours = walkable_neighbours(self._walkable)
+        self._neighbours = neighbours
+        self._cost = [0] * size
+        self._parent = [0] * size
+        self._stamp = [0] * size
+        self._query = 0
+
+    def find_path(
+        self,
+        start_x: int,
+        start_y: int,
+        goal_x: int,
+        goal_y: int,
+    ) -> List[Tuple[int, int]]:
+        """Find the shortest path.
+
+        Ties are broken by lower estimate, then by longer walked path, then
+        by lower cell index, so all backends return the same path.
+
+        :param start_x: start cell column, start may be wall
+        :param start_y: start cell row
+        :param goal_x: goal cell column
+        :param goal_y: goal cell row
+        :return: cells from start to goal inclusive as (x, y), empty if goal
+            is unreachable
+        """
+        inside = 0 <= start_x < self._width and 0 <= start_y < self._height
+        if not (inside and self._is_walkable(goal_x, goal_y)):
+            return []
+        width = self._width
+        start_index = start_y * width + start_x
+        goal_index = goal_y * width + goal_x
+
+        self._query += 1
+        query = self._query
+        cost, parent, stamp = self._cost, self._parent, self._stamp
+        cost[start_index] = 0
+        parent[start_index] = -1
+        stamp[start_index] = query
+        heap = [(abs(start_x - goal_x) + abs(start_y - goal_y), 0, start_index)]
+        while heap:
+            _, negative_cost, index = heappop(heap)
+            if index == goal_index:
+                return self._trace(index)
+            new_cost = 1 - negative_cost
+            if new_cost - 1 > cost[index]:
+                continue  # Cell was reached by shorter path already
+            for neighbour in self._neighbours[index]:
+                if stamp[neighbour] == query and cost[neighbour] <= new_cost:
+                    continue
+                stamp[neighbour] = query
+                cost[neighbour] = new_cost
+                parent[neighbour] = index
+                y, x = divmod(neighbour, width)
+                estimate = new_cost + abs(x - goal_x) + abs(y - goal_y)
+                heappush(heap, (estimate, -new_cost, neighbour))
+        return []
+
+    def _is_walkable(self, x: int, y: int) -> bool:
+        return (
+            0 <= x < self._width
+            and 0 <= y < self._height
+            and bool(self._walkable[y, x])
+        )
+
+    def _trace(self, index: int) -> List[Tuple[int, int]]:
+        path = []
+        while index != -1:
+            y, x = divmod(index, self._width)
+            path.append((x, y))
+            index = self._parent[index]
+        path.reverse()
+        return path
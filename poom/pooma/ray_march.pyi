@@ -1,9 +1,15 @@
-from typing import List
+from typing import List, Optional
 
 import numpy as np
 import pygame as pg
 from numpy.typing import NDArray
 
+from poom.pooma.atlas import SpriteAtlas, SpriteFrame, TextureAtlas
+from poom.pooma.column_cache import ColumnCache
+from poom.pooma.hits import WallHits
+
+def set_num_threads(threads: int) -> None: ...
+def get_num_threads() -> int: ...
 def draw_walls(
     map_: NDArray[np.int8],
     surface: pg.Surface,
@@ -14,6 +20,27 @@ def draw_walls(
     view: float,
     fov: float,
 ) -> None: ...
+def blit_walls(
+    surface: pg.Surface,
+    texture_vector: List[pg.Surface],
+    hits: WallHits,
+    fov: float,
+    cache: Optional[ColumnCache] = None,
+) -> None: ...
+def cast_walls(
+    map_: NDArray[np.int8],
+    hits: WallHits,
+    x0: float,
+    y0: float,
+    view: float,
+    fov: float,
+) -> None: ...
+def draw_walls_pixels(
+    pixels: NDArray[np.uint32],
+    atlas: TextureAtlas,
+    hits: WallHits,
+    fov: float,
+) -> None: ...
 def draw_sprite(
     surface: pg.Surface,
     stencil: NDArray[np.float32],
@@ -25,6 +52,38 @@ def draw_sprite(
     angle: float,
     fov: float,
 ) -> None: ...
+def draw_sprite_pixels(
+    pixels: NDArray[np.uint32],
+    stencil: NDArray[np.float32],
+    frame: SpriteFrame,
+    sprite_x: float,
+    sprite_y: float,
+    viewer_x: float,
+    viewer_y: float,
+    angle: float,
+    fov: float,
+) -> None: ...
+def draw_sprites(
+    pixels: NDArray[np.uint32],
+    stencil: NDArray[np.float32],
+    atlas: SpriteAtlas,
+    positions: NDArray[np.float32],
+    frames: NDArray[np.int32],
+    viewer_x: float,
+    viewer_y: float,
+    angle: float,
+    fov: float,
+) -> int: ...
+def cull_sprites(
+    stencil: NDArray[np.float32],
+    positions: NDArray[np.float32],
+    sizes: NDArray[np.int32],
+    surface_height: int,
+    viewer_x: float,
+    viewer_y: float,
+    angle: float,
+    fov: float,
+) -> NDArray[np.bool_]: ...
 def shoot(
     map_: NDArray[np.int8],
     x0: float,
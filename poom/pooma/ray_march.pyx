@@ -1,40 +1,111 @@
 #cython: language_level=3
-from typing import List
+from typing import List, Optional
 
 import cython
 import numpy as np
 import pygame as pg
 
 cimport numpy as np
+from cython.parallel cimport prange
 from libc.math cimport atan2, cos, sin, sqrt, tan
+from libc.stdlib cimport free, malloc, qsort
 
-from poom.pooma.math cimport Vec2f, Vec2i, angle_diff, frac, magnitude, sign, sub
+from poom.pooma.atlas import SpriteAtlas, SpriteFrame, TextureAtlas
+from poom.pooma.column_cache import ColumnCache
+from poom.pooma.hits import WallHits
+
+from poom.pooma.math cimport (
+    Vec2f,
+    Vec2i,
+    angle_diff,
+    frac,
+    magnitude,
+    sign,
+    sub,
+    vec2f,
+    vec2i,
+)
+
+
+# Walls closer than it are drawn as if they were at this distance
+cdef float MIN_DISTANCE = 1e-3
+# Zero means OpenMP default
+cdef int num_threads = 0
 
 
 cdef struct Intersection:
     float distance
     float offset
-    char texture_index
+    signed char texture_index
+    unsigned char is_vertical
+    int cell_x
+    int cell_y
+
+
+# Pointers to contiguous buffers of WallHits
+cdef struct HitBuffers:
+    float* distance
+    float* offset
+    signed char* texture_index
+    unsigned char* is_vertical
+    int* cell_x
+    int* cell_y
+
+
+cdef inline Intersection make_intersection(
+    float distance,
+    float offset,
+    signed char texture_index,
+    unsigned char is_vertical,
+    int cell_x,
+    int cell_y,
+) noexcept nogil:
+    # Struct constructor needs GIL in Cython 0.29
+    cdef Intersection intersection
+    intersection.distance = distance
+    intersection.offset = offset
+    intersection.texture_index = texture_index
+    intersection.is_vertical = is_vertical
+    intersection.cell_x = cell_x
+    intersection.cell_y = cell_y
+    return intersection
+
+
+def set_num_threads(int threads) -> None:
+    """Set number of threads used for ray casting.
+
+    Has effect only if module is built with OpenMP.
+
+    :param threads: number of threads, zero means OpenMP default
+    """
+    global num_threads
+    num_threads = max(threads, 0)
+
+
+def get_num_threads() -> int:
+    return num_threads
 
 
 # TODO: assert zero division
+@cython.boundscheck(False)
+@cython.wraparound(False)
 @cython.cdivision(True)
 cdef Intersection cast_ray(
-    np.ndarray[np.int8_t, ndim=2] map_,
+    const np.int8_t[:, :] map_,
     Vec2f player,
     float angle,
     float max_distance = 100.0,
-):
+) noexcept nogil:
     cdef float distance = 0, offset = 0
     cdef int is_vertical = 0
 
-    cdef Vec2i direction = Vec2i(sign(cos(angle)), sign(sin(angle)))
+    cdef Vec2i direction = vec2i(sign(cos(angle)), sign(sin(angle)))
     cdef float tangent = max(tan(angle) ** 2, 1e-6)
     # '1/tan(x) = cot(x)' and '(1 / x)^2 == 1 / x^2'
-    cdef Vec2f ray_step = Vec2f(sqrt(1 + tangent), sqrt(1 + 1 / tangent))
-    cdef Vec2i coords = Vec2i(<int>player.x, <int>player.y)
+    cdef Vec2f ray_step = vec2f(sqrt(1 + tangent), sqrt(1 + 1 / tangent))
+    cdef Vec2i coords = vec2i(<int>player.x, <int>player.y)
     # TODO: Looks like garbage... Rewrite it
-    cdef Vec2f ray = Vec2f(
+    cdef Vec2f ray = vec2f(
         (player.x - coords.x if direction.x < 0 else coords.x + 1 - player.x) * ray_step.x,
         (player.y - coords.y if direction.y < 0 else coords.y + 1 - player.y) * ray_step.y
     )
@@ -51,62 +122,195 @@ cdef Intersection cast_ray(
             ray.y += ray_step.y
             is_vertical = 1
 
+        if not (0 <= coords.x < map_.shape[1] and 0 <= coords.y < map_.shape[0]):
+            # Ray left the map without hitting anything
+            break
         # TODO: add wall descriptor
         if map_[coords.y, coords.x] != 0:  # Zero is empty cell
             offset = player.x + cos(angle) * distance if is_vertical else player.y + sin(angle) * distance
-            return Intersection(distance, frac(offset), map_[coords.y, coords.x])
-    return Intersection(max_distance, 0, -1)
+            return make_intersection(
+                distance,
+                frac(offset),
+                map_[coords.y, coords.x],
+                is_vertical,
+                coords.x,
+                coords.y,
+            )
+    return make_intersection(
+        max_distance, 0, -1, is_vertical, coords.x, coords.y,
+    )
+
+
+@cython.cdivision(True)
+cdef inline void cast_column(
+    const np.int8_t[:, :] map_,
+    Vec2f player,
+    float view,
+    float fov,
+    int x,
+    int width,
+    HitBuffers hits,
+) noexcept nogil:
+    cdef:
+        float angle = view - fov / 2 + x / <float>width * fov
+        Intersection intersection = cast_ray(map_, player, angle)
+    hits.distance[x] = intersection.distance
+    hits.offset[x] = intersection.offset
+    hits.texture_index[x] = intersection.texture_index
+    hits.is_vertical[x] = intersection.is_vertical
+    hits.cell_x[x] = intersection.cell_x
+    hits.cell_y[x] = intersection.cell_y
+
+
+cdef void cast_columns(
+    const np.int8_t[:, :] map_,
+    Vec2f player,
+    float view,
+    float fov,
+    int width,
+    HitBuffers hits,
+) noexcept nogil:
+    """Cast a ray for every screen column, columns are split across threads."""
+    cdef int x
+    if num_threads > 0:
+        for x in prange(width, num_threads=num_threads, schedule="static"):
+            cast_column(map_, player, view, fov, x, width, hits)
+    else:
+        for x in prange(width, schedule="static"):
+            cast_column(map_, player, view, fov, x, width, hits)
+
+
+def cast_walls(
+    const np.int8_t[:, :] map_,
+    hits: WallHits,
+    float x0,
+    float y0,
+    float view,
+    float fov,
+) -> None:
+    """Cast a ray for every column of hits and store intersections in it."""
+    cdef:
+        float[::1] distance = hits.distance
+        float[::1] offset = hits.offset
+        np.int8_t[::1] texture_index = hits.texture_index
+        np.uint8_t[::1] is_vertical = hits.is_vertical
+        int[::1] cell_x = hits.cell_x
+        int[::1] cell_y = hits.cell_y
+        int width = distance.shape[0]
+        HitBuffers buffers
+
+    if not (
+        offset.shape[0] == texture_index.shape[0] == is_vertical.shape[0]
+        == cell_x.shape[0] == cell_y.shape[0] == width
+    ):
+        raise ValueError("All hit buffers must have the same length.")
+    if width == 0:
+        return
+    buffers = HitBuffers(
+        &distance[0],
+        &offset[0],
+        <signed char*>&texture_index[0],
+        &is_vertical[0],
+        &cell_x[0],
+        &cell_y[0],
+    )
+    with nogil:
+        cast_columns(map_, vec2f(x0, y0), view, fov, width, buffers)
 
 
 def shoot(
-    np.ndarray[np.int8_t, ndim=2] map_,
+    const np.int8_t[:, :] map_,
     float x0,
     float y0,
     float angle,
     float max_distance = 100.0,
 ) -> float:
-    cdef Intersection intersection = cast_ray(map_, Vec2f(x0, y0), angle, max_distance)
+    cdef Intersection intersection = cast_ray(map_, vec2f(x0, y0), angle, max_distance)
     return intersection.distance
 
 
-# Ignore zero division errors due to performance reasons
-# TODO: assert zero detalization
-@cython.cdivision(True)
 def draw_walls(
-    np.ndarray[np.int8_t, ndim=2] map_,
+    const np.int8_t[:, :] map_,
     surface: pg.Surface,
-    np.ndarray[np.float32_t, ndim=1] stencil,
+    float[:] stencil,
     texture_vector: List[pg.Surface],
     float x0,
     float y0,
     float view,
     float fov,
 ) -> None:
+    hits = WallHits.empty(surface.get_width())
+    cast_walls(map_, hits, x0, y0, view, fov)
+    cdef float[:] distances = hits.distance
+    stencil[:] = distances
+    blit_walls(surface, texture_vector, hits, fov)
+
+
+# Ignore zero division errors due to performance reasons
+# TODO: assert zero detalization
+@cython.cdivision(True)
+def blit_walls(
+    surface: pg.Surface,
+    texture_vector: List[pg.Surface],
+    hits: WallHits,
+    float fov,
+    cache: Optional[ColumnCache] = None,
+) -> None:
+    """Blit scaled texture columns of walls cast by :func:`cast_walls`.
+
+    Scaled columns are taken from cache, if it is passed. Adjacent columns,
+    which are consecutive columns of the same scaled texture, are blitted
+    at once.
+    """
     cdef:
         size = surface.get_size()
         int width = size[0], height = size[1]
+        const float[:] distances = hits.distance
+        const float[:] offsets = hits.offset
+        const np.int8_t[:] indices = hits.texture_index
 
     cdef:
         int texture_width, texture_height
-        Intersection intersection
-        float alpha, angle
+        float delta
         int line_height, offset, x
         int g
+        int column, scaled_width
+        # Run of cached columns waiting to be blitted
+        int run_x = 0, run_column = 0, run_width = 0
 
-    for x in range(width):  # TODO: Can be parallel
-        alpha = x / <float>width * fov
-        angle = view - fov / 2 + alpha
-
-        intersection = cast_ray(map_, Vec2f(x0, y0), angle)
+    run_texture = None
+    for x in range(width):
+        if indices[x] <= 0:
+            # Ray didn't hit anything, nothing to draw
+            continue
+        # Angle between column ray and view direction
+        delta = x / <float>width * fov - fov / 2
 
-        stencil[x] = intersection.distance
         # Zero index reversed for empty cell, so decrement index
-        texture = texture_vector[intersection.texture_index - 1]
+        texture = texture_vector[indices[x] - 1]
         texture_width, texture_height = texture.get_size()
 
         # TODO: fix parabola-like walls
-        line_height = <int>(height / (intersection.distance * cos(angle - view)))
-        offset = <int>(texture_width * intersection.offset)
+        line_height = <int>(height / (distances[x] * cos(delta)))
+        offset = <int>(texture_width * offsets[x])
+        if cache is not None:
+            scaled = cache.get(indices[x] - 1, line_height)
+            if scaled is not None:
+                scaled_width = scaled.get_width()
+                column = min(<int>(scaled_width * offsets[x]), scaled_width - 1)
+                if (
+                    scaled is run_texture
+                    and x == run_x + run_width
+                    and column == run_column + run_width
+                ):
+                    run_width += 1
+                    continue
+                if run_texture is not None:
+                    blit_run(surface, run_texture, run_x, run_column, run_width)
+                run_texture = scaled
+                run_x, run_column, run_width = x, column, 1
+                continue
+
         g = <int>max(texture_height * (1 - height / <float>line_height) / 2, 0.0)
         line_height = min(height, line_height)
 
@@ -114,6 +318,520 @@ def draw_walls(
         wall = pg.transform.scale(line, (1, line_height))
         surface.blit(wall, (x, (height - line_height) // 2))
 
+    if run_texture is not None:
+        blit_run(surface, run_texture, run_x, run_column, run_width)
+
+
+cdef inline blit_run(surface, scaled, int x, int column, int width):
+    cdef int height = surface.get_height(), scaled_height = scaled.get_height()
+    # Parts out of the surface are clipped by blit
+    surface.blit(
+        scaled,
+        (x, (height - scaled_height) // 2),
+        (column, 0, width, scaled_height),
+    )
+
+
+# Palette of shaded atlas, see TextureAtlas
+cdef struct Shades:
+    int levels
+    float level_scale
+    # Number of palette colors in one shade
+    int colors
+    # Palette index of every texel, NULL for unshaded atlas
+    const np.uint16_t* indices
+    const np.uint32_t* palette
+
+
+cdef Shades atlas_shades(
+    atlas,
+    const np.uint16_t[::1] indices,
+    const np.uint32_t[::1] palette,
+    Py_ssize_t size,
+) except *:
+    cdef Shades shades
+    shades.levels = atlas.levels
+    shades.level_scale = atlas.level_scale
+    shades.colors = 0
+    shades.indices = NULL
+    shades.palette = NULL
+    if shades.levels == 1:
+        return shades
+
+    if (
+        shades.levels < 1
+        or indices.shape[0] != size
+        or palette.shape[0] == 0
+        or palette.shape[0] % shades.levels
+    ):
+        raise ValueError("Atlas palette doesn't match its texels.")
+    shades.colors = palette.shape[0] // shades.levels
+    shades.indices = &indices[0]
+    shades.palette = &palette[0]
+    return shades
+
+
+cdef inline const np.uint32_t* shade_palette(
+    Shades shades, float distance
+) noexcept nogil:
+    """Return palette in shade of given distance."""
+    return shades.palette + min(
+        <int>(distance * shades.level_scale), shades.levels - 1,
+    ) * shades.colors
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef inline void draw_column(
+    np.uint32_t[:, :] pixels,
+    int x,
+    const np.uint32_t* column,
+    const np.uint16_t* indices,
+    const np.uint32_t* palette,
+    int texture_height,
+    float line_height,
+) noexcept nogil:
+    """Copy one nearest-neighbor scaled texture column into pixels.
+
+    Column is drawn through palette, if its palette indices aren't NULL.
+    """
+    cdef:
+        int height = pixels.shape[1]
+        int top = <int>((height - line_height) / 2)
+        int start = max(top, 0)
+        int end = min(<int>(top + line_height), height)
+        float step = texture_height / line_height
+        float v = (start - top) * step
+        int y
+
+    if indices == NULL:
+        for y in range(start, end):
+            pixels[x, y] = column[min(<int>v, texture_height - 1)]
+            v += step
+    else:
+        for y in range(start, end):
+            pixels[x, y] = palette[indices[min(<int>v, texture_height - 1)]]
+            v += step
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef inline void rasterize_column(
+    np.uint32_t[:, :] pixels,
+    int x,
+    float fov,
+    float distance,
+    float offset,
+    int texture_index,
+    const np.uint32_t[::1] texels,
+    const int[::1] starts,
+    const int[::1] widths,
+    const int[::1] heights,
+    Shades shades,
+) noexcept nogil:
+    if texture_index <= 0:
+        # Ray didn't hit anything, nothing to draw
+        return
+
+    cdef:
+        # Zero index reversed for empty cell, so decrement index
+        int index = texture_index - 1
+        # Angle between column ray and view direction
+        float delta = x / <float>pixels.shape[0] * fov - fov / 2
+        float line_height = pixels.shape[1] / max(
+            distance * cos(delta), MIN_DISTANCE,
+        )
+        int u = min(<int>(widths[index] * offset), widths[index] - 1)
+
+    cdef:
+        int first = starts[index] + u * heights[index]
+        const np.uint16_t* indices = NULL
+
+    if shades.indices != NULL:
+        indices = shades.indices + first
+    draw_column(
+        pixels,
+        x,
+        &texels[first],
+        indices,
+        shade_palette(shades, distance),
+        heights[index],
+        line_height,
+    )
+
+
+# Ignore zero division errors due to performance reasons
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def draw_walls_pixels(
+    np.uint32_t[:, :] pixels,
+    atlas: TextureAtlas,
+    hits: WallHits,
+    float fov,
+) -> None:
+    """Draw walls cast by :func:`cast_walls` into surface pixels.
+
+    Every column of shaded atlas is drawn in the shade of its hit distance.
+    """
+    cdef:
+        const np.uint32_t[::1] texels = atlas.pixels
+        const int[::1] starts = atlas.start
+        const int[::1] widths = atlas.width
+        const int[::1] heights = atlas.height
+        const float[:] distances = hits.distance
+        const float[:] offsets = hits.offset
+        const np.int8_t[:] indices = hits.texture_index
+        Shades shades = atlas_shades(
+            atlas, atlas.indices, atlas.palette, texels.shape[0],
+        )
+        int width = pixels.shape[0]
+        int x
+
+    if distances.shape[0] != width:
+        raise ValueError("Hits and pixels have different widths.")
+
+    # Every column owns its own pixels, so columns can be drawn in parallel
+    with nogil:
+        if num_threads > 0:
+            for x in prange(width, num_threads=num_threads, schedule="static"):
+                rasterize_column(
+                    pixels, x, fov, distances[x], offsets[x], indices[x],
+                    texels, starts, widths, heights, shades,
+                )
+        else:
+            for x in prange(width, schedule="static"):
+                rasterize_column(
+                    pixels, x, fov, distances[x], offsets[x], indices[x],
+                    texels, starts, widths, heights, shades,
+                )
+
+
+cdef struct SpriteProjection:
+    float distance
+    # Index of sprite frame in atlas
+    int frame
+    # Screen column of sprite left side
+    int offset
+    int width
+    int height
+
+
+@cython.cdivision(True)
+cdef inline SpriteProjection project_sprite(
+    Vec2f sprite,
+    Vec2f viewer,
+    float angle,
+    float fov,
+    int surface_width,
+    int surface_height,
+    int texture_width,
+    int texture_height,
+) noexcept nogil:
+    """Find where sprite is on the screen."""
+    cdef:
+        Vec2f v = sub(sprite, viewer)
+        float delta_a = angle_diff(atan2(v.y, v.x), angle)
+        SpriteProjection projection
+
+    projection.distance = max(magnitude(v), MIN_DISTANCE)
+    projection.frame = 0
+    projection.height = <int>(surface_height / projection.distance)
+    projection.width = <int>(
+        projection.height * texture_width / <float>texture_height
+    )
+    projection.offset = <int>(
+        surface_width / 2
+        + delta_a * surface_width / fov
+        - projection.width / <float>2
+    )
+    return projection
+
+
+cdef inline bint on_screen(
+    SpriteProjection projection, int surface_width
+) noexcept nogil:
+    return (
+        projection.width > 0
+        and projection.offset + projection.width >= 0
+        and projection.offset < surface_width
+    )
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline bint is_visible(
+    SpriteProjection projection, float[:] stencil
+) noexcept nogil:
+    """Check that sprite is on the screen and isn't fully behind walls."""
+    cdef int x
+    if not on_screen(projection, stencil.shape[0]):
+        return False
+    for x in range(
+        max(projection.offset, 0),
+        min(projection.offset + projection.width, stencil.shape[0]),
+    ):
+        if stencil[x] >= projection.distance:
+            return True
+    return False
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef void rasterize_sprite(
+    np.uint32_t[:, :] pixels,
+    float[:] stencil,
+    SpriteProjection projection,
+    const np.uint32_t* texels,
+    const np.uint8_t* opaque,
+    const np.uint16_t* indices,
+    const np.uint32_t* palette,
+    int texture_width,
+    int texture_height,
+) noexcept nogil:
+    """Draw sprite columns, which aren't hidden by something closer.
+
+    Texel ``(u, v)`` is ``texels[u * texture_height + v]``, or
+    ``palette[indices[u * texture_height + v]]`` if indices aren't NULL.
+    """
+    cdef:
+        int surface_width = pixels.shape[0]
+        int surface_height = pixels.shape[1]
+        int offset = projection.offset
+        int top = (surface_height - projection.height) // 2
+        int x, y, column, t
+
+    for x in range(
+        max(offset, 0), min(offset + projection.width, surface_width)
+    ):
+        if stencil[x] < projection.distance:
+            # Sprite behind something
+            continue
+        column = <int>(
+            <long long>(x - offset) * texture_width // projection.width
+        ) * texture_height
+        for y in range(
+            max(top, 0), min(top + projection.height, surface_height)
+        ):
+            t = column + <int>(
+                <long long>(y - top) * texture_height // projection.height
+            )
+            if not opaque[t]:
+                continue
+            if indices == NULL:
+                pixels[x, y] = texels[t]
+            else:
+                pixels[x, y] = palette[indices[t]]
+        stencil[x] = projection.distance
+
+
+cdef int compare_far_first(const void* a, const void* b) noexcept nogil:
+    cdef:
+        float first = (<const SpriteProjection*>a).distance
+        float second = (<const SpriteProjection*>b).distance
+    return (first < second) - (first > second)
+
+
+def draw_sprite_pixels(
+    np.uint32_t[:, :] pixels,
+    float[:] stencil,
+    frame: SpriteFrame,
+    float sprite_x,
+    float sprite_y,
+    float viewer_x,
+    float viewer_y,
+    float angle,
+    float fov,
+) -> None:
+    """Draw sprite into surface pixels.
+
+    Columns hidden by something closer in stencil and transparent texels
+    are skipped. Texture is scaled on the fly with nearest-neighbor.
+    """
+    cdef:
+        const np.uint32_t[:, ::1] texels = frame.pixels
+        const np.uint8_t[:, ::1] opaque = frame.opaque
+        SpriteProjection projection = project_sprite(
+            vec2f(sprite_x, sprite_y),
+            vec2f(viewer_x, viewer_y),
+            angle,
+            fov,
+            pixels.shape[0],
+            pixels.shape[1],
+            texels.shape[0],
+            texels.shape[1],
+        )
+
+    if not on_screen(projection, pixels.shape[0]):
+        # *ALL* sprite not in camera frustum, nothing to draw
+        return
+
+    with nogil:
+        rasterize_sprite(
+            pixels,
+            stencil,
+            projection,
+            &texels[0, 0],
+            &opaque[0, 0],
+            NULL,
+            NULL,
+            texels.shape[0],
+            texels.shape[1],
+        )
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def cull_sprites(
+    float[:] stencil,
+    const float[:, :] positions,
+    const int[:, :] sizes,
+    int surface_height,
+    float viewer_x,
+    float viewer_y,
+    float angle,
+    float fov,
+):
+    """Find sprites, which are in the camera frustum and not behind walls.
+
+    :param stencil: stencil buffer filled by walls
+    :param positions: sprite coordinates, array of shape (count, 2)
+    :param sizes: sprite texture sizes, array of shape (count, 2)
+    :param surface_height: height of surface for rendering
+    :return: mask of visible sprites
+    """
+    cdef:
+        int count = positions.shape[0]
+        int i
+        np.uint8_t[:] visible
+
+    if sizes.shape[0] != count:
+        raise ValueError("Positions and sizes have different lengths.")
+    result = np.zeros(count, dtype=np.uint8)
+    visible = result
+
+    with nogil:
+        for i in range(count):
+            visible[i] = is_visible(
+                project_sprite(
+                    vec2f(positions[i, 0], positions[i, 1]),
+                    vec2f(viewer_x, viewer_y),
+                    angle,
+                    fov,
+                    stencil.shape[0],
+                    surface_height,
+                    sizes[i, 0],
+                    sizes[i, 1],
+                ),
+                stencil,
+            )
+    return result.view(np.bool_)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def draw_sprites(
+    np.uint32_t[:, :] pixels,
+    float[:] stencil,
+    atlas: SpriteAtlas,
+    const float[:, :] positions,
+    const int[:] frames,
+    float viewer_x,
+    float viewer_y,
+    float angle,
+    float fov,
+) -> int:
+    """Draw many sprites into surface pixels at once.
+
+    Sprites out of the camera frustum or fully behind walls in stencil are
+    culled, the rest are drawn from the farthest to the nearest like
+    :func:`draw_sprite_pixels` does. Sprites of shaded atlas are drawn in
+    the shade of their distance.
+
+    :param positions: sprite coordinates, array of shape (count, 2)
+    :param frames: index of every sprite frame in atlas
+    :return: number of drawn sprites
+    """
+    cdef:
+        const np.uint32_t[::1] texels = atlas.pixels
+        const np.uint8_t[::1] opaque = atlas.opaque
+        const int[::1] starts = atlas.start
+        const int[::1] widths = atlas.width
+        const int[::1] heights = atlas.height
+        Shades shades = atlas_shades(
+            atlas, atlas.indices, atlas.palette, texels.shape[0],
+        )
+        int count = positions.shape[0]
+        int surface_width = pixels.shape[0]
+        int visible = 0
+        int i, frame
+        bint bad_frame = False
+        SpriteProjection* projections
+
+    if frames.shape[0] != count:
+        raise ValueError("Positions and frames have different lengths.")
+    if stencil.shape[0] != surface_width:
+        raise ValueError("Stencil and pixels have different widths.")
+    if count == 0:
+        return 0
+    if positions.shape[1] != 2:
+        raise ValueError("Positions must be an array of shape (count, 2).")
+
+    projections = <SpriteProjection*>malloc(count * sizeof(SpriteProjection))
+    if projections == NULL:
+        raise MemoryError()
+
+    try:
+        with nogil:
+            # Cull sprites before drawing, so stencil contains only walls
+            for i in range(count):
+                frame = frames[i]
+                if frame < 0 or frame >= widths.shape[0]:
+                    bad_frame = True
+                    break
+                projections[visible] = project_sprite(
+                    vec2f(positions[i, 0], positions[i, 1]),
+                    vec2f(viewer_x, viewer_y),
+                    angle,
+                    fov,
+                    surface_width,
+                    pixels.shape[1],
+                    widths[frame],
+                    heights[frame],
+                )
+                projections[visible].frame = frame
+                if is_visible(projections[visible], stencil):
+                    visible += 1
+
+            if bad_frame:
+                visible = 0
+
+            # Due to the fact that 1D depth buffer is used,
+            # sprites must be drawn in decreasing order of distance.
+            qsort(projections, visible, sizeof(SpriteProjection), compare_far_first)
+            for i in range(visible):
+                frame = projections[i].frame
+                rasterize_sprite(
+                    pixels,
+                    stencil,
+                    projections[i],
+                    &texels[starts[frame]],
+                    &opaque[starts[frame]],
+                    shades.indices + starts[frame] if shades.indices else NULL,
+                    shade_palette(shades, projections[i].distance),
+                    widths[frame],
+                    heights[frame],
+                )
+    finally:
+        free(projections)
+
+    if bad_frame:
+        raise IndexError("Sprite frame index is out of atlas.")
+    return visible
+
 
 @cython.cdivision(True)
 def draw_sprite(
@@ -132,7 +850,7 @@ def draw_sprite(
         int surface_height = surface.get_height()
 
     cdef:
-        Vec2f v = sub(Vec2f(sprite_x, sprite_y), Vec2f(viewer_x, viewer_y))
+        Vec2f v = sub(vec2f(sprite_x, sprite_y), vec2f(viewer_x, viewer_y))
         float distance = magnitude(v)
         float enemy_angle = atan2(v.y, v.x)
         float delta_a = angle_diff(enemy_angle, angle)
@@ -0,0 +1,547 @@
+"""Pure NumPy implementation of :mod:`poom.pooma.ray_march`.
+
+Used when Cython extensions aren't compiled and as a reference
+implementation in tests. Rays of all screen columns step through DDA in
+lockstep, so Python overhead doesn't grow with resolution.
+"""
+from math import atan2, cos, sqrt
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import pygame as pg
+from numpy.typing import NDArray
+
+from poom.pooma.atlas import SpriteAtlas, SpriteFrame, TextureAtlas
+from poom.pooma.column_cache import ColumnCache
+from poom.pooma.hits import MIN_DISTANCE, WallHits
+
+FloatArray = NDArray[np.float32]
+# Distance, screen column of sprite left side, width and height
+SpriteProjection = Tuple[float, int, int, int]
+
+_num_threads = 0  # noqa: WPS420 kept only for API compatibility
+
+
+def set_num_threads(threads: int) -> None:
+    """Store number of threads, NumPy backend is single threaded.
+
+    :param threads: number of threads, ignored
+    """
+    global _num_threads  # noqa: WPS420
+    _num_threads = max(threads, 0)
+
+
+def get_num_threads() -> int:
+    return _num_threads
+
+
+def cast_rays(  # noqa: WPS210 DDA state is a lot of arrays
+    map_: NDArray[np.int8],
+    x0: float,
+    y0: float,
+    angles: NDArray[np.float64],
+    max_distance: float = 100.0,
+) -> WallHits:
+    """Cast rays for all angles at once.
+
+    Every iteration steps all unfinished rays to the next cell border.
+    Rays, which hit a wall or left the map, are dropped from the arrays.
+
+    :param map_: level map
+    :param x0: viewer x coordinate
+    :param y0: viewer y coordinate
+    :param angles: ray angles
+    :param max_distance: distance after which ray is considered missed
+    :return: intersections of every ray
+    """
+    count = angles.shape[0]
+    hits = WallHits.empty(count)
+    hits.distance[:] = max_distance
+    hits.offset[:] = 0
+    hits.texture_index[:] = -1
+
+    cos_a, sin_a = np.cos(angles), np.sin(angles)
+    direction_x = np.where(cos_a >= 0, 1, -1)
+    direction_y = np.where(sin_a >= 0, 1, -1)
+    tangent = np.maximum(np.tan(angles) ** 2, 1e-6)
+    # '1/tan(x) = cot(x)' and '(1 / x)^2 == 1 / x^2'
+    step_x, step_y = np.sqrt(1 + tangent), np.sqrt(1 + 1 / tangent)
+    cell_x = np.full(count, int(x0))
+    cell_y = np.full(count, int(y0))
+    ray_x = np.where(direction_x < 0, x0 - cell_x, cell_x + 1 - x0) * step_x
+    ray_y = np.where(direction_y < 0, y0 - cell_y, cell_y + 1 - y0) * step_y
+
+    height, width = map_.shape
+    columns = np.arange(count)
+    while columns.size:
+        horizontal = ray_x < ray_y
+        cell_x = cell_x + np.where(horizontal, direction_x, 0)
+        cell_y = cell_y + np.where(horizontal, 0, direction_y)
+        walked = np.where(horizontal, ray_x, ray_y)
+        ray_x = ray_x + np.where(horizontal, step_x, 0)
+        ray_y = ray_y + np.where(horizontal, 0, step_y)
+
+        inside = (cell_x >= 0) & (cell_x < width) & (cell_y >= 0) & (cell_y < height)
+        cells = np.where(
+            inside,
+            map_[np.clip(cell_y, 0, height - 1), np.clip(cell_x, 0, width - 1)],
+            0,
+        )
+        hit = cells != 0  # Zero is empty cell
+
+        # Missed rays keep last visited cell, like compiled version does
+        hits.is_vertical[columns] = ~horizontal
+        hits.cell_x[columns] = cell_x
+        hits.cell_y[columns] = cell_y
+
+        hit_columns = columns[hit]
+        hit_walked = walked[hit]
+        position = np.where(
+            horizontal[hit],
+            y0 + sin_a[hit] * hit_walked,
+            x0 + cos_a[hit] * hit_walked,
+        )
+        hits.distance[hit_columns] = hit_walked
+        hits.offset[hit_columns] = position - np.trunc(position)
+        hits.texture_index[hit_columns] = cells[hit]
+
+        keep = inside & ~hit & (walked < max_distance)
+        columns = columns[keep]
+        cos_a, sin_a = cos_a[keep], sin_a[keep]
+        direction_x, direction_y = direction_x[keep], direction_y[keep]
+        step_x, step_y = step_x[keep], step_y[keep]
+        cell_x, cell_y = cell_x[keep], cell_y[keep]
+        ray_x, ray_y = ray_x[keep], ray_y[keep]
+    return hits
+
+
+def _column_angles(width: int, view: float, fov: float) -> NDArray[np.float64]:
+    return view - fov / 2 + np.arange(width) / width * fov
+
+
+def shoot(
+    map_: NDArray[np.int8],
+    x0: float,
+    y0: float,
+    angle: float,
+    max_distance: float = 100.0,
+) -> float:
+    hits = cast_rays(map_, x0, y0, np.array([angle]), max_distance)
+    return float(hits.distance[0])
+
+
+def cast_walls(
+    map_: NDArray[np.int8],
+    hits: WallHits,
+    x0: float,
+    y0: float,
+    view: float,
+    fov: float,
+) -> None:
+    """Cast a ray for every column of hits and store intersections in it."""
+    result = cast_rays(map_, x0, y0, _column_angles(hits.width, view, fov))
+    for name, buffer in vars(result).items():
+        getattr(hits, name)[:] = buffer
+
+
+def draw_walls(
+    map_: NDArray[np.int8],
+    surface: pg.Surface,
+    stencil: FloatArray,
+    texture_vector: List[pg.Surface],
+    x0: float,
+    y0: float,
+    view: float,
+    fov: float,
+) -> None:
+    hits = WallHits.empty(surface.get_width())
+    cast_walls(map_, hits, x0, y0, view, fov)
+    stencil[:] = hits.distance
+    blit_walls(surface, texture_vector, hits, fov)
+
+
+def blit_walls(  # noqa: WPS210 mirrors compiled version
+    surface: pg.Surface,
+    texture_vector: List[pg.Surface],
+    hits: WallHits,
+    fov: float,
+    cache: Optional[ColumnCache] = None,
+) -> None:
+    """Blit scaled texture columns of walls cast by :func:`cast_walls`.
+
+    Scaled columns are taken from cache, if it is passed. Adjacent columns,
+    which are consecutive columns of the same scaled texture, are blitted
+    at once.
+    """
+    width, height = surface.get_size()
+    distance, offsets, indices = hits.distance, hits.offset, hits.texture_index
+    # Run of cached columns waiting to be blitted
+    run_texture: Optional[pg.Surface] = None
+    run_x = run_column = run_width = 0
+
+    for x in np.nonzero(indices > 0)[0]:
+        # Angle between column ray and view direction
+        delta = x / width * fov - fov / 2
+
+        # Zero index reversed for empty cell, so decrement index
+        texture = texture_vector[indices[x] - 1]
+        texture_width, texture_height = texture.get_size()
+
+        line_height = int(height / (distance[x] * cos(delta)))
+        offset = int(texture_width * offsets[x])
+        if cache is not None:
+            scaled = cache.get(indices[x] - 1, line_height)
+            if scaled is not None:
+                scaled_width = scaled.get_width()
+                column = min(int(scaled_width * offsets[x]), scaled_width - 1)
+                if (
+                    scaled is run_texture
+                    and x == run_x + run_width
+                    and column == run_column + run_width
+                ):
+                    run_width += 1
+                    continue
+                if run_texture is not None:
+                    _blit_run(surface, run_texture, run_x, run_column, run_width)
+                run_texture = scaled
+                run_x, run_column, run_width = int(x), column, 1
+                continue
+
+        g = int(max(texture_height * (1 - height / line_height) / 2, 0))
+        line_height = min(height, line_height)
+
+        line = texture.subsurface(offset, g, 1, texture_height - 2 * g)
+        wall = pg.transform.scale(line, (1, line_height))
+        surface.blit(wall, (int(x), (height - line_height) // 2))
+
+    if run_texture is not None:
+        _blit_run(surface, run_texture, run_x, run_column, run_width)
+
+
+def _blit_run(
+    surface: pg.Surface,
+    scaled: pg.Surface,
+    x: int,
+    column: int,
+    width: int,
+) -> None:
+    scaled_height = scaled.get_height()
+    # Parts out of the surface are clipped by blit
+    surface.blit(
+        scaled,
+        (x, (surface.get_height() - scaled_height) // 2),
+        (column, 0, width, scaled_height),
+    )
+
+
+def draw_walls_pixels(  # noqa: WPS210 mirrors compiled version
+    pixels: NDArray[np.uint32],
+    atlas: TextureAtlas,
+    hits: WallHits,
+    fov: float,
+) -> None:
+    """Draw walls cast by :func:`cast_walls` into surface pixels.
+
+    Every column of shaded atlas is drawn in the shade of its hit distance.
+    """
+    width, height = pixels.shape
+    if hits.width != width:
+        raise ValueError("Hits and pixels have different widths.")
+    distance, offsets, indices = hits.distance, hits.offset, hits.texture_index
+
+    columns = np.nonzero(indices > 0)[0]
+    # Zero index reversed for empty cell, so decrement index
+    index = indices[columns].astype(np.intp) - 1
+    texture_width = atlas.width[index]
+    texture_height = atlas.height[index]
+
+    # Angle between column ray and view direction
+    delta = columns / width * fov - fov / 2
+    line_height = height / np.maximum(distance[columns] * np.cos(delta), MIN_DISTANCE)
+    top = ((height - line_height) / 2).astype(np.intp)
+    start = np.maximum(top, 0)
+    end = np.minimum((top + line_height).astype(np.intp), height)
+    u = np.minimum(
+        (texture_width * offsets[columns]).astype(np.intp),
+        texture_width - 1,
+    )
+    first_texel = atlas.start[index] + u * texture_height
+
+    rows = np.arange(height)
+    visible = (rows >= start[:, None]) & (rows < end[:, None])
+    column, y = np.nonzero(visible)
+    v = ((y - top[column]) * (texture_height / line_height)[column]).astype(np.intp)
+    v = np.minimum(v, texture_height[column] - 1)
+    pixels[columns[column], y] = _shade_texels(
+        atlas, first_texel[column] + v, distance[columns][column]
+    )
+
+
+def _shade_texels(
+    atlas: Union[TextureAtlas, SpriteAtlas],
+    texels: NDArray[np.intp],
+    distance: FloatArray,
+) -> NDArray[np.uint32]:
+    """Return atlas texels in shades of given distances."""
+    if atlas.levels == 1:
+        return atlas.pixels[texels]
+    colors = atlas.palette.size // atlas.levels
+    if (
+        atlas.levels < 1
+        or atlas.indices.size != atlas.pixels.size
+        or not colors
+        or atlas.palette.size % atlas.levels
+    ):
+        raise ValueError("Atlas palette doesn't match its texels.")
+    level = (distance * np.float32(atlas.level_scale)).astype(np.intp)
+    shade = np.minimum(level, atlas.levels - 1) * colors
+    return atlas.palette[shade + atlas.indices[texels]]
+
+
+def draw_sprite(  # noqa: WPS210 mirrors compiled version
+    surface: pg.Surface,
+    stencil: FloatArray,
+    texture: pg.Surface,
+    sprite_x: float,
+    sprite_y: float,
+    viewer_x: float,
+    viewer_y: float,
+    angle: float,
+    fov: float,
+) -> None:
+    surface_width, surface_height = surface.get_size()
+
+    v_x, v_y = sprite_x - viewer_x, sprite_y - viewer_y
+    distance = sqrt(v_x ** 2 + v_y ** 2)
+    delta_a = (atan2(v_y, v_x) - angle) % (2 * np.pi)
+    if delta_a > np.pi:
+        delta_a -= 2 * np.pi
+
+    ratio = texture.get_width() / texture.get_height()
+    sprite_height = int(surface_height / distance)
+    sprite_width = int(sprite_height * ratio)
+    offset = int(surface_width / 2 + delta_a * surface_width / fov - sprite_width / 2)
+    if offset + sprite_width < 0 or offset >= surface_width:
+        # *ALL* sprite not in camera frustum, avoid scale and blit
+        return
+
+    positions = np.arange(max(offset, 0), min(offset + sprite_width, surface_width))
+    visible = positions[stencil[positions] >= distance]
+    if not visible.size:
+        # Sprite behind something
+        return
+
+    scaled_texture = pg.transform.scale(texture, (sprite_width, sprite_height))
+    top = (surface_height - sprite_height) // 2
+    # Blit runs of consecutive visible columns at once
+    breaks = np.nonzero(np.diff(visible) != 1)[0] + 1
+    for run in np.split(visible, breaks):
+        area = (int(run[0]) - offset, 0, run.size, sprite_height)
+        surface.blit(scaled_texture, (int(run[0]), top), area)
+    stencil[visible] = distance
+
+
+def _project_sprite(
+    surface_size: Tuple[int, int],
+    texture_size: Tuple[int, int],
+    v_x: float,
+    v_y: float,
+    angle: float,
+    fov: float,
+) -> SpriteProjection:
+    """Find where sprite is on the screen."""
+    surface_width, surface_height = surface_size
+    texture_width, texture_height = texture_size
+    distance = max(sqrt(v_x ** 2 + v_y ** 2), MIN_DISTANCE)
+    delta_a = (atan2(v_y, v_x) - angle) % (2 * np.pi)
+    if delta_a > np.pi:
+        delta_a -= 2 * np.pi
+
+    sprite_height = int(surface_height / distance)
+    sprite_width = int(sprite_height * texture_width / texture_height)
+    offset = int(surface_width / 2 + delta_a * surface_width / fov - sprite_width / 2)
+    return distance, offset, sprite_width, sprite_height
+
+
+def _on_screen(offset: int, sprite_width: int, surface_width: int) -> bool:
+    return sprite_width > 0 and offset + sprite_width >= 0 and offset < surface_width
+
+
+def _is_visible(stencil: FloatArray, projection: SpriteProjection) -> bool:
+    """Check that sprite is on the screen and isn't fully behind walls."""
+    distance, offset, sprite_width, _ = projection
+    if not _on_screen(offset, sprite_width, stencil.shape[0]):
+        return False
+    columns = stencil[max(offset, 0) : offset + sprite_width]
+    return bool((columns >= distance).any())
+
+
+def cull_sprites(  # noqa: WPS211 mirrors compiled version
+    stencil: FloatArray,
+    positions: FloatArray,
+    sizes: NDArray[np.int32],
+    surface_height: int,
+    viewer_x: float,
+    viewer_y: float,
+    angle: float,
+    fov: float,
+) -> NDArray[np.bool_]:
+    """Find sprites, which are in the camera frustum and not behind walls.
+
+    :param stencil: stencil buffer filled by walls
+    :param positions: sprite coordinates, array of shape (count, 2)
+    :param sizes: sprite texture sizes, array of shape (count, 2)
+    :param surface_height: height of surface for rendering
+    :return: mask of visible sprites
+    """
+    if sizes.shape[0] != positions.shape[0]:
+        raise ValueError("Positions and sizes have different lengths.")
+    surface_size = (stencil.shape[0], surface_height)
+    visible = [
+        _is_visible(
+            stencil,
+            _project_sprite(
+                surface_size,
+                (width, height),
+                sprite_x - viewer_x,
+                sprite_y - viewer_y,
+                angle,
+                fov,
+            ),
+        )
+        for (sprite_x, sprite_y), (width, height) in zip(
+            positions.tolist(), sizes.tolist()
+        )
+    ]
+    return np.array(visible, dtype=np.bool_)
+
+
+def _rasterize_sprite(  # noqa: WPS211 mirrors compiled version
+    pixels: NDArray[np.uint32],
+    stencil: FloatArray,
+    texels: NDArray[np.uint32],
+    opaque: NDArray[np.uint8],
+    distance: float,
+    offset: int,
+    sprite_width: int,
+    sprite_height: int,
+) -> None:
+    """Draw sprite columns, which aren't hidden by something closer."""
+    surface_width, surface_height = pixels.shape
+    texture_width, texture_height = texels.shape
+    columns = np.arange(max(offset, 0), min(offset + sprite_width, surface_width))
+    columns = columns[stencil[columns] >= distance]
+    top = (surface_height - sprite_height) // 2
+    rows = np.arange(max(top, 0), min(top + sprite_height, surface_height))
+    if not columns.size:
+        # Sprite behind something
+        return
+
+    u = (columns - offset) * texture_width // sprite_width
+    t = (rows - top) * texture_height // sprite_height
+    block = np.ix_(columns, rows)
+    texture_block = np.ix_(u, t)
+    pixels[block] = np.where(
+        opaque[texture_block] != 0, texels[texture_block], pixels[block]
+    )
+    stencil[columns] = distance
+
+
+def draw_sprite_pixels(  # noqa: WPS211 mirrors compiled version
+    pixels: NDArray[np.uint32],
+    stencil: FloatArray,
+    frame: SpriteFrame,
+    sprite_x: float,
+    sprite_y: float,
+    viewer_x: float,
+    viewer_y: float,
+    angle: float,
+    fov: float,
+) -> None:
+    """Draw sprite into surface pixels.
+
+    Columns hidden by something closer in stencil and transparent texels
+    are skipped. Texture is scaled on the fly with nearest-neighbor.
+    """
+    distance, offset, sprite_width, sprite_height = _project_sprite(
+        pixels.shape,
+        frame.pixels.shape,
+        sprite_x - viewer_x,
+        sprite_y - viewer_y,
+        angle,
+        fov,
+    )
+    if not _on_screen(offset, sprite_width, pixels.shape[0]):
+        # *ALL* sprite not in camera frustum, nothing to draw
+        return
+    _rasterize_sprite(
+        pixels,
+        stencil,
+        frame.pixels,
+        frame.opaque,
+        distance,
+        offset,
+        sprite_width,
+        sprite_height,
+    )
+
+
+def draw_sprites(  # noqa: WPS211 mirrors compiled version
+    pixels: NDArray[np.uint32],
+    stencil: FloatArray,
+    atlas: SpriteAtlas,
+    positions: FloatArray,
+    frames: NDArray[np.int32],
+    viewer_x: float,
+    viewer_y: float,
+    angle: float,
+    fov: float,
+) -> int:
+    """Draw many sprites into surface pixels at once.
+
+    Sprites out of the camera frustum or fully behind walls in stencil are
+    culled, the rest are drawn from the farthest to the nearest like
+    :func:`draw_sprite_pixels` does. Sprites of shaded atlas are drawn in
+    the shade of their distance.
+
+    :param positions: sprite coordinates, array of shape (count, 2)
+    :param frames: index of every sprite frame in atlas
+    :return: number of drawn sprites
+    """
+    if frames.shape[0] != positions.shape[0]:
+        raise ValueError("Positions and frames have different lengths.")
+    if stencil.shape[0] != pixels.shape[0]:
+        raise ValueError("Stencil and pixels have different widths.")
+    if frames.size and not (0 <= frames.min() and frames.max() < atlas.start.size):
+        raise IndexError("Sprite frame index is out of atlas.")
+
+    # Cull sprites before drawing, so stencil contains only walls
+    projections = []
+    for (sprite_x, sprite_y), frame in zip(positions.tolist(), frames.tolist()):
+        texture_size = (int(atlas.width[frame]), int(atlas.height[frame]))
+        projection = _project_sprite(
+            pixels.shape,
+            texture_size,
+            sprite_x - viewer_x,
+            sprite_y - viewer_y,
+            angle,
+            fov,
+        )
+        if _is_visible(stencil, projection):
+            projections.append((projection, frame, texture_size))
+
+    # Due to the fact that 1D depth buffer is used,
+    # sprites must be drawn in decreasing order of distance.
+    projections.sort(key=lambda sprite: sprite[0][0], reverse=True)
+    for projection, frame, texture_size in projections:
+        start = atlas.start[frame]
+        end = start + texture_size[0] * texture_size[1]
+        texels = _shade_texels(atlas, np.arange(start, end), np.float32(projection[0]))
+        _rasterize_sprite(
+            pixels,
+            stencil,
+            texels.reshape(texture_size),
+            atlas.opaque[start:end].reshape(texture_size),
+            *projection,
+        )
+    return len(projections)
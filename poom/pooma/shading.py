@@ -0,0 +1,110 @@
+"""Distance shading of packed textures."""
+from dataclasses import dataclass
+from typing import ClassVar, Final, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+Masks = Tuple[int, int, int, int]
+# Bits of 8-bit red, green and blue channels kept by lossy quantization
+_QUANTIZED_BITS: Final[Tuple[int, int, int]] = (5, 6, 5)
+
+
+@dataclass(frozen=True)
+class Shading:
+    """Fading of textures into fog color with distance.
+
+    Texels aren't shaded per pixel. Textures are quantized to a palette like
+    in Doom, and the palette is precomputed in :attr:`levels` shades, so a
+    whole wall column or sprite is drawn through the shade of its distance
+    bucket. Shade ``i`` is palette blended with :attr:`color` by
+    ``i / (levels - 1)``, the last one is used from :attr:`distance` on.
+    Black fog color just darkens far textures.
+    """
+
+    levels: int = 16
+    distance: float = 16.0
+    color: Tuple[int, int, int] = (0, 0, 0)
+
+    # Palette indices are 16-bit
+    max_colors: ClassVar[int] = 2 ** 16
+
+    def __post_init__(self) -> None:
+        if self.levels < 2:
+            raise ValueError("Shading needs at least two levels.")
+        if self.distance <= 0:
+            raise ValueError("Shading distance must be positive.")
+
+    @property
+    def level_scale(self) -> float:
+        """Return factor, which turns distance into shade level."""
+        return (self.levels - 1) / self.distance
+
+    def quantize(
+        self,
+        pixels: NDArray[np.uint32],
+        masks: Masks,
+    ) -> Tuple[NDArray[np.uint16], NDArray[np.uint32]]:
+        """Split pixels into palette and palette indices.
+
+        Palette is exact, if there are few enough pixels. Otherwise low bits
+        of every channel are dropped like in RGB565 and other bits, like
+        alpha, are set. It doesn't matter, because only opaque texels are
+        ever written into surfaces.
+
+        :param pixels: 32-bit pixels of any shape
+        :param masks: RGBA masks of pixels format, see :meth:`pygame.Surface.get_masks`
+        :return: palette index of every pixel and palette
+        """
+        pixels = pixels.ravel()
+        if pixels.size <= self.max_colors:
+            palette, indices = np.unique(pixels, return_inverse=True)
+            return indices.astype(np.uint16).ravel(), palette
+
+        # Pack kept bits of all channels into 16-bit key, it's much faster
+        # than sorting of millions of texels
+        keys = np.zeros(pixels.size, dtype=np.uint32)
+        for mask, bits in zip(masks[:3], _QUANTIZED_BITS):
+            shift = (mask & -mask).bit_length() - 1
+            dropped = (mask >> shift).bit_length() - bits
+            channel = (pixels & np.uint32(mask)) >> np.uint32(shift + dropped)
+            keys = keys << np.uint32(bits) | channel
+        used = np.bincount(keys, minlength=self.max_colors) > 0
+        indices = (np.cumsum(used) - 1)[keys]
+
+        used_keys = np.nonzero(used)[0].astype(np.uint32)
+        palette = np.full(used_keys.size, ~_rgb_mask(masks), dtype=np.uint32)
+        for mask, bits in reversed(tuple(zip(masks[:3], _QUANTIZED_BITS))):
+            shift = (mask & -mask).bit_length() - 1
+            dropped = (mask >> shift).bit_length() - bits
+            channel = used_keys & np.uint32((1 << bits) - 1)
+            palette |= channel << np.uint32(shift + dropped)
+            used_keys >>= np.uint32(bits)
+        return indices.astype(np.uint16), palette
+
+    def shade(self, palette: NDArray[np.uint32], masks: Masks) -> NDArray[np.uint32]:
+        """Precompute all shades of palette.
+
+        Shade ``i`` of ``palette[j]`` is stored at ``shaded[i * palette.size + j]``.
+        Bits out of RGB masks are kept as is.
+
+        :param palette: 32-bit colors
+        :param masks: RGBA masks of palette format, see :meth:`pygame.Surface.get_masks`
+        :return: flat array of shaded colors
+        """
+        fog = np.linspace(0, 1, self.levels)[:, None]
+        shaded = np.zeros((self.levels, palette.size), dtype=np.uint32)
+        for mask, fog_color in zip(masks[:3], self.color):
+            if not mask:
+                continue
+            shift = (mask & -mask).bit_length() - 1
+            depth = mask >> shift
+            channel = (palette & np.uint32(mask)) >> np.uint32(shift)
+            blended = channel * (1 - fog) + fog_color * depth / 255 * fog
+            shaded |= np.rint(blended).astype(np.uint32) << np.uint32(shift)
+        shaded |= palette & ~_rgb_mask(masks)
+        return shaded.ravel()
+
+
+def _rgb_mask(masks: Masks) -> np.uint32:
+    return np.uint32(masks[0] | masks[1] | masks[2])
@@ -0,0 +1,111 @@
+"""Frame time profiling."""
+from typing import Dict, Final, List, Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+Percentiles = Dict[str, float]
+
+
+class Profiler:
+    """Ring buffer of per-stage durations of the last frames.
+
+    Stages are recorded with :meth:`record` during a frame, which is
+    finished by :meth:`end_frame`. Only the last :attr:`capacity` frames
+    are kept, so percentiles are rolling. Stages, which weren't recorded in
+    some frame, took zero time in it.
+    """
+
+    # Name of the stage, which is duration of the whole frame
+    frame_stage: Final[str] = "frame"
+
+    def __init__(self, capacity: int = 240) -> None:
+        """Initialize profiler.
+
+        :param capacity: number of kept frames, defaults to 240
+        :raises ValueError: if capacity isn't positive
+        """
+        if capacity <= 0:
+            raise ValueError("Profiler capacity must be positive.")
+        self._capacity = capacity
+        # One more slot for the current frame
+        self._slots = capacity + 1
+        self._samples: Dict[str, NDArray[np.float64]] = {}
+        self._frames = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def frames(self) -> int:
+        """Return number of finished frames since the last clear."""
+        return self._frames
+
+    @property
+    def stages(self) -> List[str]:
+        """Return names of recorded stages except the whole frame."""
+        return [stage for stage in self._samples if stage != self.frame_stage]
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Add duration to stage of the current frame.
+
+        :param stage: stage name
+        :param seconds: duration in seconds
+        """
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples[stage] = np.zeros(self._slots)
+        samples[self._frames % self._slots] += seconds
+
+    def end_frame(self, seconds: float) -> None:
+        """Finish the current frame.
+
+        :param seconds: duration of the whole frame in seconds
+        """
+        self.record(self.frame_stage, seconds)
+        self._frames += 1
+        slot = self._frames % self._slots
+        for samples in self._samples.values():
+            samples[slot] = 0
+
+    def samples(self, stage: str) -> NDArray[np.float64]:
+        """Return durations of stage in milliseconds from the oldest frame.
+
+        :param stage: stage name
+        :return: durations of kept finished frames
+        """
+        count = min(self._frames, self._capacity)
+        samples = self._samples.get(stage)
+        if samples is None:
+            return np.zeros(count)
+        oldest = (self._frames - count) % self._slots
+        return np.roll(samples, -oldest)[:count] * 1000
+
+    def percentiles(
+        self,
+        stage: str,
+        quantiles: Sequence[int] = (50, 95, 99),
+    ) -> Percentiles:
+        """Return rolling percentiles of stage duration.
+
+        :param stage: stage name
+        :param quantiles: percents, defaults to (50, 95, 99)
+        :return: duration in milliseconds by names like 'p95'
+        """
+        samples = self.samples(stage)
+        if not samples.size:
+            return {f"p{quantile}": 0.0 for quantile in quantiles}
+        values = np.percentile(samples, quantiles)
+        return {
+            f"p{quantile}": float(value) for quantile, value in zip(quantiles, values)
+        }
+
+    def summary(self) -> Dict[str, Percentiles]:
+        """Return percentiles of every stage and the whole frame."""
+        return {stage: self.percentiles(stage) for stage in self._samples}
+
+    def clear(self) -> None:
+        """Drop all recorded frames."""
+        self._samples.clear()
+        self._frames = 0
@@ -0,0 +1,247 @@
+"""Recording and replay of fights.
+
+World is deterministic for the same seed, tick rate and player input, so a
+fight is stored as keys, which player held at every simulation step.
+Record a session, check that it still replays the same way and use it as
+a fixed workload::
+
+    python poom.py --record session.json
+    python -m poom.replay session.json
+    python -m poom.benchmark --replay session.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Keep stdout clean for JSON
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame as pg  # noqa: E402
+
+from poom.player import (  # noqa: E402
+    CONTROL_KEYS,
+    KeySource,
+    KeyState,
+    PressedKeys,
+)
+from poom.settings import ROOT  # noqa: E402
+from poom.world import World  # noqa: E402
+
+Keys = Tuple[int, ...]
+WorldState = Dict[str, Any]
+
+
+@dataclass
+class Recording:
+    """Input of one level run."""
+
+    level: str
+    seed: int
+    tick_rate: int
+    # Run-length encoded steps: number of steps and keys held during them
+    keys: List[Tuple[int, Keys]] = field(default_factory=list)
+    # State of world after the last step, see world_state
+    final: WorldState = field(default_factory=dict)
+    # AI settings, which change the fight, see World
+    flow_field: bool = True
+    decisions_per_step: int = 2
+
+    @property
+    def steps(self) -> int:
+        return sum(count for count, _ in self.keys)
+
+    def append(self, keys: Keys) -> None:
+        """Add step.
+
+        :param keys: keys held during step
+        """
+        if self.keys and self.keys[-1][1] == keys:
+            count, _ = self.keys[-1]
+            self.keys[-1] = (count + 1, keys)
+        else:
+            self.keys.append((1, keys))
+
+    def frames(self) -> Iterator[Keys]:
+        """Iterate over keys held during every step."""
+        for count, keys in self.keys:
+            for _ in range(count):
+                yield keys
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Recording":
+        return cls(
+            level=data["level"],
+            seed=data["seed"],
+            tick_rate=data["tick_rate"],
+            keys=[(count, tuple(keys)) for count, keys in data["keys"]],
+            final=data.get("final", {}),
+            flow_field=data.get("flow_field", True),
+            decisions_per_step=data.get("decisions_per_step", 2),
+        )
+
+
+def save(recordings: List[Recording], path: Union[str, Path]) -> None:
+    """Write recordings into JSON file.
+
+    :param recordings: recorded level runs
+    :param path: output file
+    """
+    with open(path, "w") as fp:
+        json.dump({"recordings": [asdict(rec) for rec in recordings]}, fp)
+
+
+def load(path: Union[str, Path]) -> List[Recording]:
+    """Read recordings written by :func:`save`.
+
+    :param path: recordings file
+    :return: recorded level runs
+    """
+    with open(path) as fp:
+        data = json.load(fp)
+    return [Recording.from_dict(rec) for rec in data["recordings"]]
+
+
+class RecordingKeys:
+    """Key source, which records keys of other source.
+
+    Player reads keys once per update, so every call is one step.
+    """
+
+    def __init__(
+        self,
+        recording: Recording,
+        source: KeySource = pg.key.get_pressed,
+    ) -> None:
+        """Initialize key source.
+
+        :param recording: recording to append steps to
+        :param source: recorded key source, defaults to keyboard
+        """
+        self._recording = recording
+        self._source = source
+
+    def __call__(self) -> KeyState:
+        state = self._source()
+        self._recording.append(tuple(key for key in CONTROL_KEYS if state[key]))
+        return state
+
+
+class ReplayKeys:
+    """Key source, which presses recorded keys step by step."""
+
+    def __init__(self, recording: Recording) -> None:
+        self._frames = recording.frames()
+        self._keys = PressedKeys()
+
+    def __call__(self) -> KeyState:
+        # Nothing is pressed after the end of recording
+        self._keys.set(next(self._frames, ()))
+        return self._keys
+
+
+def world_state(world: World) -> WorldState:
+    """Return state, which the same replay must reproduce.
+
+    Values are rounded, so replays with another render backend match too.
+
+    :param world: simulated world
+    :return: JSON compatible state of player and enemies
+    """
+    player = world.player
+    return {
+        "player": [
+            round(player.position.x, 4),
+            round(player.position.y, 4),
+            round(player.angle, 4),
+            player.get_health(),
+        ],
+        "enemies": [
+            [
+                round(enemy.position.x, 4),
+                round(enemy.position.y, 4),
+                enemy.get_health(),
+            ]
+            for enemy in world.enemies
+        ],
+    }
+
+
+def create_world(recording: Recording) -> World:
+    """Create world, which is driven by recorded input.
+
+    Step it :attr:`Recording.steps` times by ``1 / tick_rate``.
+
+    :param recording: recorded level run
+    :return: world before the first step
+    """
+    return World.from_dir(
+        ROOT / "assets" / "levels" / recording.level,
+        ReplayKeys(recording),
+        recording.seed,
+        flow_field=recording.flow_field,
+        decisions_per_step=recording.decisions_per_step,
+    )
+
+
+def replay_world(
+    recording: Recording,
+    on_step: Optional[Callable[[World], None]] = None,
+) -> World:
+    """Simulate recorded level run.
+
+    :param recording: recorded level run
+    :param on_step: called after every step, defaults to None
+    :return: world after the last step
+    """
+    world = create_world(recording)
+    dt = 1 / recording.tick_rate
+    for _ in range(recording.steps):
+        world.step(dt)
+        if on_step is not None:
+            on_step(world)
+    return world
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m poom.replay",
+        description="Replay recorded fights without display and check them.",
+    )
+    parser.add_argument("recordings", help="file written by 'poom.py --record'")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    # Importing headless switches SDL to dummy video driver, game mustn't
+    # get it through this module
+    from poom import headless  # noqa: WPS433
+
+    args = _parse_args(argv[1:])
+    headless.init()
+    results = []
+    for recording in load(args.recordings):
+        start = time.perf_counter()
+        world = replay_world(recording)
+        elapsed = time.perf_counter() - start
+        speed = recording.steps / elapsed if elapsed else 0
+        results.append(
+            {
+                "level": recording.level,
+                "steps": recording.steps,
+                "matches": world_state(world) == recording.final,
+                "wall_time": round(elapsed, 4),
+                "steps_per_second": round(speed, 1),
+            },
+        )
+    print(json.dumps({"replays": results}, indent=2))  # noqa: WPS421 JSON is the output
+    pg.display.quit()
+    return 0 if all(result["matches"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -3,8 +3,7 @@ from functools import cache, wraps
 from pathlib import Path
 from typing import Callable, ParamSpec, TypeVar
 
-import pygame as pg
-
+from poom import audio, trace
 from poom.animated import Animation, Clonable
 from poom.settings import ROOT
 
@@ -33,7 +32,9 @@ class LazyAnimationLoader:
     @clone
     @cache
     def get(self, name: str, speed: float, scale: float = 1) -> Animation:
-        return Animation.from_dir(self._path / name, speed, scale)
+        # Only cache misses get here, so loads in the middle of game are seen
+        with trace.span("load_animation", "assets", {"name": name}):
+            return Animation.from_dir(self._path / name, speed, scale)
 
 
 class LazySoundLoader:
@@ -41,8 +42,9 @@ class LazySoundLoader:
         self._path = path
 
     @cache
-    def get(self, name: str) -> pg.mixer.Sound:
-        return pg.mixer.Sound(self._path / name)
+    def get(self, name: str) -> audio.Sound:
+        with trace.span("load_sound", "assets", {"name": name}):
+            return audio.sound(self._path / name)
 
 
 class Resources:
@@ -29,6 +29,19 @@ class Settings(metaclass=Singleton):
     ratio: str
     volume: int
     fps_tick: int
+    render_threads: int = 0
+    column_cache_mb: int = 16
+    dirty_rects: bool = True
+    render_scale: float = 1.0
+    distance_shading: bool = False
+    fog_distance: float = 16.0
+    profiler: bool = False
+    tick_rate: int = 60
+    max_catch_up_steps: int = 5
+    flow_field: bool = True
+    path_cache_size: int = 256
+    ai_decisions_per_step: int = 2
+    ai_budget_ms: float = 1.0
 
     @staticmethod
     def load(root: Path):
@@ -40,6 +53,19 @@ class Settings(metaclass=Singleton):
             data["ratio"],
             data["volume"],
             data["fps_tick"],
+            data.get("render_threads", 0),
+            data.get("column_cache_mb", 16),
+            data.get("dirty_rects", True),
+            data.get("render_scale", 1.0),
+            data.get("distance_shading", False),
+            data.get("fog_distance", 16.0),
+            data.get("profiler", False),
+            data.get("tick_rate", 60),
+            data.get("max_catch_up_steps", 5),
+            data.get("flow_field", True),
+            data.get("path_cache_size", 256),
+            data.get("ai_decisions_per_step", 2),
+            data.get("ai_budget_ms", 1.0),
         )
 
     def update(self, root: Path):
@@ -69,6 +95,8 @@ class SceneContext:
         self._screen = screen
         self._game = game
         self._scene: Optional[AbstractScene] = None
+        # Progress between two last simulation steps, see FixedTimestep.alpha
+        self.interpolation = 1.0
 
     @property
     def screen(self) -> pg.Surface:
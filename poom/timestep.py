@@ -0,0 +1,57 @@
+"""Fixed timestep of game simulation."""
+
+
+class FixedTimestep:
+    """Accumulator, which splits variable frame time into fixed steps.
+
+    Simulation advanced only by :attr:`step` behaves the same at any frame
+    rate. Time left in accumulator is less than one step, its fraction is
+    :attr:`alpha`, which renderers use for interpolation between the last
+    two simulated states. Frames, which need more than :attr:`max_steps`,
+    drop extra time, so slow machines slow down the game instead of spending
+    even more time to catch up.
+    """
+
+    def __init__(self, rate: int = 60, max_steps: int = 5) -> None:
+        """Initialize timestep.
+
+        :param rate: simulation steps per second, defaults to 60
+        :param max_steps: maximum number of steps per frame, defaults to 5
+        :raises ValueError: if rate or max steps isn't positive
+        """
+        if rate <= 0:
+            raise ValueError("Tick rate must be positive.")
+        if max_steps <= 0:
+            raise ValueError("Max catch-up steps must be positive.")
+        self._step = 1 / rate
+        self._max_steps = max_steps
+        self._accumulator = 0.0
+
+    @property
+    def step(self) -> float:
+        """Return duration of one simulation step in seconds."""
+        return self._step
+
+    @property
+    def max_steps(self) -> int:
+        return self._max_steps
+
+    @property
+    def alpha(self) -> float:
+        """Return progress from the last step to the next one in [0, 1)."""
+        return self._accumulator / self._step
+
+    def advance(self, dt: float) -> int:
+        """Add frame time and take whole steps out of it.
+
+        :param dt: frame time in seconds
+        :return: number of steps to simulate
+        """
+        self._accumulator += dt
+        steps = int(self._accumulator // self._step)
+        self._accumulator %= self._step
+        return min(steps, self._max_steps)
+
+    def reset(self) -> None:
+        """Drop accumulated time, e.g. after loading."""
+        self._accumulator = 0.0
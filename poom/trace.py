@@ -0,0 +1,221 @@
+"""Tracing of frame stages in Chrome trace event format.
+
+Tracing is off until :func:`start` is called. While it is off, :func:`span`
+returns a shared no-op context manager, so instrumented code costs about a
+function call. Saved traces can be opened in ``chrome://tracing`` or
+https://ui.perfetto.dev.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from types import TracebackType
+from typing import Any, ContextManager, Dict, Final, List, Optional, Type, Union
+
+TraceEvent = Dict[str, Any]
+
+_NO_SPAN: Final[ContextManager[None]] = nullcontext()
+
+
+class Tracer:
+    """Recorder of time spans.
+
+    Spans are stored as complete events ('X') with microsecond timestamps
+    relative to tracer creation. Events after :attr:`max_events` are
+    dropped and counted in :attr:`dropped`, so a forgotten tracer can't eat
+    all memory.
+    """
+
+    def __init__(self, max_events: int = 1_000_000) -> None:
+        """Initialize tracer.
+
+        :param max_events: maximum number of kept events, defaults to 1000000
+        """
+        self._max_events = max_events
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._events: List[TraceEvent] = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": self._pid,
+                "args": {"name": "poom"},
+            },
+        ]
+        self.dropped = 0
+
+    @property
+    def events(self) -> List[TraceEvent]:
+        return self._events
+
+    def span(
+        self,
+        name: str,
+        category: str = "game",
+        args: Optional[Dict[str, Any]] = None,
+    ) -> "Span":
+        """Return context manager, which records its duration.
+
+        :param name: span name
+        :param category: span category, defaults to 'game'
+        :param args: values shown with span in trace viewer, defaults to None
+        :return: span
+        """
+        return Span(self, name, category, args)
+
+    def complete(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        category: str = "game",
+        args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Add span, which was timed by caller.
+
+        :param name: span name
+        :param start: :func:`time.perf_counter` value at span start
+        :param end: :func:`time.perf_counter` value at span end
+        :param category: span category, defaults to 'game'
+        :param args: values shown with span in trace viewer, defaults to None
+        """
+        event = self._event(name, "X", start, category, args)
+        if event is not None:
+            event["dur"] = (end - start) * 1e6
+
+    def instant(
+        self,
+        name: str,
+        category: str = "game",
+        args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Add event without duration, e.g. level change.
+
+        :param name: event name
+        :param category: event category, defaults to 'game'
+        :param args: values shown with event in trace viewer, defaults to None
+        """
+        event = self._event(name, "i", time.perf_counter(), category, args)
+        if event is not None:
+            event["s"] = "t"
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write trace in JSON object format.
+
+        :param path: output file
+        """
+        with open(path, "w") as fp:
+            json.dump(
+                {
+                    "traceEvents": self._events,
+                    "displayTimeUnit": "ms",
+                    "otherData": {"dropped_events": self.dropped},
+                },
+                fp,
+            )
+
+    def _event(
+        self,
+        name: str,
+        phase: str,
+        start: float,
+        category: str,
+        args: Optional[Dict[str, Any]],
+    ) -> Optional[TraceEvent]:
+        if len(self._events) >= self._max_events:
+            self.dropped += 1
+            return None
+        event: TraceEvent = {
+            "name": name,
+            "cat": category,
+            "ph": phase,
+            "ts": (start - self._origin) * 1e6,
+            "pid": self._pid,
+            "tid": threading.get_native_id(),
+        }
+        if args:
+            event["args"] = args
+        self._events.append(event)
+        return event
+
+
+class Span:
+    """Context manager, which adds complete event on exit."""
+
+    def __init__(
+        self,
+        tracer: Tracer,
+        name: str,
+        category: str,
+        args: Optional[Dict[str, Any]],
+    ) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._args = args
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self._tracer.complete(
+            self._name,
+            self._start,
+            time.perf_counter(),
+            self._category,
+            self._args,
+        )
+
+
+_tracer: Optional[Tracer] = None
+
+
+def start(tracer: Optional[Tracer] = None) -> Tracer:
+    """Turn tracing on.
+
+    :param tracer: tracer to record into, defaults to a new one
+    :return: active tracer
+    """
+    global _tracer  # noqa: WPS420 tracing is process-wide
+    _tracer = tracer or Tracer()
+    return _tracer
+
+
+def stop() -> Optional[Tracer]:
+    """Turn tracing off.
+
+    :return: tracer, which was active
+    """
+    global _tracer  # noqa: WPS420 tracing is process-wide
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def current() -> Optional[Tracer]:
+    """Return active tracer or None, if tracing is off."""
+    return _tracer
+
+
+def span(
+    name: str,
+    category: str = "game",
+    args: Optional[Dict[str, Any]] = None,
+) -> ContextManager[None]:
+    """Record span into active tracer, do nothing if tracing is off.
+
+    :param name: span name
+    :param category: span category, defaults to 'game'
+    :param args: values shown with span in trace viewer, defaults to None
+    :return: context manager
+    """
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.span(name, category, args)
@@ -29,3 +29,39 @@ class Viewer:
     def view_vector(self) -> Vector2:
         """Get normalized vector of player view direction."""
         return Vector2(cos(self._angle), sin(self._angle))
+
+
+class InterpolatedViewer(Viewer):
+    """Pose of other viewer between its two last simulated steps.
+
+    Call :meth:`save_pose` before every simulation step and
+    :meth:`interpolate` before rendering, so camera moves smoothly, when
+    frames are rendered more often than simulation steps.
+    """
+
+    def __init__(self, source: Viewer) -> None:
+        """Initialize viewer at the current pose of source.
+
+        :param source: simulated viewer, e.g. player
+        """
+        super().__init__(Vector2(source.position), source.angle, source.fov)
+        self._source = source
+        self._previous_position = Vector2(source.position)
+        self._previous_angle = source.angle
+
+    def save_pose(self) -> None:
+        """Remember pose of source before it's moved by simulation step."""
+        # Source may move its position vector in place
+        self._previous_position = Vector2(self._source.position)
+        self._previous_angle = self._source.angle
+
+    def interpolate(self, alpha: float) -> None:
+        """Move between previous and current pose of source.
+
+        :param alpha: 0 is previous pose, 1 is current pose
+        """
+        self._position = self._previous_position.lerp(self._source.position, alpha)
+        self._angle = self._previous_angle + alpha * (
+            self._source.angle - self._previous_angle
+        )
+        self._fov = self._source.fov
@@ -0,0 +1,203 @@
+"""Level simulation without rendering."""
+from math import radians
+from pathlib import Path
+from random import Random
+from typing import Final, List, Optional
+
+import pygame as pg
+
+from poom import trace
+from poom.ai.enemy import Enemy
+from poom.ai.navigation import FlowField, NavigationGrid
+from poom.ai.scheduler import DecisionScheduler
+from poom.gun.player_gun import PlayerGun, create_player_gun
+from poom.level import Level
+from poom.player import KeySource, Player
+from poom.settings import ROOT
+from poom.shared import Settings
+
+settings = Settings.load(ROOT)
+
+
+class World:
+    """Player and enemies of one level.
+
+    World knows nothing about display, so the same simulation is stepped by
+    :class:`poom.game.LevelScene` and by :mod:`poom.headless`.
+
+    All randomness of the world comes from one generator, so the same seed
+    and the same player input give the same fight, see :mod:`poom.replay`.
+    """
+
+    # Seeds are drawn from [0, max_seed)
+    max_seed: Final[int] = 2 ** 32
+
+    def __init__(
+        self,
+        level: Level,
+        keys: KeySource = pg.key.get_pressed,
+        seed: Optional[int] = None,
+        decision_budget: Optional[float] = None,
+        flow_field: Optional[bool] = None,
+        decisions_per_step: Optional[int] = None,
+    ) -> None:
+        """Initialize world.
+
+        AI options change the fight, so replays pass recorded ones instead
+        of current settings.
+
+        :param level: loaded level
+        :param keys: player input, defaults to keyboard
+        :param seed: seed of random generator, defaults to a random one
+        :param decision_budget: seconds for enemy decisions per step, world
+            isn't reproducible with it, defaults to unlimited
+        :param flow_field: chase the player by shared flow field, defaults
+            to settings
+        :param decisions_per_step: maximum enemy decisions per step, zero for
+            unlimited, defaults to settings
+        """
+        if flow_field is None:
+            flow_field = settings.flow_field
+        if decisions_per_step is None:
+            decisions_per_step = settings.ai_decisions_per_step
+        if seed is None:
+            seed = Random().randrange(self.max_seed)
+        self._level = level
+        self._seed = seed
+        self._rng = Random(seed)
+        self._time = 0.0
+        self._player_gun = create_player_gun(
+            level.map_,
+            2,
+            25,
+            ROOT / "assets" / "sprites" / "gun",
+            2,
+        )
+        self._enemies: List[Enemy] = []
+        self._player = Player(
+            map_=level.map_,
+            gun=self._player_gun,
+            position=pg.Vector2(1.1, 1.1),
+            angle=radians(45),
+            fov=radians(90),
+            enemies=self._enemies,
+            keys=keys,
+        )
+
+        self._navigation = NavigationGrid(level.map_, settings.path_cache_size)
+        # Enemies chase the player by one field instead of a path each
+        self._flow_field: Optional[FlowField] = None
+        if flow_field:
+            self._flow_field = FlowField(self._navigation)
+        self._scheduler = DecisionScheduler(
+            self._player,
+            level.map_,
+            decisions_per_step,
+            decision_budget,
+        )
+        enemy_texture = pg.image.load(
+            ROOT / "assets" / "sprites" / "front_attack" / "0.png"
+        )
+        for position in level.enemies_positions:
+            enemy = Enemy(
+                texture=enemy_texture,
+                map_=level.map_,
+                entities=self._enemies,
+                ai_enemy=self._player,
+                position=position,
+                angle=radians(45),
+                fov=radians(90),
+                rng=self._rng,
+                navigation=self._navigation,
+                flow_field=self._flow_field,
+                scheduler=self._scheduler,
+            )
+            self._enemies.append(enemy)
+
+    @classmethod
+    def from_dir(
+        cls,
+        path: Path,
+        keys: KeySource = pg.key.get_pressed,
+        seed: Optional[int] = None,
+        flow_field: Optional[bool] = None,
+        decisions_per_step: Optional[int] = None,
+    ) -> "World":
+        """Load level and create world of it.
+
+        :param path: level directory
+        :param keys: player input, defaults to keyboard
+        :param seed: seed of random generator, defaults to a random one
+        :param flow_field: chase the player by shared flow field, defaults
+            to settings
+        :param decisions_per_step: maximum enemy decisions per step, defaults
+            to settings
+        :return: world
+        """
+        return cls(
+            Level.from_dir(path),
+            keys,
+            seed,
+            flow_field=flow_field,
+            decisions_per_step=decisions_per_step,
+        )
+
+    @property
+    def level(self) -> Level:
+        return self._level
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def navigation(self) -> NavigationGrid:
+        return self._navigation
+
+    @property
+    def flow_field(self) -> Optional[FlowField]:
+        return self._flow_field
+
+    @property
+    def scheduler(self) -> DecisionScheduler:
+        return self._scheduler
+
+    @property
+    def player(self) -> Player:
+        return self._player
+
+    @property
+    def player_gun(self) -> PlayerGun:
+        return self._player_gun
+
+    @property
+    def enemies(self) -> List[Enemy]:
+        return self._enemies
+
+    @property
+    def time(self) -> float:
+        """Return simulated time in seconds."""
+        return self._time
+
+    @property
+    def won(self) -> bool:
+        """Return true, if all enemies are dead."""
+        return not self._enemies
+
+    @property
+    def lost(self) -> bool:
+        """Return true, if player is dead."""
+        return self._player.get_health() <= 0
+
+    def step(self, dt: float) -> None:
+        """Advance simulation.
+
+        :param dt: delta time
+        """
+        with trace.span("player", "update"):
+            self._player.update(dt)
+        for index, npc in enumerate(self._enemies):
+            with trace.span("enemy", "update", {"index": index}):
+                npc.update(dt)
+        self._scheduler.run()
+        self._time += dt
@@ -1,3 +1,6 @@
+import os
+import sys
+
 import numpy
 from setuptools import setup
 from setuptools.extension import Extension
@@ -10,13 +13,35 @@ def read(filename: str) -> str:
         return fp.read()
 
 
+# OpenMP is opt-in: 'POOM_OPENMP=1 python setup.py build_ext --inplace'
+if os.environ.get("POOM_OPENMP", "0") in {"", "0"}:
+    openmp_compile_args, openmp_link_args = [], []
+elif sys.platform == "win32":
+    openmp_compile_args, openmp_link_args = ["/openmp"], []
+else:
+    openmp_compile_args = openmp_link_args = ["-fopenmp"]
+
 extensions = [
     Extension(
         name="poom.pooma.ray_march",
         sources=["poom/pooma/ray_march.pyx"],
         define_macros=[("NPY_NO_DEPRECATED_API", "NPY_1_7_API_VERSION")],
+        extra_compile_args=openmp_compile_args,
+        extra_link_args=openmp_link_args,
+    ),
+    Extension(
+        name="poom.pooma.floor",
+        sources=["poom/pooma/floor.pyx"],
+        define_macros=[("NPY_NO_DEPRECATED_API", "NPY_1_7_API_VERSION")],
+        extra_compile_args=openmp_compile_args,
+        extra_link_args=openmp_link_args,
     ),
     Extension(name="poom.pooma.math", sources=["poom/pooma/math.pyx"]),
+    Extension(
+        name="poom.pooma.path",
+        sources=["poom/pooma/path.pyx"],
+        define_macros=[("NPY_NO_DEPRECATED_API", "NPY_1_7_API_VERSION")],
+    ),
 ]
 
 setup(
@@ -0,0 +1,47 @@
+import os
+
+import numpy as np
+import pygame as pg
+import pytest
+
+from poom.benchmark import camera_path, run_level
+from poom.level import Map
+from poom.settings import ROOT
+from poom.shared import Settings
+
+
+@pytest.fixture
+def map_() -> Map:
+    map_ = np.ones((4, 6), dtype=np.int8)
+    map_[1, 1:-1] = 0
+    map_[2, 2] = 0
+    return map_
+
+
+def test_camera_path_is_deterministic(map_: Map) -> None:
+    first = list(camera_path(map_, 50, seed=3))
+    second = list(camera_path(map_, 50, seed=3))
+    assert first == second
+    assert len(first) == 50
+
+
+def test_camera_path_stays_in_free_cells(map_: Map) -> None:
+    for position, _ in camera_path(map_, 200, frames_per_cell=4):
+        assert map_[int(position.y), int(position.x)] == 0
+
+
+def test_run_level_reports_every_renderer() -> None:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pg.display.init()
+    pg.display.set_mode((1, 1))
+
+    result = run_level("1", (64, 48), 3, 1, Settings.load(ROOT))
+
+    assert result["fps"] > 0
+    assert set(result["frame_ms"]) == {"p50", "p95", "p99"}
+    assert set(result["renderers"]) == {
+        "BackgroundRenderer",
+        "WallRenderer",
+        "EntityRenderer",
+        "CrosshairRenderer",
+    }
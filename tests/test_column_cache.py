@@ -0,0 +1,60 @@
+import pygame as pg
+import pytest
+
+from poom.pooma.column_cache import ColumnCache
+
+
+@pytest.fixture
+def textures() -> list:
+    textures = [pg.Surface((4, 8), depth=32) for _ in range(3)]
+    for texture, color in zip(textures, ("red", "green", "blue")):
+        texture.fill(color)
+    return textures
+
+
+def test_similar_heights_share_texture(textures: list) -> None:
+    cache = ColumnCache(textures, max_bytes=1024, height_step=4)
+
+    first = cache.get(0, 15)
+    second = cache.get(0, 17)
+
+    assert first is second
+    assert first.get_size() == (4, 16)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_scaled_texture_is_not_wider_than_high(textures: list) -> None:
+    cache = ColumnCache(textures, max_bytes=1024, height_step=1)
+    assert cache.get(0, 2).get_size() == (2, 2)
+
+
+def test_least_recently_used_texture_is_evicted(textures: list) -> None:
+    # Room for two textures 4x16 px
+    cache = ColumnCache(textures, max_bytes=2 * 4 * 16 * 4, height_step=1)
+    first = cache.get(0, 16)
+    cache.get(1, 16)
+    cache.get(0, 16)
+    cache.get(2, 16)
+
+    assert cache.used_bytes == 2 * 4 * 16 * 4
+    assert cache.get(0, 16) is first
+    cache.get(1, 16)
+    assert cache.misses == 4
+
+
+def test_textures_are_converted_to_target(textures: list) -> None:
+    cache = ColumnCache(textures, max_bytes=1024, height_step=1)
+    cache.get(0, 16)
+
+    cache.target = pg.Surface((1, 1), depth=24)
+    scaled = cache.get(0, 16)
+
+    assert scaled.get_bitsize() == 24
+    assert scaled.get_at((0, 0)) == pg.Color("red")
+    assert cache.misses == 1
+
+
+def test_too_high_texture_is_not_cached(textures: list) -> None:
+    cache = ColumnCache(textures, max_bytes=1024)
+    assert cache.get(0, ColumnCache.max_height + 1) is None
+    assert cache.misses == 0
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from numpy.typing import NDArray
+
+from poom.pooma import floor_numpy
+from poom.pooma.floor_tables import FloorTables
+
+floor = pytest.importorskip("poom.pooma.floor")
+
+WIDTH, HEIGHT = 320, 180
+FOV = np.pi / 3
+
+
+@pytest.fixture
+def floor_texels() -> NDArray[np.uint32]:
+    return np.arange(16 * 16, dtype=np.uint32).reshape(16, 16)
+
+
+@pytest.fixture
+def ceiling_texels() -> NDArray[np.uint32]:
+    return np.arange(8 * 8, dtype=np.uint32).reshape(8, 8) + 1000
+
+
+@pytest.fixture
+def tables() -> FloorTables:
+    return FloorTables.build(WIDTH, HEIGHT, FOV)
+
+
+@pytest.mark.parametrize("angle", [0, 0.3, np.pi / 2, 2, np.pi, 5.9])
+def test_draw_floor_matches_numpy(
+    tables: FloorTables,
+    floor_texels: NDArray[np.uint32],
+    ceiling_texels: NDArray[np.uint32],
+    angle: float,
+) -> None:
+    compiled = np.zeros((WIDTH, HEIGHT), dtype=np.uint32)
+    numpy = np.zeros_like(compiled)
+
+    floor.draw_floor(compiled, tables, floor_texels, ceiling_texels, 3.3, 4.7, angle)
+    floor_numpy.draw_floor(
+        numpy,
+        tables,
+        floor_texels,
+        ceiling_texels,
+        3.3,
+        4.7,
+        angle,
+    )
+
+    # Texel choice may differ on texel edges due to float rounding
+    assert np.mean(compiled != numpy) < 0.01
+
+
+def test_draw_floor_mirrors_ceiling(
+    tables: FloorTables,
+    floor_texels: NDArray[np.uint32],
+) -> None:
+    pixels = np.zeros((WIDTH, HEIGHT), dtype=np.uint32)
+    floor.draw_floor(pixels, tables, floor_texels, floor_texels, 1.5, 1.5, 1)
+    ceiling, floor_ = pixels[:, : HEIGHT // 2], pixels[:, HEIGHT // 2 :]
+    np.testing.assert_array_equal(ceiling, floor_[:, ::-1])
+
+
+def test_draw_floor_keeps_ceiling_without_texture(
+    tables: FloorTables,
+    floor_texels: NDArray[np.uint32],
+) -> None:
+    pixels = np.zeros((WIDTH, HEIGHT), dtype=np.uint32)
+    floor.draw_floor(pixels, tables, floor_texels + 1, None, 1.5, 1.5, 1)
+    assert not pixels[:, : HEIGHT // 2].any()
+    assert pixels[:, HEIGHT // 2 :].all()
+
+
+@pytest.mark.parametrize("module", [floor, floor_numpy])
+def test_draw_floor_checks_tables_size(
+    floor_texels: NDArray[np.uint32],
+    module,
+) -> None:
+    pixels = np.zeros((WIDTH, HEIGHT), dtype=np.uint32)
+    tables = FloorTables.build(WIDTH, HEIGHT + 2, FOV)
+    with pytest.raises(ValueError):
+        module.draw_floor(pixels, tables, floor_texels, None, 1.5, 1.5, 0)
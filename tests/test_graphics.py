@@ -0,0 +1,275 @@
+import os
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+import numpy as np
+import pygame as pg
+import pytest
+
+from poom.graphics import (
+    AbstractRenderer,
+    BackgroundRenderer,
+    EntityRenderer,
+    Pipeline,
+    ProfilerRenderer,
+    WallRenderer,
+)
+from poom.level import Map
+from poom.profiler import Profiler
+from poom.viewer import Viewer
+
+
+@pytest.fixture(autouse=True)
+def display() -> pg.Surface:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pg.display.init()
+    return pg.display.set_mode((64, 48))
+
+
+@pytest.fixture
+def map_() -> Map:
+    map_ = np.ones((3, 8), dtype=np.int8)
+    map_[1, 1:-1] = 0
+    return map_
+
+
+@pytest.fixture
+def viewer() -> Viewer:
+    return Viewer(pg.Vector2(1.5, 1.5), 0, 1)
+
+
+def render(renderer: WallRenderer, viewer: Viewer) -> np.ndarray:
+    surface = pg.Surface((64, 48), depth=32)
+    stencil = np.full(surface.get_width(), np.inf, dtype=np.float32)
+    renderer(surface, stencil, viewer)
+    return stencil
+
+
+def test_wall_renderer_reuses_frame(map_: Map, viewer: Viewer) -> None:
+    renderer = WallRenderer(map_)
+    first = render(renderer, viewer)
+
+    map_[1, 4] = 1
+    assert render(renderer, viewer) == pytest.approx(first)
+
+    renderer.invalidate()
+    assert render(renderer, viewer).max() == pytest.approx(2.5, rel=0.1)
+
+
+def test_wall_renderer_follows_viewer(map_: Map, viewer: Viewer) -> None:
+    renderer = WallRenderer(map_)
+    first = render(renderer, viewer)
+
+    viewer.position.x += 1
+    # Middle column looks straight at the end of corridor
+    assert render(renderer, viewer)[32] == pytest.approx(first[32] - 1)
+
+
+@pytest.mark.parametrize("depth", [24, 32])
+def test_wall_renderer_blits_walls_only(
+    map_: Map,
+    viewer: Viewer,
+    depth: int,
+) -> None:
+    renderer = WallRenderer(map_)
+    stencil = np.empty(64, dtype=np.float32)
+    surface = pg.Surface((64, 48), depth=depth)
+    renderer(surface, stencil, viewer)
+    walls = pg.surfarray.array3d(surface)
+
+    for color in ["red", "magenta"] * WallRenderer.rle_after:
+        surface.fill(color)
+        renderer(surface, stencil, viewer)
+
+        assert renderer.changed_rects() == []
+        pixels = pg.surfarray.array3d(surface)
+        covered = (pixels != pg.Color(color)[:3]).any(axis=2)
+        # Blitted walls may differ from projected mask at wall edges
+        assert (covered != renderer.hits.mask(1, 48)).sum() <= 64
+        assert np.array_equal(pixels[covered], walls[covered])
+
+
+@pytest.mark.parametrize("depth", [24, 32])
+def test_entity_renderer_culls_hidden_entities(viewer: Viewer, depth: int) -> None:
+    texture = pg.Surface((8, 8), pg.SRCALPHA, 32)
+    texture.fill("red")
+    entities = [
+        SimpleNamespace(position=pg.Vector2(x, y), texture=texture)
+        # In front, behind the viewer and behind the wall
+        for x, y in [(3.5, 1.5), (-0.5, 1.5), (4.5, 2)]
+    ]
+    renderer = EntityRenderer(entities)
+    surface = pg.Surface((64, 48), depth=depth)
+    # Wall across the corridor
+    stencil = np.full(surface.get_width(), 3, dtype=np.float32)
+    renderer(surface, stencil, viewer)
+
+    assert (renderer.drawn, renderer.culled) == (1, 2)
+    assert surface.get_at((32, 24)) == pg.Color("red")
+
+
+class StaticRenderer(AbstractRenderer):
+    """Fill surface with the same color every frame."""
+
+    def __call__(self, surface: pg.Surface, *args: Any) -> None:
+        surface.fill("blue")
+
+    def covers(self, surface: pg.Surface) -> bool:
+        return True
+
+    def changed_rects(self) -> Optional[List[pg.Rect]]:
+        return []
+
+
+class OverlayRenderer(AbstractRenderer):
+    def __init__(self) -> None:
+        self.rect = pg.Rect(0, 0, 4, 4)
+
+    def __call__(self, surface: pg.Surface, *args: Any) -> None:
+        surface.fill("red", self.rect)
+
+    def changed_rects(self) -> Optional[List[pg.Rect]]:
+        return [self.rect]
+
+
+def test_pipeline_presents_changed_rects(
+    display: pg.Surface,
+    viewer: Viewer,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    presented = []
+    monkeypatch.setattr(pg.display, "flip", lambda: presented.append(None))
+    monkeypatch.setattr(pg.display, "update", presented.append)
+    overlay = OverlayRenderer()
+    pipeline = Pipeline(viewer, [StaticRenderer(), overlay], dirty_rects=True)
+
+    pipeline.render(display)
+    overlay.rect = pg.Rect(10, 10, 4, 4)
+    pipeline.render(display)
+
+    assert presented == [None, [pg.Rect(10, 10, 4, 4), pg.Rect(0, 0, 4, 4)]]
+    assert display.get_at((0, 0)) == pg.Color("blue")
+
+
+def test_pipeline_clears_uncovered_surface(
+    display: pg.Surface,
+    viewer: Viewer,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    presented = []
+    monkeypatch.setattr(pg.display, "flip", lambda: presented.append(None))
+    display.fill("green")
+    pipeline = Pipeline(viewer, [OverlayRenderer()])
+
+    pipeline.render(display)
+    pipeline.render(display)
+
+    assert presented == [None, None]
+    assert display.get_at((10, 10)) == pg.Color("black")
+
+
+class SizeRenderer(AbstractRenderer):
+    def __init__(self, native_resolution: bool, color: str) -> None:
+        self.native_resolution = native_resolution
+        self.color = color
+        self.sizes: List[tuple] = []
+
+    def __call__(self, surface: pg.Surface, stencil: np.ndarray, *args: Any) -> None:
+        surface.fill(self.color, (0, 0, 32, 24))
+        self.sizes.append((surface.get_size(), stencil.size))
+
+
+def test_pipeline_renders_world_at_lower_resolution(
+    display: pg.Surface,
+    viewer: Viewer,
+) -> None:
+    world, hud = SizeRenderer(False, "red"), SizeRenderer(True, "blue")
+    pipeline = Pipeline(viewer, [world, hud], render_scale=0.5)
+
+    display.fill("black")
+    pipeline.render(display)
+
+    assert world.sizes == [((32, 24), 32)]
+    assert hud.sizes[0][0] == (64, 48)
+    # Canvas is upscaled to the whole display under native overlay
+    assert display.get_at((63, 47)) == pg.Color("red")
+    assert display.get_at((0, 0)) == pg.Color("blue")
+    assert display.get_at((40, 0)) == pg.Color("red")
+
+
+def test_pipeline_records_profile(display: pg.Surface, viewer: Viewer) -> None:
+    profiler = Profiler(capacity=8)
+    renderers = [
+        SizeRenderer(False, "red"),
+        SizeRenderer(False, "green"),
+        SizeRenderer(True, "blue"),
+    ]
+    pipeline = Pipeline(viewer, renderers, render_scale=0.5, profiler=profiler)
+
+    pipeline.render(display)
+    pipeline.render(display)
+
+    assert profiler.frames == 2
+    assert profiler.stages == [
+        "SizeRenderer",
+        "SizeRenderer#2",
+        "upscale",
+        "SizeRenderer#3",
+        "present",
+    ]
+    frame = profiler.samples(Profiler.frame_stage)
+    stages = sum(profiler.samples(stage) for stage in profiler.stages)
+    assert (frame >= stages).all()
+
+
+def test_profiler_renderer_draws_graph(display: pg.Surface, viewer: Viewer) -> None:
+    pg.font.init()
+    profiler = Profiler(capacity=16)
+    profiler.record("walls", 0.01)
+    profiler.end_frame(0.01)
+    renderer = ProfilerRenderer(profiler, pg.Vector2(0, 0), height=32, scale=1)
+
+    display.fill("black")
+    renderer(display, np.zeros(64, dtype=np.float32), viewer)
+
+    graph, legend = renderer.changed_rects()
+    assert graph == pg.Rect(0, 0, 16, 32)
+    # The last frame is 10 ms bar at the right edge of the graph
+    assert display.get_at((15, 31)) == pg.Color(*ProfilerRenderer.colors[0])
+    assert display.get_at((15, 31 - 10)) == pg.Color("black")
+    assert legend.left == graph.right
+
+
+@pytest.fixture
+def skybox() -> pg.Surface:
+    # Two columns of different colors, scaled to 16x24 on the screen
+    skybox = pg.Surface((2, 3), depth=32)
+    skybox.fill("red", (0, 0, 1, 3))
+    skybox.fill("blue", (1, 0, 1, 3))
+    return skybox
+
+
+def test_background_covers_surface(skybox: pg.Surface, viewer: Viewer) -> None:
+    renderer = BackgroundRenderer(skybox, 1)
+    surface = pg.Surface((64, 48), depth=32)
+    surface.fill("black")
+
+    renderer(surface, np.empty(0, dtype=np.float32), viewer)
+
+    pixels = pg.surfarray.array3d(surface)
+    assert (pixels[:, :24].sum(axis=2) > 0).all()
+    assert (pixels[:, 24:] == 40).all()
+
+
+def test_background_rotates_with_viewer(skybox: pg.Surface, viewer: Viewer) -> None:
+    renderer = BackgroundRenderer(skybox, 1)
+    surface = pg.Surface((64, 48), depth=32)
+    renderer(surface, np.empty(0, dtype=np.float32), viewer)
+    first = pg.surfarray.array2d(surface)
+
+    # Skybox is scaled by 8, so rotation by 1 degree shifts it by 8 pixels
+    rotated = Viewer(viewer.position, np.radians(1), viewer.fov)
+    renderer(surface, np.empty(0, dtype=np.float32), rotated)
+
+    assert renderer.changed_rects() is None
+    assert (pg.surfarray.array2d(surface)[:-8, :24] == first[8:, :24]).all()
@@ -0,0 +1,66 @@
+import pygame as pg
+import pytest
+
+from poom import audio, headless
+from poom.headless import hunter, idle, run_fight, summarize
+from poom.player import Player, PressedKeys
+
+
+@pytest.fixture(autouse=True, scope="module")
+def init() -> None:
+    headless.init()
+
+
+def test_pressed_keys_are_set_by_code() -> None:
+    keys = PressedKeys([pg.K_w])
+
+    assert keys()[pg.K_w]
+    keys.set([pg.K_SPACE])
+    assert keys[pg.K_SPACE]
+    assert not keys[pg.K_w]
+
+
+def test_audio_is_silent() -> None:
+    assert not audio.enabled()
+    assert isinstance(audio.channel(1), audio.NullChannel)
+    assert not audio.channel(1).get_busy()
+
+
+def test_fight_is_deterministic() -> None:
+    first = run_fight("1", hunter, max_time=5, seed=3)
+    second = run_fight("1", hunter, max_time=5, seed=3)
+
+    assert first.steps == second.steps > 0
+    assert (first.outcome, first.health) == (second.outcome, second.health)
+
+
+def test_fight_stops_at_timeout() -> None:
+    result = run_fight("1", idle, tick_rate=30, max_time=1, seed=0)
+
+    assert result.outcome == "timeout"
+    assert result.steps == 30
+    assert result.time == pytest.approx(1)
+
+
+def test_summary_counts_outcomes() -> None:
+    results = [run_fight("1", idle, max_time=0.5, seed=seed) for seed in range(2)]
+
+    summary = summarize(results)
+
+    assert summary["fights"] == 2
+    assert summary["timeout_rate"] == 1
+    assert summary["steps_per_second"] > 0
+
+
+def test_enemies_share_paths_without_flow_field() -> None:
+    result = run_fight("1", hunter, max_time=20, seed=1, flow_field=False)
+
+    assert result.path_cache_hits > result.path_cache_misses > 0
+
+
+def test_default_chase_doesnt_use_path_cache() -> None:
+    # Flow field is on by default, chasing enemies don't search paths
+    result = run_fight("1", hunter, max_time=20, seed=1)
+
+    assert result.path_cache_hits == result.path_cache_misses == 0
+    assert result.health < Player.max_health
@@ -0,0 +1,202 @@
+from collections import deque
+from typing import Optional
+
+import numpy as np
+import pytest
+
+from poom.ai.navigation import Cell, FlowField, NavigationGrid, PathCache
+from poom.level import Map
+from poom.pooma import path_numpy
+
+
+@pytest.fixture
+def map_() -> Map:
+    return np.array(
+        [
+            [1, 1, 1, 1, 1, 1],
+            [1, 0, 0, 0, 0, 1],
+            [1, 1, 1, 1, 0, 1],
+            [1, 0, 0, 0, 0, 1],
+            [1, 0, 1, 1, 1, 1],
+            [1, 1, 1, 1, 1, 1],
+        ],
+        dtype=np.int8,
+    )
+
+
+def bfs_length(map_: Map, start: Cell, goal: Cell) -> Optional[int]:
+    distance = {start: 0}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        if (x, y) == goal:
+            return distance[goal]
+        for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)):
+            cell = (x + dx, y + dy)
+            if map_[cell[1], cell[0]] == 0 and cell not in distance:
+                distance[cell] = distance[(x, y)] + 1
+                queue.append(cell)
+    return None
+
+
+def test_neighbours_are_walkable(map_: Map) -> None:
+    neighbours = NavigationGrid(map_).neighbours
+
+    assert neighbours[1 * 6 + 1] == (1 * 6 + 2,)
+    # Wall cell between two corridors
+    assert neighbours[2 * 6 + 1] == (1 * 6 + 1, 3 * 6 + 1)
+
+
+def test_path_goes_around_walls(map_: Map) -> None:
+    path = NavigationGrid(map_).find_path((1, 1), (1, 4))
+
+    assert path == [
+        (1, 1),
+        (2, 1),
+        (3, 1),
+        (4, 1),
+        (4, 2),
+        (4, 3),
+        (3, 3),
+        (2, 3),
+        (1, 3),
+        (1, 4),
+    ]
+
+
+@pytest.mark.parametrize("start, goal", [((-1, 1), (1, 1)), ((1, 1), (2, 2))])
+def test_no_path_to_wall_or_from_outside(map_: Map, start: Cell, goal: Cell) -> None:
+    assert NavigationGrid(map_).find_path(start, goal) == []
+
+
+def test_path_from_wall(map_: Map) -> None:
+    assert NavigationGrid(map_).find_path((1, 2), (1, 3)) == [(1, 2), (1, 3)]
+
+
+def test_no_path_to_closed_area(map_: Map) -> None:
+    map_[2, 4] = 1
+
+    assert NavigationGrid(map_).find_path((1, 1), (1, 4)) == []
+
+
+def test_paths_are_shortest_across_queries() -> None:
+    rng = np.random.default_rng(5)
+    map_ = (rng.random((24, 32)) < 0.3).astype(np.int8)
+    map_[[0, -1], :] = map_[:, [0, -1]] = 1
+    grid = NavigationGrid(map_)
+    free = [(int(x), int(y)) for y, x in np.argwhere(map_ == 0)]
+
+    for _ in range(50):
+        start, goal = (free[i] for i in rng.choice(len(free), 2))
+        path = grid.find_path(start, goal)
+        expected = bfs_length(map_, start, goal)
+
+        if expected is None:
+            assert path == []
+            continue
+        assert len(path) - 1 == expected
+        assert (path[0], path[-1]) == (start, goal)
+        steps = np.abs(np.diff(np.array(path), axis=0)).sum(axis=1)
+        assert (steps == 1).all()
+        assert all(map_[y, x] == 0 for x, y in path)
+
+
+def test_repeated_paths_are_cached(map_: Map) -> None:
+    grid = NavigationGrid(map_)
+
+    first = grid.find_path((1, 1), (1, 4))
+    first.clear()
+    second = grid.find_path((1, 1), (1, 4))
+
+    assert len(second) == 10
+    assert (grid.path_cache.hits, grid.path_cache.misses) == (1, 1)
+
+
+def test_path_cache_drops_least_recently_used() -> None:
+    cache = PathCache(2)
+    cache.put(((0, 0), (1, 0), 0), [(0, 0), (1, 0)])
+    cache.put(((0, 0), (2, 0), 0), [])
+    cache.get(((0, 0), (1, 0), 0))
+
+    cache.put(((0, 0), (3, 0), 0), [])
+
+    assert len(cache) == 2
+    assert cache.get(((0, 0), (2, 0), 0)) is None
+    assert cache.get(((0, 0), (1, 0), 0)) == [(0, 0), (1, 0)]
+
+
+def test_map_change_invalidates_paths(map_: Map) -> None:
+    grid = NavigationGrid(map_)
+    field = FlowField(grid)
+    field.update((1, 4))
+    assert len(grid.find_path((1, 1), (1, 4))) == 10
+
+    map_[2, 1] = 0
+    grid.invalidate()
+    field.update((1, 4))
+
+    assert grid.version == 1
+    assert grid.find_path((1, 1), (1, 4)) == [(1, 1), (1, 2), (1, 3), (1, 4)]
+    assert field.waypoints((1, 1), 2) == [(1, 2), (1, 3)]
+    assert grid.path_cache.misses == 1
+
+
+def test_flow_field_leads_to_target(map_: Map) -> None:
+    field = FlowField(NavigationGrid(map_))
+
+    field.update((1, 4))
+
+    assert field.waypoints((1, 1), 3) == [(2, 1), (3, 1), (4, 1)]
+    assert field.next_cell((1, 4)) is None
+    assert field.distance[1, 1] == 9
+    assert field.distance[0, 0] == -1
+
+
+def test_flow_field_steps_out_of_wall(map_: Map) -> None:
+    field = FlowField(NavigationGrid(map_))
+
+    field.update((1, 4))
+
+    assert field.next_cell((1, 2)) == (1, 3)
+    assert field.next_cell((-1, 2)) is None
+
+
+def test_flow_field_distances_are_shortest() -> None:
+    rng = np.random.default_rng(3)
+    map_ = (rng.random((24, 32)) < 0.3).astype(np.int8)
+    map_[[0, -1], :] = map_[:, [0, -1]] = 1
+    field = FlowField(NavigationGrid(map_))
+    free = [(int(x), int(y)) for y, x in np.argwhere(map_ == 0)]
+
+    for _ in range(20):
+        start, goal = (free[i] for i in rng.choice(len(free), 2))
+        field.update(goal)
+        expected = bfs_length(map_, start, goal)
+
+        waypoints = field.waypoints(start, len(free))
+        if expected is None:
+            assert waypoints == []
+            continue
+        assert len(waypoints) == expected == field.distance[start[1], start[0]]
+        assert waypoints[-1:] in ([], [goal])
+
+
+def test_compiled_paths_match_python() -> None:
+    path = pytest.importorskip("poom.pooma.path")
+    rng = np.random.default_rng(8)
+    map_ = (rng.random((40, 50)) < 0.35).astype(np.int8)
+    compiled, python = path.PathFinder(map_), path_numpy.PathFinder(map_)
+
+    for _ in range(200):
+        x0, x1 = rng.integers(-1, 51, 2)
+        y0, y1 = rng.integers(-1, 41, 2)
+        cells = (int(x0), int(y0), int(x1), int(y1))
+        assert compiled.find_path(*cells) == python.find_path(*cells)
+
+
+def test_python_finder_reuses_grid_neighbours(map_: Map) -> None:
+    grid = NavigationGrid(map_)
+    finder = path_numpy.PathFinder(map_, grid.neighbours)
+
+    assert grid.neighbours == path_numpy.walkable_neighbours(grid.walkable)
+    assert finder.find_path(1, 4, 1, 1) == grid.find_path((1, 4), (1, 1))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from poom.profiler import Profiler
+
+
+def test_profiler_keeps_last_frames() -> None:
+    profiler = Profiler(capacity=3)
+    for frame in range(5):
+        profiler.record("walls", frame / 1000)
+        profiler.record("walls", 1 / 1000)
+        profiler.end_frame(10 / 1000)
+
+    assert profiler.frames == 5
+    assert profiler.stages == ["walls"]
+    np.testing.assert_allclose(profiler.samples("walls"), [3, 4, 5])
+    np.testing.assert_allclose(profiler.samples(Profiler.frame_stage), [10] * 3)
+
+
+def test_profiler_percentiles() -> None:
+    profiler = Profiler(capacity=100)
+    for frame in range(1, 101):
+        profiler.record("walls", frame / 1000)
+        profiler.end_frame(frame / 1000)
+
+    assert profiler.percentiles("walls") == pytest.approx(
+        {"p50": 50.5, "p95": 95.05, "p99": 99.01},
+    )
+    assert profiler.percentiles("missing", (10,)) == {"p10": 0}
+
+
+def test_profiler_stage_missing_in_frame_took_no_time() -> None:
+    profiler = Profiler(capacity=4)
+    profiler.end_frame(0)
+    profiler.record("walls", 0.002)
+    profiler.end_frame(0)
+
+    np.testing.assert_allclose(profiler.samples("walls"), [0, 2])
+
+
+def test_profiler_clear() -> None:
+    profiler = Profiler()
+    profiler.record("walls", 1)
+    profiler.end_frame(1)
+    profiler.clear()
+
+    assert profiler.frames == 0
+    assert profiler.summary() == {}
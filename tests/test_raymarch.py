@@ -1,8 +1,20 @@
 import numpy as np
+import pygame as pg
 import pytest
 from numpy.typing import NDArray
 
-from poom.pooma.ray_march import shoot
+from poom.pooma.atlas import SpriteAtlas, SpriteFrame, TextureAtlas, shaded
+from poom.pooma.hits import WallHits
+from poom.pooma.ray_march import (
+    cast_walls,
+    draw_sprite,
+    draw_sprite_pixels,
+    draw_sprites,
+    draw_walls,
+    draw_walls_pixels,
+    shoot,
+)
+from poom.pooma.shading import Shading
 
 Map = NDArray[np.int8]
 
@@ -37,3 +49,164 @@ def test_shoot(
 ) -> None:
     dist = shoot(map_, x0, y0, angle)
     assert dist == pytest.approx(expected)
+
+
+def test_shoot_leaves_map() -> None:
+    open_map = np.zeros((3, 3), dtype=np.int8)
+    assert shoot(open_map, 1, 1, 0, max_distance=10) == pytest.approx(10)
+
+
+def test_draw_walls_pixels_matches_blit_path() -> None:
+    map_ = np.ones((3, 8), dtype=np.int8)
+    map_[1, 1:-1] = 0
+    width, height = 64, 48
+    texture = pg.Surface((8, 8), depth=32)
+    texture.fill((255, 0, 0))
+    surface = pg.Surface((width, height), depth=32)
+    stencil = np.full(width, np.inf, dtype=np.float32)
+    expected_surface = surface.copy()
+    expected_stencil = stencil.copy()
+
+    draw_walls(map_, expected_surface, expected_stencil, [texture], 1.5, 1.5, 0, 1)
+    hits = WallHits.empty(width)
+    cast_walls(map_, hits, 1.5, 1.5, 0, 1)
+    stencil[:] = hits.distance
+    pixels = pg.surfarray.pixels2d(surface)
+    atlas = TextureAtlas.from_surfaces([texture], surface)
+    draw_walls_pixels(pixels, atlas, hits, 1)
+    del pixels
+
+    assert stencil == pytest.approx(expected_stencil)
+    red = surface.map_rgb((255, 0, 0))
+    heights = (pg.surfarray.array2d(surface) == red).sum(axis=1)
+    expected_heights = (pg.surfarray.array2d(expected_surface) == red).sum(axis=1)
+    assert np.abs(heights - expected_heights).max() <= 1
+
+
+def test_draw_walls_pixels_shades_far_walls() -> None:
+    # Corridor, which far end is 5.5 cells away
+    map_ = np.ones((3, 8), dtype=np.int8)
+    map_[1, 1:-1] = 0
+    texture = pg.Surface((8, 8), depth=32)
+    texture.fill((200, 200, 200))
+    surface = pg.Surface((64, 48), depth=32)
+    surface.fill((0, 0, 255))
+    atlas = TextureAtlas.from_surfaces([texture], surface)
+    atlas = shaded(atlas, Shading(levels=2, distance=2), surface.get_masks())
+    hits = WallHits.empty(64)
+    cast_walls(map_, hits, 1.5, 1.5, 0, 1)
+    pixels = pg.surfarray.pixels2d(surface)
+
+    draw_walls_pixels(pixels, atlas, hits, 1)
+
+    # Near side walls are lit, far end wall is fully fogged
+    assert pixels[0, 0] == surface.map_rgb((200, 200, 200))
+    assert pixels[32, 24] == surface.map_rgb((0, 0, 0))
+    assert hits.distance[32] > 2
+
+
+def test_hits_mask_matches_drawn_walls() -> None:
+    map_ = np.ones((3, 8), dtype=np.int8)
+    map_[1, 1:-1] = 0
+    # Magenta texels must be masked like any other
+    texture = pg.Surface((8, 8), depth=32)
+    texture.fill((255, 0, 255))
+    surface = pg.Surface((64, 48), depth=32)
+    hits = WallHits.empty(64)
+    cast_walls(map_, hits, 1.5, 1.5, 0, 1)
+    hits.texture_index[:8] = -1
+    pixels = pg.surfarray.pixels2d(surface)
+
+    draw_walls_pixels(pixels, TextureAtlas.from_surfaces([texture], surface), hits, 1)
+
+    drawn = pixels == surface.map_rgb((255, 0, 255))
+    assert np.array_equal(hits.mask(1, 48), drawn)
+    assert not drawn[:8].any()
+
+
+def test_cast_walls_reports_hit_cells(map_: Map) -> None:
+    hits = WallHits.empty(4)
+    cast_walls(map_, hits, 1.5, 1.5, 0, 2 * np.pi)
+
+    # Columns look left, up, right and down from center of the map
+    assert hits.texture_index.tolist() == [1, 1, 1, 1]
+    assert hits.cell_x.tolist() == [0, 1, 2, 1]
+    assert hits.cell_y.tolist() == [1, 0, 1, 2]
+    assert hits.is_vertical.tolist() == [0, 1, 0, 1]
+    assert hits.distance == pytest.approx([0.5] * 4)
+
+
+def test_draw_sprite_pixels_matches_blit_path() -> None:
+    width, height = 64, 48
+    texture = pg.Surface((8, 8), pg.SRCALPHA, 32)
+    # Left half is opaque, right half is transparent
+    texture.fill((0, 255, 0, 255), (0, 0, 4, 8))
+    surface = pg.Surface((width, height), depth=32)
+    stencil = np.full(width, np.inf, dtype=np.float32)
+    # Wall in front of the left third of the screen
+    stencil[: width // 3] = 1
+    expected_surface = surface.copy()
+    expected_stencil = stencil.copy()
+
+    draw_sprite(expected_surface, expected_stencil, texture, 4, 0, 0, 0, 0, 1)
+    pixels = pg.surfarray.pixels2d(surface)
+    frame = SpriteFrame.from_surface(texture, surface)
+    draw_sprite_pixels(pixels, stencil, frame, 4, 0, 0, 0, 0, 1)
+    del pixels
+
+    assert stencil == pytest.approx(expected_stencil)
+    assert (
+        pg.surfarray.array2d(surface) == pg.surfarray.array2d(expected_surface)
+    ).all()
+
+
+def test_draw_sprites_draws_far_sprites_first() -> None:
+    width, height = 64, 48
+    surface = pg.Surface((width, height), depth=32)
+    frames = []
+    for color in ("red", "green"):
+        texture = pg.Surface((8, 8), pg.SRCALPHA, 32)
+        texture.fill(color)
+        frames.append(SpriteFrame.from_surface(texture, surface))
+    atlas = SpriteAtlas.from_frames(frames)
+    stencil = np.full(width, np.inf, dtype=np.float32)
+    # Near green sprite goes first, but must cover the far red one
+    positions = np.array([[2, 0], [4, 0], [-4, 0]], dtype=np.float32)
+
+    pixels = pg.surfarray.pixels2d(surface)
+    draw_sprites(
+        pixels,
+        stencil,
+        atlas,
+        positions,
+        np.array([1, 0, 0], dtype=np.int32),
+        0,
+        0,
+        0,
+        1,
+    )
+    del pixels
+
+    assert surface.get_at((width // 2, height // 2)) == pg.Color("green")
+    assert stencil[width // 2] == pytest.approx(2)
+
+
+def test_draw_sprites_checks_frame_indices() -> None:
+    surface = pg.Surface((8, 8), depth=32)
+    texture = pg.Surface((2, 2), pg.SRCALPHA, 32)
+    atlas = SpriteAtlas.from_frames([SpriteFrame.from_surface(texture, surface)])
+    stencil = np.full(8, np.inf, dtype=np.float32)
+    positions = np.array([[2, 0]], dtype=np.float32)
+
+    with pytest.raises(IndexError):
+        draw_sprites(
+            pg.surfarray.pixels2d(surface),
+            stencil,
+            atlas,
+            positions,
+            np.array([1], dtype=np.int32),
+            0,
+            0,
+            0,
+            1,
+        )
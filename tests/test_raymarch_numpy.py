@@ -0,0 +1,151 @@
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pygame as pg
+import pytest
+from numpy.typing import NDArray
+
+from poom.level import load_map
+from poom.pooma import ray_march_numpy
+from poom.pooma.atlas import SpriteAtlas, SpriteFrame, TextureAtlas, shaded
+from poom.pooma.hits import WallHits
+from poom.pooma.shading import Shading
+
+ray_march = pytest.importorskip("poom.pooma.ray_march")
+
+Map = NDArray[np.int8]
+LEVEL_MAP = Path(__file__).parent.parent / "assets" / "levels" / "1" / "map.txt"
+
+
+@pytest.fixture
+def map_() -> Map:
+    return load_map(LEVEL_MAP)
+
+
+@pytest.fixture
+def atlas(surface: pg.Surface) -> TextureAtlas:
+    textures = []
+    for index in range(9):
+        texture = pg.Surface((16, 8), depth=32)
+        pg.surfarray.pixels2d(texture)[:] = np.arange(16 * 8).reshape(16, 8)
+        texture.fill((index * 20, 0, 0), special_flags=pg.BLEND_RGB_ADD)
+        textures.append(texture)
+    return TextureAtlas.from_surfaces(textures, surface)
+
+
+@pytest.fixture
+def surface() -> pg.Surface:
+    return pg.Surface((320, 180), depth=32)
+
+
+@pytest.mark.parametrize("angle", [0, 0.3, np.pi / 2, 2, np.pi, 4, 5.9])
+def test_shoot_matches_compiled(map_: Map, angle: float) -> None:
+    expected = ray_march.shoot(map_, 2.1, 2.3, angle)
+    assert ray_march_numpy.shoot(map_, 2.1, 2.3, angle) == pytest.approx(
+        expected, rel=1e-4
+    )
+
+
+@pytest.mark.parametrize("view", [0.1, 1, 2.5, 4])
+@pytest.mark.parametrize("shading", [None, Shading(levels=4, distance=6)])
+def test_draw_walls_pixels_matches_compiled(
+    map_: Map,
+    surface: pg.Surface,
+    atlas: TextureAtlas,
+    view: float,
+    shading: Optional[Shading],
+) -> None:
+    if shading is not None:
+        atlas = shaded(atlas, shading, surface.get_masks())
+    expected_surface = surface.copy()
+    hits = WallHits.empty(surface.get_width())
+    expected_hits = WallHits.empty(surface.get_width())
+
+    ray_march_numpy.cast_walls(map_, hits, 3.5, 2.5, view, 1.5)
+    pixels = pg.surfarray.pixels2d(surface)
+    ray_march_numpy.draw_walls_pixels(pixels, atlas, hits, 1.5)
+    ray_march.cast_walls(map_, expected_hits, 3.5, 2.5, view, 1.5)
+    expected_pixels = pg.surfarray.pixels2d(expected_surface)
+    ray_march.draw_walls_pixels(expected_pixels, atlas, expected_hits, 1.5)
+
+    assert hits.distance == pytest.approx(expected_hits.distance, rel=1e-4)
+    assert (hits.texture_index == expected_hits.texture_index).all()
+    assert (hits.is_vertical == expected_hits.is_vertical).all()
+    assert (hits.cell_x == expected_hits.cell_x).all()
+    assert (hits.cell_y == expected_hits.cell_y).all()
+    # Float rounding may move texel borders by a pixel
+    assert (pixels != expected_pixels).mean() < 0.01
+
+
+@pytest.mark.parametrize("sprite_x", [2.5, 3, 3.4])
+def test_draw_sprite_pixels_matches_compiled(
+    surface: pg.Surface,
+    sprite_x: float,
+) -> None:
+    texture = pg.Surface((8, 16), pg.SRCALPHA, 32)
+    texture.fill((0, 255, 0, 255), (0, 0, 4, 16))
+    frame = SpriteFrame.from_surface(texture, surface)
+    stencil = np.full(surface.get_width(), 2, dtype=np.float32)
+    stencil[:100] = 0.5
+    expected_stencil = stencil.copy()
+    expected_surface = surface.copy()
+
+    pixels = pg.surfarray.pixels2d(surface)
+    ray_march_numpy.draw_sprite_pixels(
+        pixels, stencil, frame, sprite_x, 3, 2, 2, 0.8, 1.5
+    )
+    expected_pixels = pg.surfarray.pixels2d(expected_surface)
+    ray_march.draw_sprite_pixels(
+        expected_pixels, expected_stencil, frame, sprite_x, 3, 2, 2, 0.8, 1.5
+    )
+
+    assert stencil == pytest.approx(expected_stencil)
+    assert (pixels == expected_pixels).all()
+
+
+@pytest.mark.parametrize("shading", [None, Shading(levels=4, distance=6)])
+def test_draw_sprites_matches_compiled(
+    surface: pg.Surface,
+    shading: Optional[Shading],
+) -> None:
+    frames = []
+    for size in [(8, 16), (16, 16), (4, 6)]:
+        texture = pg.Surface(size, pg.SRCALPHA, 32)
+        texture.fill((0, 255, 0, 255), (0, 0, size[0] // 2, size[1]))
+        frames.append(SpriteFrame.from_surface(texture, surface))
+    atlas = SpriteAtlas.from_frames(frames)
+    if shading is not None:
+        atlas = shaded(atlas, shading, surface.get_masks())
+    rng = np.random.default_rng(1)
+    positions = rng.uniform(-5, 5, (30, 2)).astype(np.float32)
+    indices = rng.integers(0, len(frames), 30).astype(np.int32)
+    stencil = np.full(surface.get_width(), 6, dtype=np.float32)
+    stencil[:100] = 0.5
+    expected_stencil = stencil.copy()
+    expected_surface = surface.copy()
+
+    pixels = pg.surfarray.pixels2d(surface)
+    ray_march_numpy.draw_sprites(
+        pixels, stencil, atlas, positions, indices, 0, 0, 0.8, 1.5
+    )
+    expected_pixels = pg.surfarray.pixels2d(expected_surface)
+    ray_march.draw_sprites(
+        expected_pixels, expected_stencil, atlas, positions, indices, 0, 0, 0.8, 1.5
+    )
+
+    assert stencil == pytest.approx(expected_stencil)
+    assert (pixels == expected_pixels).all()
+
+
+def test_cull_sprites_matches_compiled() -> None:
+    rng = np.random.default_rng(2)
+    positions = rng.uniform(-5, 5, (50, 2)).astype(np.float32)
+    sizes = rng.integers(4, 32, (50, 2)).astype(np.int32)
+    stencil = rng.uniform(0, 6, 320).astype(np.float32)
+
+    visible = ray_march_numpy.cull_sprites(stencil, positions, sizes, 180, 0, 0, 1, 1.5)
+    expected = ray_march.cull_sprites(stencil, positions, sizes, 180, 0, 0, 1, 1.5)
+
+    assert 0 < visible.sum() < visible.size
+    assert (visible == expected).all()
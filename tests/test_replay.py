@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pygame as pg
+import pytest
+
+from poom import headless, replay
+from poom.headless import hunter
+from poom.player import PressedKeys
+from poom.replay import Recording, RecordingKeys
+from poom.settings import ROOT
+from poom.world import World
+
+
+@pytest.fixture(autouse=True, scope="module")
+def init() -> None:
+    headless.init()
+
+
+def test_recording_encodes_runs_of_keys() -> None:
+    recording = Recording("1", seed=0, tick_rate=60)
+
+    for keys in [(), (), (pg.K_w,), (pg.K_w,), (pg.K_w,), ()]:
+        recording.append(keys)
+
+    assert recording.keys == [(2, ()), (3, (pg.K_w,)), (1, ())]
+    assert recording.steps == 6
+    assert list(recording.frames())[1:3] == [(), (pg.K_w,)]
+
+
+def test_recordings_survive_saving(tmp_path: Path) -> None:
+    recording = Recording(
+        "2",
+        seed=7,
+        tick_rate=30,
+        final={"enemies": []},
+        flow_field=False,
+        decisions_per_step=1,
+    )
+    recording.append((pg.K_a, pg.K_SPACE))
+    path = tmp_path / "session.json"
+
+    replay.save([recording], path)
+
+    assert replay.load(path) == [recording]
+
+
+def test_replay_reproduces_fight() -> None:
+    keys = PressedKeys()
+    recording = Recording("1", seed=11, tick_rate=60)
+    world = World.from_dir(
+        ROOT / "assets" / "levels" / "1",
+        RecordingKeys(recording, keys),
+        recording.seed,
+    )
+    for _ in range(180):
+        hunter(world, keys)
+        world.step(1 / 60)
+    recording.final = replay.world_state(world)
+
+    replayed = replay.replay_world(recording)
+
+    assert recording.steps == 180
+    assert replay.world_state(replayed) == recording.final
+    assert replayed.player.position != pg.Vector2(1.1, 1.1)
+
+
+def test_replay_uses_recorded_ai_settings() -> None:
+    recording = Recording("1", seed=0, tick_rate=60, flow_field=False)
+
+    world = replay.create_world(recording)
+
+    assert world.flow_field is None
@@ -0,0 +1,111 @@
+from math import radians
+from typing import List
+
+import numpy as np
+import pygame as pg
+import pytest
+
+from poom.ai.scheduler import DecisionScheduler
+from poom.level import Map
+from poom.viewer import Viewer
+
+
+class MockedOwner:
+    def __init__(self, name: str, position: pg.Vector2, log: List[str]) -> None:
+        self.name = name
+        self.position = position
+        self.decision_pending = True
+        self._log = log
+
+    def decide(self) -> None:
+        self.decision_pending = False
+        self._log.append(self.name)
+
+
+@pytest.fixture
+def map_() -> Map:
+    # Room with a pillar at (4, 2)
+    map_ = np.zeros((8, 12), dtype=np.int8)
+    map_[[0, -1], :] = map_[:, [0, -1]] = 1
+    map_[2, 4] = 1
+    return map_
+
+
+@pytest.fixture
+def player() -> Viewer:
+    # Looks along x axis
+    return Viewer(pg.Vector2(1.5, 4.5), 0, radians(90))
+
+
+def test_visible_and_near_enemies_go_first(player: Viewer, map_: Map) -> None:
+    log: List[str] = []
+    scheduler = DecisionScheduler(player, map_, max_decisions=2)
+    for name, position in [
+        ("behind", (1.2, 4.5)),
+        ("far", (9.5, 4.5)),
+        ("near", (3.5, 5.5)),
+    ]:
+        scheduler.request(MockedOwner(name, pg.Vector2(position), log))
+
+    assert scheduler.run() == 2
+    assert log == ["near", "far"]
+    assert scheduler.pending == 1
+
+
+def test_walls_hide_enemies(player: Viewer, map_: Map) -> None:
+    log: List[str] = []
+    scheduler = DecisionScheduler(player, map_, max_decisions=1)
+    # Pillar stands between player and the nearest enemy
+    scheduler.request(MockedOwner("hidden", pg.Vector2(5.5, 1.5), log))
+    scheduler.request(MockedOwner("seen", pg.Vector2(9.5, 4.5), log))
+
+    scheduler.run()
+
+    assert log == ["seen"]
+
+
+def test_waiting_enemies_are_not_starved(player: Viewer, map_: Map) -> None:
+    log: List[str] = []
+    scheduler = DecisionScheduler(player, map_, max_decisions=1)
+    scheduler.request(MockedOwner("behind", pg.Vector2(1.2, 4.5), log))
+
+    for step in range(DecisionScheduler.max_wait + 1):
+        scheduler.request(MockedOwner(str(step), pg.Vector2(3.5, 4.5), log))
+        scheduler.run()
+
+    assert log[-1] == "behind"
+
+
+def test_budget_stops_decisions(player: Viewer, map_: Map) -> None:
+    log: List[str] = []
+    clock = iter(range(10))
+    scheduler = DecisionScheduler(
+        player,
+        map_,
+        budget=1.5,
+        clock=lambda: next(clock),
+    )
+    for x in range(4):
+        scheduler.request(MockedOwner(str(x), pg.Vector2(x + 2.5, 4.5), log))
+
+    assert scheduler.run() == 2
+    assert scheduler.run() == 2
+    assert log == ["0", "1", "2", "3"]
+
+
+def test_decided_out_of_queue_are_skipped(player: Viewer, map_: Map) -> None:
+    log: List[str] = []
+    owner = MockedOwner("dead", pg.Vector2(3.5, 4.5), log)
+    scheduler = DecisionScheduler(player, map_)
+    scheduler.request(owner)
+    owner.decide()
+
+    assert scheduler.run() == 0
+    assert scheduler.pending == 0
+
+
+def test_invalid_limits(player: Viewer, map_: Map) -> None:
+    with pytest.raises(ValueError):
+        DecisionScheduler(player, map_, max_decisions=-1)
+    with pytest.raises(ValueError):
+        DecisionScheduler(player, map_, budget=0)
@@ -0,0 +1,70 @@
+import numpy as np
+import pygame as pg
+import pytest
+
+from poom.pooma.atlas import SpriteAtlas, SpriteFrame, shaded
+from poom.pooma.shading import Shading
+
+
+@pytest.fixture
+def surface() -> pg.Surface:
+    return pg.Surface((1, 1), pg.SRCALPHA, 32)
+
+
+def test_shades_fade_into_fog_color(surface: pg.Surface) -> None:
+    texture = pg.Surface((2, 1), pg.SRCALPHA, 32)
+    texture.fill((200, 100, 0, 255))
+    texture.set_at((1, 0), (200, 100, 0, 0))
+    palette = SpriteFrame.from_surface(texture, surface).pixels.ravel()
+    shading = Shading(levels=3, distance=4, color=(0, 0, 100))
+
+    levels = shading.shade(palette, surface.get_masks()).reshape(3, 2)
+    colors = [[surface.unmap_rgb(int(color)) for color in level] for level in levels]
+
+    assert colors[0] == [(200, 100, 0, 255), (200, 100, 0, 0)]
+    assert colors[1] == [(100, 50, 50, 255), (100, 50, 50, 0)]
+    assert colors[2] == [(0, 0, 100, 255), (0, 0, 100, 0)]
+
+
+def test_quantize_keeps_few_colors_exact(surface: pg.Surface) -> None:
+    pixels = np.array([[7, 3], [7, 1]], dtype=np.uint32)
+
+    indices, palette = Shading().quantize(pixels, surface.get_masks())
+
+    assert palette.tolist() == [1, 3, 7]
+    assert palette[indices].tolist() == [7, 3, 7, 1]
+
+
+def test_quantize_drops_low_bits_of_many_colors(surface: pg.Surface) -> None:
+    pixels = np.arange(2 ** 17, dtype=np.uint32)
+    masks = surface.get_masks()
+
+    indices, palette = Shading().quantize(pixels, masks)
+
+    assert masks == (0xFF0000, 0xFF00, 0xFF, 0xFF000000)
+    assert indices.dtype == np.uint16
+    assert palette.size <= Shading.max_colors
+    # Like RGB565, alpha is set
+    expected = pixels & np.uint32(0xF8FCF8) | np.uint32(0xFF000000)
+    assert (palette[indices] == expected).all()
+
+
+def test_shaded_atlas_keeps_layout(surface: pg.Surface) -> None:
+    texture = pg.Surface((4, 2), pg.SRCALPHA, 32)
+    texture.fill((10, 20, 30, 255))
+    frame = SpriteFrame.from_surface(texture, surface)
+    atlas = SpriteAtlas.from_frames([frame, frame])
+    shading = Shading(levels=8, distance=2)
+
+    result = shaded(atlas, shading, surface.get_masks())
+
+    assert result.pixels is atlas.pixels
+    assert result.indices.size == atlas.pixels.size
+    assert result.palette.size == 8
+    assert (result.levels, result.level_scale) == (8, 3.5)
+
+
+@pytest.mark.parametrize("levels, distance", [(1, 10), (4, 0)])
+def test_invalid_shading(levels: int, distance: float) -> None:
+    with pytest.raises(ValueError):
+        Shading(levels=levels, distance=distance)
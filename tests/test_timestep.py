@@ -0,0 +1,54 @@
+import pygame as pg
+import pytest
+
+from poom.timestep import FixedTimestep
+from poom.viewer import InterpolatedViewer, Viewer
+
+
+def test_timestep_accumulates_frame_time() -> None:
+    timestep = FixedTimestep(rate=50)
+
+    assert timestep.advance(0.015) == 0
+    assert timestep.alpha == pytest.approx(0.75)
+    assert timestep.advance(0.030) == 2
+    assert timestep.alpha == pytest.approx(0.25)
+
+
+def test_timestep_steps_dont_depend_on_frame_rate() -> None:
+    slow, fast = FixedTimestep(), FixedTimestep()
+
+    slow_steps = sum(slow.advance(1 / 30) for _ in range(30))
+    fast_steps = sum(fast.advance(1 / 144) for _ in range(144))
+
+    assert slow_steps == pytest.approx(fast_steps, abs=1) == 60
+
+
+def test_timestep_drops_time_over_max_steps() -> None:
+    timestep = FixedTimestep(rate=10, max_steps=3)
+
+    assert timestep.advance(1.05) == 3
+    assert timestep.alpha == pytest.approx(0.5)
+    assert timestep.advance(0) == 0
+
+
+@pytest.mark.parametrize("rate, max_steps", [(0, 5), (60, 0)])
+def test_invalid_timestep(rate: int, max_steps: int) -> None:
+    with pytest.raises(ValueError):
+        FixedTimestep(rate, max_steps)
+
+
+def test_interpolated_viewer_moves_between_steps() -> None:
+    player = Viewer(pg.Vector2(1, 1), 0, 1)
+    camera = InterpolatedViewer(player)
+
+    camera.save_pose()
+    # Position is moved in place like player does
+    player.position.x += 1
+    player._angle = 1  # noqa: WPS437
+    camera.interpolate(0.25)
+
+    assert camera.position == pg.Vector2(1.25, 1)
+    assert camera.angle == pytest.approx(0.25)
+    camera.interpolate(1)
+    assert camera.position == player.position
+    assert camera.position is not player.position
@@ -0,0 +1,66 @@
+import json
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from poom import trace
+from poom.trace import TraceEvent, Tracer
+
+
+@pytest.fixture
+def tracer() -> Iterator[Tracer]:
+    yield trace.start(Tracer())
+    trace.stop()
+
+
+def spans(tracer: Tracer) -> List[TraceEvent]:
+    return [event for event in tracer.events if event["ph"] == "X"]
+
+
+def test_span_records_complete_event(tracer: Tracer) -> None:
+    with trace.span("frame"):
+        with trace.span("enemy", "update", {"index": 2}):
+            pass  # noqa: WPS420
+
+    enemy, frame = spans(tracer)
+    expected = ("enemy", "update", {"index": 2})
+    assert (enemy["name"], enemy["cat"], enemy["args"]) == expected
+    assert frame["name"] == "frame"
+    assert "args" not in frame
+    assert frame["ts"] <= enemy["ts"]
+    assert enemy["ts"] + enemy["dur"] <= frame["ts"] + frame["dur"]
+
+
+def test_span_does_nothing_when_stopped(tracer: Tracer) -> None:
+    trace.stop()
+
+    with trace.span("frame"):
+        pass  # noqa: WPS420
+
+    assert trace.current() is None
+    assert not spans(tracer)
+
+
+def test_tracer_drops_events_over_limit() -> None:
+    # Metadata event takes one slot
+    tracer = Tracer(max_events=3)
+
+    for _ in range(4):
+        tracer.complete("stage", 0, 1)
+
+    assert len(spans(tracer)) == 2
+    assert tracer.dropped == 2
+
+
+def test_save_writes_json_object(tracer: Tracer, tmp_path: Path) -> None:
+    with trace.span("frame"):
+        pass  # noqa: WPS420
+    tracer.instant("level_loaded")
+    path = tmp_path / "trace.json"
+
+    tracer.save(path)
+
+    data = json.loads(path.read_text())
+    assert [event["ph"] for event in data["traceEvents"]] == ["M", "X", "i"]
+    assert data["otherData"] == {"dropped_events": 0}